@@ -9,3 +9,6 @@ class HomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.home'
     verbose_name = 'Home'
+
+    def ready(self):
+        from . import assets, signals  # noqa: F401
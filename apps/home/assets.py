@@ -0,0 +1,387 @@
+"""
+Front-end asset build.
+
+Every page loads one stylesheet and one script, ``build/site.min.css`` and
+``build/site.min.js``, which ``build()`` assembles from the copies of
+Bootstrap, Font Awesome and Vazirmatn vendored in ``assets/vendor/`` and
+from ``static/css/main.css`` and ``static/js/main.js``:
+
+* the Font Awesome stylesheet and fonts are cut down to the icons that
+  ``templates/`` and ``static/js/`` reference;
+* Vazirmatn is cut down to the Arabic script, Basic Latin and punctuation
+  ranges, for each weight whose source font is vendored;
+* the stylesheets and the scripts are concatenated and minified;
+* the rules each page template needs for its first screen are extracted
+  into ``critical/`` (see ``critical_css``).
+
+The results are written to ``static/build/`` and committed, so that
+``collectstatic`` only has to pick them up. WhiteNoise's storage then gives
+them content-hashed names, which it serves with immutable cache headers,
+and writes Brotli and gzip copies next to them. Run ``build_assets`` after
+changing any of the inputs, templates included; the ``home.W001`` check,
+which ``collectstatic`` runs, warns when the committed results are out of
+date. With ``DEBUG`` on, ``rebuild_if_stale()`` rebuilds them as pages are
+requested.
+"""
+
+import hashlib
+import io
+import logging
+import re
+import threading
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core import checks
+
+
+# Vendored files and the pinned release each was downloaded from;
+# ``fetch()`` downloads the ones that are missing. The vendored Vazirmatn
+# Medium and Bold are static instances of the same release's variable font.
+SOURCES = {
+    'bootstrap/bootstrap.rtl.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.rtl.min.css',
+    'bootstrap/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js',
+    'fontawesome/fontawesome.min.css': 'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@6.4.0/css/fontawesome.min.css',
+    'fontawesome/solid.min.css': 'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@6.4.0/css/solid.min.css',
+    'fontawesome/brands.min.css': 'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@6.4.0/css/brands.min.css',
+    'fontawesome/fa-solid-900.woff2': 'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@6.4.0/webfonts/fa-solid-900.woff2',
+    'fontawesome/fa-brands-400.woff2': 'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@6.4.0/webfonts/fa-brands-400.woff2',
+    'vazirmatn/Vazirmatn-Regular.woff2': 'https://cdn.jsdelivr.net/npm/vazirmatn@33.0.3/fonts/webfonts/Vazirmatn-Regular.woff2',
+    'vazirmatn/Vazirmatn-Medium.woff2': 'https://cdn.jsdelivr.net/npm/vazirmatn@33.0.3/fonts/webfonts/Vazirmatn-Medium.woff2',
+    'vazirmatn/Vazirmatn-Bold.woff2': 'https://cdn.jsdelivr.net/npm/vazirmatn@33.0.3/fonts/webfonts/Vazirmatn-Bold.woff2',
+}
+
+# (vendored font, output name, font-family, font-weight)
+ICON_FONTS = [
+    ('fontawesome/fa-solid-900.woff2', 'fa-solid-900', 'Font Awesome 6 Free', 900),
+    ('fontawesome/fa-brands-400.woff2', 'fa-brands-400', 'Font Awesome 6 Brands', 400),
+]
+TEXT_FONTS = [
+    ('vazirmatn/Vazirmatn-Regular.woff2', 'vazirmatn-400', 'Vazirmatn', 400),
+    ('vazirmatn/Vazirmatn-Medium.woff2', 'vazirmatn-500', 'Vazirmatn', 500),
+    ('vazirmatn/Vazirmatn-Bold.woff2', 'vazirmatn-700', 'Vazirmatn', 700),
+]
+# Basic Latin and Latin-1 (digits, e-mail addresses), general punctuation
+# with the zero-width non-joiner and the direction marks, Arabic and the
+# Arabic presentation forms.
+TEXT_UNICODE_RANGE = 'U+0000-00FF,U+2000-206F,U+0600-06FF,U+FB50-FDFF,U+FE70-FEFF'
+
+ICON_STYLESHEETS = ['fontawesome/fontawesome.min.css', 'fontawesome/solid.min.css', 'fontawesome/brands.min.css']
+
+# Bundles in load order. 'vendor:' paths are in assets/vendor/, the others
+# in static/; only the project's own files are minified here.
+STYLESHEET = ['vendor:bootstrap/bootstrap.rtl.min.css', 'icons', 'fonts', 'css/main.css']
+SCRIPT = ['vendor:bootstrap/bootstrap.bundle.min.js', 'js/main.js']
+
+ICON_NAME = re.compile(r'\bfa-([a-z0-9-]+)')
+ICON_RULE = re.compile(r'((?:\.fa-[a-z0-9-]+:before,?)+)\{content:"\\([0-9a-f]+)"\}')
+FONT_FACE = re.compile(r'@font-face\{[^}]*\}')
+CHARSET = re.compile(r'@charset "[^"]*";')
+SOURCE_MAP = re.compile(r'^\s*(/\*# sourceMappingURL=.*?\*/|//# sourceMappingURL=.*)$', re.MULTILINE)
+
+# Directories of templates/ whose page templates get critical CSS.
+CRITICAL_TEMPLATE_DIRS = ['home', 'base']
+
+DIGEST_FILE = '.digest'
+
+logger = logging.getLogger(__name__)
+_rebuild_lock = threading.Lock()
+
+
+class AssetError(Exception):
+    pass
+
+
+def get_vendor_dir():
+    return Path(settings.BASE_DIR) / 'assets' / 'vendor'
+
+
+def get_static_dir():
+    return Path(settings.BASE_DIR) / 'static'
+
+
+def get_templates_dir():
+    return Path(settings.BASE_DIR) / 'templates'
+
+
+def get_output_dir():
+    return get_static_dir() / 'build'
+
+
+def get_critical_path(template_name):
+    """
+    Path of the critical CSS of ``template_name`` in the output directory.
+    """
+    return f'critical/{Path(template_name).with_suffix(".css").as_posix()}'
+
+
+def fetch():
+    """
+    Download the vendored files that are missing. Returns the names of the
+    files fetched and ``{name: error}`` for those that could not be.
+    """
+    fetched, failed = [], {}
+    for name, url in SOURCES.items():
+        path = get_vendor_dir() / name
+        if path.exists():
+            continue
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                data = response.read()
+        except OSError as e:
+            failed[name] = e
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        fetched.append(name)
+    return fetched, failed
+
+
+def read_vendor(name, required=True):
+    path = get_vendor_dir() / name
+    if not path.exists():
+        if required:
+            raise AssetError(f'assets/vendor/{name} is missing; run build_assets --fetch')
+        return None
+    return path.read_bytes()
+
+
+def get_icon_names():
+    """
+    Font Awesome icon names referenced in the templates and the scripts.
+    Modifiers such as ``fa-3x`` are included; they match no icon rule.
+    """
+    names = set()
+    paths = [*get_templates_dir().rglob('*.html'), *(get_static_dir() / 'js').rglob('*.js')]
+    for path in paths:
+        names.update(ICON_NAME.findall(path.read_text(encoding='utf-8')))
+    return names
+
+
+def subset_icon_css(css, names):
+    """
+    Drop the icon rules of ``css`` for icons not in ``names``, and its
+    @font-face rules. Returns the stylesheet and the code points kept.
+    """
+    codepoints = set()
+
+    def replace(match):
+        selectors = [s for s in match.group(1).split(',') if s[len('.fa-'):-len(':before')] in names]
+        if not selectors:
+            return ''
+        codepoints.add(int(match.group(2), 16))
+        return f'{",".join(selectors)}{{content:"\\{match.group(2)}"}}'
+
+    return ICON_RULE.sub(replace, FONT_FACE.sub('', css)), codepoints
+
+
+def parse_unicode_range(value):
+    codepoints = set()
+    for part in value.split(','):
+        start, _, end = part.strip()[2:].partition('-')
+        codepoints.update(range(int(start, 16), int(end or start, 16) + 1))
+    return codepoints
+
+
+def subset_font(data, codepoints):
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    # Font Awesome's fonts have a padded head table, which is harmless.
+    logging.getLogger('fontTools').setLevel(logging.ERROR)
+    # Keep the source's timestamps so that the output only changes with it.
+    font = TTFont(io.BytesIO(data), recalcTimestamp=False)
+    options = subset.Options()
+    options.flavor = 'woff2'
+    # The Arabic joining forms and the marks are OpenType features.
+    options.layout_features = ['*']
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    output = io.BytesIO()
+    subset.save_font(font, output, options)
+    return output.getvalue()
+
+
+def font_face(family, weight, filename, display, unicode_range=None):
+    rule = (
+        f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weight};'
+        f'font-display:{display};src:url(fonts/{filename}.woff2) format("woff2")'
+    )
+    if unicode_range:
+        rule += f';unicode-range:{unicode_range}'
+    return rule + '}'
+
+
+def build_icons(outputs):
+    names = get_icon_names()
+    css, codepoints = [], set()
+    for name in ICON_STYLESHEETS:
+        stylesheet, kept = subset_icon_css(read_vendor(name).decode(), names)
+        css.append(stylesheet)
+        codepoints |= kept
+    for source, filename, family, weight in ICON_FONTS:
+        outputs[f'fonts/{filename}.woff2'] = subset_font(read_vendor(source), codepoints)
+        css.append(font_face(family, weight, filename, 'block'))
+    return '\n'.join(css)
+
+
+def build_fonts(outputs):
+    codepoints = parse_unicode_range(TEXT_UNICODE_RANGE)
+    css = []
+    for source, filename, family, weight in TEXT_FONTS:
+        data = read_vendor(source, required=False)
+        if data is None:
+            continue
+        outputs[f'fonts/{filename}.woff2'] = subset_font(data, codepoints)
+        css.append(font_face(family, weight, filename, 'swap', TEXT_UNICODE_RANGE))
+    return '\n'.join(css)
+
+
+def build_stylesheet(outputs):
+    import rcssmin
+
+    parts = []
+    for name in STYLESHEET:
+        if name == 'icons':
+            css = build_icons(outputs)
+        elif name == 'fonts':
+            css = build_fonts(outputs)
+        elif name.startswith('vendor:'):
+            css = read_vendor(name[len('vendor:'):]).decode()
+        else:
+            css = rcssmin.cssmin((get_static_dir() / name).read_text(encoding='utf-8'), keep_bang_comments=True)
+        parts.append(SOURCE_MAP.sub('', CHARSET.sub('', css)).strip())
+    return '@charset "UTF-8";' + '\n'.join(parts) + '\n'
+
+
+def build_script():
+    import rjsmin
+
+    parts = []
+    for name in SCRIPT:
+        if name.startswith('vendor:'):
+            js = read_vendor(name[len('vendor:'):]).decode()
+        else:
+            js = rjsmin.jsmin((get_static_dir() / name).read_text(encoding='utf-8'), keep_bang_comments=True)
+        parts.append(SOURCE_MAP.sub('', js).strip())
+    return ';\n'.join(parts) + '\n'
+
+
+def build_critical(stylesheet, outputs):
+    from . import critical_css
+
+    for directory in CRITICAL_TEMPLATE_DIRS:
+        for path in sorted((get_templates_dir() / directory).rglob('*.html')):
+            name = path.relative_to(get_templates_dir()).as_posix()
+            css = critical_css.extract(stylesheet, name)
+            if css is not None:
+                outputs[get_critical_path(name)] = css.encode()
+
+
+def get_inputs():
+    inputs = [get_vendor_dir() / name for name in SOURCES]
+    inputs += [get_static_dir() / name for name in STYLESHEET + SCRIPT if '/' in name and ':' not in name]
+    inputs += sorted(get_templates_dir().rglob('*.html'))
+    inputs += sorted((get_static_dir() / 'js').rglob('*.js'))
+    return inputs
+
+
+def get_digest():
+    """
+    Digest of every input of the build.
+    """
+    from . import critical_css
+
+    digest = hashlib.sha256(f'fold={critical_css.get_fold()}'.encode())
+    for path in get_inputs():
+        digest.update(path.relative_to(settings.BASE_DIR).as_posix().encode())
+        digest.update(path.read_bytes() if path.exists() else b'-')
+    return digest.hexdigest()
+
+
+def build():
+    """
+    Build every output in memory and return ``{path: bytes}``, with paths
+    relative to the output directory.
+    """
+    outputs = {}
+    stylesheet = build_stylesheet(outputs)
+    outputs['site.min.css'] = stylesheet.encode()
+    outputs['site.min.js'] = build_script().encode()
+    build_critical(stylesheet, outputs)
+    outputs[DIGEST_FILE] = f'{get_digest()}\n'.encode()
+    return outputs
+
+
+def get_changes(outputs):
+    """
+    Paths in the output directory that ``outputs`` would write, change or
+    delete.
+    """
+    directory = get_output_dir()
+    existing = {str(path.relative_to(directory)) for path in directory.rglob('*') if path.is_file()}
+    changed = {
+        name for name, data in outputs.items()
+        if name not in existing or (directory / name).read_bytes() != data
+    }
+    return sorted(changed | (existing - set(outputs)))
+
+
+def write(outputs):
+    """
+    Write ``outputs`` and delete stale files. Returns the paths changed.
+    """
+    directory = get_output_dir()
+    changes = get_changes(outputs)
+    for name in changes:
+        path = directory / name
+        if name in outputs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(outputs[name])
+        else:
+            path.unlink()
+    return changes
+
+
+def is_up_to_date():
+    path = get_output_dir() / DIGEST_FILE
+    return path.exists() and path.read_text().strip() == get_digest()
+
+
+def rebuild_if_stale():
+    """
+    Rebuild the outputs if an input was modified after the last build. For
+    development: runserver does not restart when a template or stylesheet
+    changes.
+    """
+    digest_path = get_output_dir() / DIGEST_FILE
+    built = digest_path.stat().st_mtime if digest_path.exists() else 0
+    if all(path.stat().st_mtime <= built for path in get_inputs() if path.exists()):
+        return
+    with _rebuild_lock:
+        if is_up_to_date():
+            # Modified without changes; compare contents again only after
+            # the next modification.
+            digest_path.touch()
+            return
+        try:
+            changes = write(build())
+        except Exception:
+            logger.exception('Could not rebuild the front-end assets')
+            return
+        logger.info('Rebuilt the front-end assets: %s', ', '.join(changes))
+
+
+@checks.register(checks.Tags.staticfiles)
+def check_assets(app_configs, **kwargs):
+    if is_up_to_date():
+        return []
+    return [
+        checks.Warning(
+            'The front-end assets in static/build/ are out of date.',
+            hint='Run python manage.py build_assets and commit the result.',
+            id='home.W001',
+        )
+    ]
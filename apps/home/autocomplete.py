@@ -0,0 +1,199 @@
+"""
+Search-as-you-type suggestions for news, announcements and blog posts.
+
+Every word of the title and intro of a live page is stored as its edge
+n-grams (``کت``, ``کتا``, ``کتاب``, ...) in ``AutocompletePrefix``, so a
+keystroke is answered by an index range read instead of a full-text query.
+Words are normalized with ``apps.home.persian.normalize`` on both sides.
+Only live pages without a view restriction are indexed and suggested. The
+index of a page is rewritten when it is published and dropped when it is
+unpublished or deleted; that of a subtree when a view restriction on it is
+added, changed or removed.
+
+Answers for hot prefixes are kept in the ``autocomplete`` cache namespace,
+whose in-process tier is a bounded LRU. Its keys include a generation token
+that is replaced whenever the index changes.
+"""
+
+import hashlib
+import re
+import uuid
+
+from django.db import transaction
+from wagtail.models import Page
+
+from . import caching
+from .listings import resolve_urls
+from .models import AnnouncementPage, AutocompletePrefix, BlogPage, NewsPage
+from .persian import normalize
+
+
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = AutocompletePrefix._meta.get_field('prefix').max_length
+DEFAULT_LIMIT = 8
+
+TITLE_SCORE = 2
+INTRO_SCORE = 1
+
+# Page models offered as suggestions and the field holding their intro.
+INDEXED_FIELDS = {
+    NewsPage: 'intro',
+    AnnouncementPage: 'summary',
+    BlogPage: 'intro',
+}
+
+WORD_RE = re.compile(r'\w+')
+
+
+def get_words(text, expand_joins=False):
+    return WORD_RE.findall(normalize(text, expand_joins))
+
+
+def get_prefixes(word):
+    return [word[:length] for length in range(MIN_PREFIX_LENGTH, min(len(word), MAX_PREFIX_LENGTH) + 1)]
+
+
+def build_entries(page):
+    """
+    Unsaved ``AutocompletePrefix`` rows for ``page``; a prefix found in the
+    title and the intro keeps the title's score.
+    """
+    scores = {}
+    for text, score in ((page.title, TITLE_SCORE), (getattr(page, INDEXED_FIELDS[type(page)]), INTRO_SCORE)):
+        for word in get_words(text, expand_joins=True):
+            for prefix in get_prefixes(word):
+                scores[prefix] = max(scores.get(prefix, 0), score)
+    return [AutocompletePrefix(prefix=prefix, page_id=page.pk, score=score) for prefix, score in scores.items()]
+
+
+def invalidate():
+    """
+    Retire every cached answer, e.g. after pages moved and their URLs
+    changed.
+    """
+    caching.get_cache('page_versions').set('autocomplete', uuid.uuid4().hex, None)
+
+
+def get_generation():
+    cache = caching.get_cache('page_versions')
+    generation = cache.get('autocomplete')
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add('autocomplete', generation, None):
+            generation = cache.get('autocomplete', generation)
+    return generation
+
+
+def index_pages(pages, batch_size=1000):
+    """
+    Replace the entries of ``pages`` (specific instances): live, public
+    pages are indexed, others removed.
+    """
+    pages = [page for page in pages if type(page) in INDEXED_FIELDS]
+    if not pages:
+        return
+    page_ids = [page.pk for page in pages]
+    public_ids = set(Page.objects.filter(pk__in=page_ids).public().values_list('pk', flat=True))
+    with transaction.atomic():
+        AutocompletePrefix.objects.filter(page_id__in=page_ids).delete()
+        entries = [entry for page in pages if page.live and page.pk in public_ids for entry in build_entries(page)]
+        AutocompletePrefix.objects.bulk_create(entries, batch_size=batch_size)
+        # Bump after commit, so that no request caches an answer computed
+        # from the old rows under the new generation.
+        transaction.on_commit(invalidate)
+
+
+def index_subtree(page, batch_size=500):
+    """
+    Re-index ``page`` and its descendants, whose visibility a view
+    restriction on ``page`` decides.
+    """
+    for model in INDEXED_FIELDS:
+        queryset = model.objects.descendant_of(page, inclusive=True).order_by('pk').defer('body')
+        last_pk = 0
+        while True:
+            pages = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not pages:
+                break
+            index_pages(pages)
+            last_pk = pages[-1].pk
+
+
+def remove_pages(page_ids):
+    with transaction.atomic():
+        AutocompletePrefix.objects.filter(page_id__in=page_ids).delete()
+        transaction.on_commit(invalidate)
+
+
+def rebuild(batch_size=500, progress=None):
+    """
+    Rebuild the whole index; calls ``progress(done, total)`` after each
+    batch and returns the number of indexed pages.
+    """
+    total = done = 0
+    for model in INDEXED_FIELDS:
+        total += model.objects.live().public().count()
+    with transaction.atomic():
+        AutocompletePrefix.objects.all().delete()
+        for model in INDEXED_FIELDS:
+            queryset = model.objects.live().public().order_by('pk').defer('body')
+            last_pk = 0
+            while True:
+                pages = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not pages:
+                    break
+                AutocompletePrefix.objects.bulk_create(
+                    [entry for page in pages for entry in build_entries(page)], batch_size=1000
+                )
+                last_pk = pages[-1].pk
+                done += len(pages)
+                if progress:
+                    progress(done, total)
+        transaction.on_commit(invalidate)
+    return done
+
+
+def find_page_ids(query, limit=DEFAULT_LIMIT):
+    """
+    Ids of the best matching pages, with the last word of ``query`` taken
+    as a prefix and the others required as prefixes too.
+    """
+    words = get_words(query)
+    if not words or len(words[-1]) < MIN_PREFIX_LENGTH:
+        return []
+    prefixes = [word[:MAX_PREFIX_LENGTH] for word in words]
+    matches = AutocompletePrefix.objects.filter(prefix=prefixes[-1])
+    for prefix in prefixes[:-1]:
+        matches = matches.filter(
+            page_id__in=AutocompletePrefix.objects.filter(prefix=prefix).values('page_id')
+        )
+    # Newer pages have higher ids; ordering on the index columns alone keeps
+    # this an index range read however common the prefix is.
+    return list(matches.order_by('-score', '-page_id').values_list('page_id', flat=True)[:limit])
+
+
+def get_suggestions(query, limit=DEFAULT_LIMIT, request=None):
+    """
+    Suggestions for ``query`` as dicts with ``title``, ``url`` and ``type``.
+    """
+    parts = [request.get_host() if request else '', str(limit)] + get_words(query)
+    key = f"{get_generation()}:{hashlib.md5(' '.join(parts).encode('utf-8')).hexdigest()}"
+
+    def compute():
+        page_ids = find_page_ids(query, limit)
+        # A restriction added since the page was indexed hides it too.
+        pages = {page.pk: page for page in Page.objects.live().public().filter(pk__in=page_ids).only(
+            'id', 'title', 'url_path', 'content_type', 'path', 'depth',
+        )}
+        pages = [pages[page_id] for page_id in page_ids if page_id in pages]
+        resolve_urls(pages, request)
+        return [
+            {
+                'title': page.title,
+                'url': page.listing_url,
+                'type': str(page.specific_class._meta.verbose_name),
+            }
+            for page in pages
+        ]
+
+    return caching.get_cache('autocomplete').get_or_set(key, compute)
@@ -0,0 +1,240 @@
+"""
+Request benchmarks per page type.
+
+Each scenario is a handful of URLs of one kind (the home page, an index
+page, a detail page, the admin explorer, ...) requested in turn through the
+Django test client, so every request runs the full middleware, view and
+template stack. For each scenario the suite records latency percentiles, the
+largest number of SQL queries a request made, the average response size and
+the peak memory Python allocated while rendering one response.
+
+Results can be saved as a baseline and later runs compared against it: a
+scenario regresses when a request makes more queries than before (an N+1
+shows up here first, whatever the machine), or when its p95 latency or peak
+memory grows by more than the threshold.
+"""
+
+import json
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from wagtail.models import Site
+
+from .models import (
+    AnnouncementIndexPage,
+    AnnouncementPage,
+    BlogIndexPage,
+    BlogPage,
+    GalleryPage,
+    NewsIndexPage,
+    NewsPage,
+)
+from .pagination import NEWEST_FIRST, encode_cursor
+
+
+BENCHMARK_USERNAME = '__benchmark__'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def sample(queryset, count):
+    """
+    Up to ``count`` objects spread evenly over ``queryset`` in tree order.
+    """
+    queryset = queryset.order_by('path')
+    total = queryset.count()
+    if total <= count:
+        return list(queryset)
+    return [queryset[i * total // count] for i in range(count)]
+
+
+def page_urls(pages):
+    return [page.get_url() for page in pages]
+
+
+def archive_urls(index_pages):
+    """
+    URLs of the middle of each index's listing, as reached by following
+    the "older" links.
+    """
+    urls = []
+    for index in index_pages:
+        children = index.get_children().live().order_by(*NEWEST_FIRST)
+        middle = children.count() // 2
+        if middle:
+            urls.append(f'{index.get_url()}?after={encode_cursor(children[middle])}')
+    return urls
+
+
+def gallery_chunk_urls(galleries):
+    return [reverse('gallery_images', args=[gallery.pk]) for gallery in galleries]
+
+
+def admin_explorer_urls(index_pages):
+    return [reverse('wagtailadmin_explore', args=[index.pk]) for index in index_pages]
+
+
+def get_scenarios(count):
+    """
+    ``{name: (urls, needs_login)}`` with up to ``count`` URLs each.
+    """
+    indexes = {
+        model: sample(model.objects.live(), count)
+        for model in (NewsIndexPage, AnnouncementIndexPage, BlogIndexPage)
+    }
+    galleries = sample(GalleryPage.objects.live(), count)
+    site = Site.objects.get(is_default_site=True)
+    return {
+        'home': (page_urls([site.root_page]), False),
+        'news_index': (page_urls(indexes[NewsIndexPage]), False),
+        'news_index_archive': (archive_urls(indexes[NewsIndexPage]), False),
+        'announcement_index': (page_urls(indexes[AnnouncementIndexPage]), False),
+        'blog_index': (page_urls(indexes[BlogIndexPage]), False),
+        'news': (page_urls(sample(NewsPage.objects.live(), count)), False),
+        'announcement': (page_urls(sample(AnnouncementPage.objects.live(), count)), False),
+        'blog': (page_urls(sample(BlogPage.objects.live(), count)), False),
+        'gallery': (page_urls(galleries), False),
+        'gallery_chunk': (gallery_chunk_urls(galleries), False),
+        'admin_explorer': (admin_explorer_urls(indexes[NewsIndexPage] + indexes[BlogIndexPage]), True),
+    }
+
+
+def get_dataset_size():
+    return {
+        model._meta.label: model.objects.count()
+        for model in (NewsPage, AnnouncementPage, BlogPage, GalleryPage)
+    }
+
+
+class ResponseError(Exception):
+    pass
+
+
+def fetch(client, url):
+    response = client.get(url)
+    if response.status_code != 200:
+        raise ResponseError(f'{url} returned {response.status_code}')
+    return response
+
+
+def measure(client, urls, requests):
+    """
+    Request ``urls`` in turn ``requests`` times after one warm-up round and
+    return the scenario's figures.
+    """
+    for url in urls:
+        fetch(client, url)
+
+    timings, queries, sizes = [], [], []
+    for i in range(requests):
+        url = urls[i % len(urls)]
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = fetch(client, url)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured.captured_queries))
+        sizes.append(len(response.content))
+
+    # tracemalloc slows everything down, so memory is measured in a pass of
+    # its own.
+    peak = 0
+    tracemalloc.start()
+    try:
+        for url in urls:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            fetch(client, url)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'urls': len(urls),
+        'requests': requests,
+        'p50': round(percentile(timings, 0.5), 2),
+        'p95': round(percentile(timings, 0.95), 2),
+        'p99': round(percentile(timings, 0.99), 2),
+        'queries': max(queries),
+        'bytes': sum(sizes) // len(sizes),
+        'peak_memory': peak,
+    }
+
+
+def run(requests=50, count=10, only=None, host=None, progress=None):
+    """
+    Measure every scenario (or the ones named in ``only``) and return
+    ``{name: figures}``. Scenarios without pages in the database are
+    skipped.
+    """
+    scenarios = get_scenarios(count)
+    client = Client(HTTP_HOST=host) if host else Client()
+    user = None
+    results = {}
+    try:
+        for name, (urls, needs_login) in scenarios.items():
+            if (only and name not in only) or not urls:
+                continue
+            if needs_login and user is None:
+                user, _ = get_user_model().objects.get_or_create(
+                    username=BENCHMARK_USERNAME, defaults={'is_staff': True, 'is_superuser': True}
+                )
+            if needs_login:
+                client.force_login(user)
+            else:
+                client.logout()
+            results[name] = measure(client, urls, requests)
+            if progress:
+                progress(name, results[name])
+    finally:
+        client.logout()
+        if user is not None:
+            user.delete()
+    return results
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        'created_at': timezone.now().isoformat(),
+        'dataset': get_dataset_size(),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Regressions of ``results`` against the ``baseline`` results, as
+    messages.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(f'{name}: {result["queries"]} queries per request, was {base["queries"]}')
+        for figure in ('p95', 'peak_memory'):
+            if base[figure] and result[figure] > base[figure] * (1 + threshold):
+                change = result[figure] / base[figure] - 1
+                regressions.append(f'{name}: {figure} {result[figure]} is {change:.0%} above {base[figure]}')
+    return regressions
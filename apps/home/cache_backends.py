@@ -0,0 +1,184 @@
+"""
+Cache backends for the portal.
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+_MISSING = object()
+
+
+class TieredCache(BaseCache):
+    """
+    Two-tier cache: a bounded in-process LRU (L1) in front of a shared cache
+    alias (L2) such as the file-based or Redis backend.
+
+    Reads are answered from L1 when possible and fall back to L2, copying
+    the value into L1. Writes and deletes go to both tiers. L1 entries live
+    at most ``L1_TIMEOUT`` seconds, which bounds how long another worker can
+    see a value that was changed elsewhere; keys that must never be stale
+    across workers should be read from ``shared`` directly.
+
+    Options:
+        L2: alias of the shared cache (default ``'shared'``)
+        L1_MAX_ENTRIES: size of the in-process LRU (default 1000)
+        L1_TIMEOUT: upper bound for L1 entry lifetime in seconds (default 30)
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2', 'shared')
+        self._l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self._l1_timeout = options.get('L1_TIMEOUT', 30)
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+    @property
+    def shared(self):
+        return caches[self._l2_alias]
+
+    def _resolve_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    # L1
+
+    def _l1_get(self, key):
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return False, None
+            expires_at, pickled = entry
+            if expires_at <= time.monotonic():
+                del self._l1[key]
+                return False, None
+            self._l1.move_to_end(key)
+        return True, pickle.loads(pickled)
+
+    def _l1_set(self, key, value, timeout):
+        lifetime = self._l1_timeout if timeout is None else min(timeout, self._l1_timeout)
+        if lifetime <= 0:
+            self._l1_delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._l1[key] = (time.monotonic() + lifetime, pickled)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _l1_delete(self, key):
+        with self._lock:
+            self._l1.pop(key, None)
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        found, value = self._l1_get(l1_key)
+        if found:
+            self._count('l1_hits')
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('l2_hits')
+        self._l1_set(l1_key, value, self.default_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        result = {}
+        pending = []
+        for key in keys:
+            found, value = self._l1_get(self.make_and_validate_key(key, version=version))
+            if found:
+                result[key] = value
+            else:
+                pending.append(key)
+        self._count('l1_hits', len(result))
+        if pending:
+            shared = self.shared.get_many(pending, version=version)
+            for key, value in shared.items():
+                self._l1_set(self.make_key(key, version=version), value, self.default_timeout)
+            result.update(shared)
+            self._count('l2_hits', len(shared))
+            self._count('misses', len(pending) - len(shared))
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        timeout = self._resolve_timeout(timeout)
+        self.shared.set(key, value, timeout, version=version)
+        self._l1_set(l1_key, value, timeout)
+        self._count('sets')
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._resolve_timeout(timeout)
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            self._l1_set(self.make_and_validate_key(key, version=version), value, timeout)
+        self._count('sets', len(data))
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        timeout = self._resolve_timeout(timeout)
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._l1_set(l1_key, value, timeout)
+            self._count('sets')
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.touch(key, self._resolve_timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self._l1_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        for key in keys:
+            self._l1_delete(self.make_and_validate_key(key, version=version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        found, _ = self._l1_get(self.make_and_validate_key(key, version=version))
+        return found or self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._l1_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._l1.clear()
+        self.shared.clear()
+
+    # Monitoring
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['l1_entries'] = len(self._l1)
+        stats['l1_max_entries'] = self._l1_max_entries
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
@@ -0,0 +1,205 @@
+"""
+Namespaced access to the portal cache.
+
+Every cached thing in the portal (rendered pages, index listings, the home
+feed, menus) goes through a namespace declared in ``CACHE_NAMESPACES``::
+
+    from apps.home import caching
+
+    posts = caching.get_cache('listings').get_or_set(key, build_listing)
+
+A namespace prefixes its keys, applies its own default timeout and keeps
+hit/miss counters. ``get_or_set`` recomputes a missing value only once per
+key at a time: threads of a worker wait on a local lock and other workers
+wait on a short-lived lock key in the shared tier.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import performance
+
+
+_MISSING = object()
+
+_namespaces = {}
+_namespaces_lock = threading.Lock()
+
+# One lock per key being recomputed in this process, as ``[lock, users]``,
+# dropped once its last user is done. Locks are never shared between keys,
+# so ``compute()`` may call ``get_or_set`` for other keys.
+_key_locks = {}
+
+
+@contextmanager
+def _key_lock(key):
+    with _namespaces_lock:
+        entry = _key_locks.get(key)
+        if entry is None:
+            entry = _key_locks[key] = [threading.Lock(), 0]
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _namespaces_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[key]
+
+
+class NamespacedCache:
+    """
+    A view of the cache restricted to one namespace.
+    """
+
+    def __init__(self, name, timeout=300, alias='default', local=True,
+                 lock_timeout=10, lock_wait=0.05):
+        self.name = name
+        self.timeout = timeout
+        self.local = local
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self._alias = alias
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'computes': 0, 'lock_waits': 0}
+
+    @property
+    def backend(self):
+        """
+        The underlying cache; namespaces with ``local=False`` skip the
+        in-process tier so every worker sees writes immediately.
+        """
+        cache = caches[self._alias]
+        if not self.local and hasattr(cache, 'shared'):
+            return cache.shared
+        return cache
+
+    def make_key(self, key):
+        return f'{self.name}:{key}'
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+        performance.record_cache(name, amount)
+
+    def _timeout(self, timeout):
+        return self.timeout if timeout is _MISSING else timeout
+
+    def get(self, key, default=None):
+        value = self.backend.get(self.make_key(key), _MISSING)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = self.backend.get_many([self.make_key(key) for key in keys])
+        result = {key: found[self.make_key(key)] for key in keys if self.make_key(key) in found}
+        self._count('hits', len(result))
+        self._count('misses', len(keys) - len(result))
+        return result
+
+    def set(self, key, value, timeout=_MISSING):
+        self.backend.set(self.make_key(key), value, self._timeout(timeout))
+        self._count('sets')
+
+    def set_many(self, data, timeout=_MISSING):
+        self.backend.set_many(
+            {self.make_key(key): value for key, value in data.items()},
+            self._timeout(timeout),
+        )
+        self._count('sets', len(data))
+
+    def add(self, key, value, timeout=_MISSING):
+        return self.backend.add(self.make_key(key), value, self._timeout(timeout))
+
+    def delete(self, key):
+        self.backend.delete(self.make_key(key))
+
+    def delete_many(self, keys):
+        self.backend.delete_many([self.make_key(key) for key in keys])
+
+    def get_or_set(self, key, compute, timeout=_MISSING):
+        """
+        Return the cached value for ``key``, calling ``compute()`` to build
+        and store it on a miss. Concurrent misses for the same key compute
+        the value once.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        full_key = self.make_key(key)
+        with _key_lock(full_key):
+            # Another thread may have filled the key while we waited.
+            value = self.backend.get(full_key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            lock_key = f'{full_key}:lock'
+            if not self.backend.add(lock_key, os.getpid(), self.lock_timeout):
+                self._count('lock_waits')
+                deadline = time.monotonic() + self.lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(self.lock_wait)
+                    value = self.backend.get(full_key, _MISSING)
+                    if value is not _MISSING:
+                        return value
+            try:
+                value = compute()
+                self._count('computes')
+                self.set(key, value, timeout)
+            finally:
+                self.backend.delete(lock_key)
+        return value
+
+    def get_stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+def get_cache(name):
+    """
+    Return the namespace called ``name``. Namespaces missing from
+    ``CACHE_NAMESPACES`` use the default settings.
+    """
+    namespace = _namespaces.get(name)
+    if namespace is None:
+        with _namespaces_lock:
+            namespace = _namespaces.get(name)
+            if namespace is None:
+                config = getattr(settings, 'CACHE_NAMESPACES', {}).get(name, {})
+                namespace = NamespacedCache(
+                    name,
+                    timeout=config.get('TIMEOUT', 300),
+                    alias=config.get('ALIAS', 'default'),
+                    local=config.get('LOCAL', True),
+                    lock_timeout=config.get('LOCK_TIMEOUT', 10),
+                )
+                _namespaces[name] = namespace
+    return namespace
+
+
+def get_stats():
+    """
+    Counters of this process for every namespace and cache backend that
+    keeps statistics.
+    """
+    backends = {}
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if hasattr(cache, 'get_stats'):
+            backends[alias] = cache.get_stats()
+    return {
+        'pid': os.getpid(),
+        'backends': backends,
+        'namespaces': {name: namespace.get_stats() for name, namespace in _namespaces.items()},
+    }
@@ -0,0 +1,75 @@
+"""
+Independent database queries run concurrently.
+
+``gather()`` runs callables on a small per-process thread pool, so that a
+view waiting on several independent querysets waits for the slowest one
+rather than for their sum. Each pool thread has its own database
+connection, which is recycled under the same rules as a request's
+(``CONN_MAX_AGE``); keep connections persistent or use a pooler such as
+PgBouncer so that the queries do not pay for a new connection each.
+
+Queries issued inside a transaction must see its uncommitted writes, so
+``gather()`` runs everything in the calling thread when the connection is
+in an atomic block, as well as when ``CONCURRENT_QUERIES_ENABLED`` is off.
+It is off by default on SQLite, whose queries run in-process and hold the
+GIL for most of their duration, so that threads only add overhead.
+Queries run by the pool are counted in the request's performance metrics.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from . import performance
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def is_enabled():
+    enabled = getattr(settings, 'CONCURRENT_QUERIES_ENABLED', None)
+    if enabled is None:
+        return connection.vendor != 'sqlite'
+    return enabled
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'CONCURRENT_QUERY_THREADS', 4),
+                    thread_name_prefix='query',
+                )
+    return _executor
+
+
+def _run(call):
+    close_old_connections()
+    metrics = performance.get_current()
+    if metrics is None:
+        return call()
+    with connection.execute_wrapper(metrics):
+        return call()
+
+
+def gather(calls):
+    """
+    Run the callables of ``{name: callable}`` concurrently and return
+    ``{name: result}``. The first exception raised is re-raised.
+    """
+    if len(calls) < 2 or not is_enabled() or connection.in_atomic_block:
+        return {name: call() for name, call in calls.items()}
+    executor = get_executor()
+    futures = {
+        # Each call gets a copy of the caller's context, which carries the
+        # request's performance metrics.
+        name: executor.submit(contextvars.copy_context().run, _run, call)
+        for name, call in calls.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,134 @@
+"""
+Conditional GET for Wagtail pages.
+
+The ``answer_conditional_request`` hook works out a validator for the page
+before Wagtail calls ``get_context()`` or renders the template, and answers
+a request whose ``If-None-Match`` or ``If-Modified-Since`` header it
+satisfies with a 304 right away. ``ConditionalPageMiddleware`` sends the
+validator as ``ETag`` and ``Last-Modified`` with full responses.
+
+A page's modification time is ``page.get_last_modified(request)`` where the
+page type defines it, None opting the page out. Otherwise it is the page's
+``last_published_at`` and, for page types that set ``last_modified_from``
+to ``'children'`` or ``'descendants'`` because they list them, the newest
+publish time among those; that one is computed once per page version (see
+``page_cache``) and cached briefly, like the home page feed. It is never
+earlier than the last build of the templates and front-end assets, so that
+a deploy changes every validator.
+
+Unpublishing, moving or deleting a page below a listing leaves the publish
+times alone; the ETag covers the page's version token, which they replace.
+Clients that revalidate with If-Modified-Since alone can miss those
+changes, but browsers and front caches send If-None-Match too, which takes
+precedence.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from wagtail.models import Page
+
+from . import assets, caching, page_cache
+
+
+_release = None
+
+
+def is_enabled():
+    return getattr(settings, 'CONDITIONAL_GET_ENABLED', True)
+
+
+def get_release():
+    """
+    ``(digest, built_at)`` of the front-end build, which covers the
+    templates.
+    """
+    global _release
+    if _release is None or settings.DEBUG:
+        path = assets.get_output_dir() / assets.DIGEST_FILE
+        try:
+            _release = (path.read_text().strip(), datetime.fromtimestamp(int(path.stat().st_mtime), timezone.utc))
+        except FileNotFoundError:
+            _release = ('', None)
+    return _release
+
+
+def get_interval_start(seconds):
+    """
+    Start of the current ``seconds`` long interval, for pages that change
+    with time.
+    """
+    now = int(datetime.now(timezone.utc).timestamp())
+    return datetime.fromtimestamp(now - now % seconds, timezone.utc)
+
+
+def get_latest_publish(page, scope):
+    pages = Page.objects.child_of(page) if scope == 'children' else Page.objects.descendant_of(page)
+    return pages.live().aggregate(latest=Max('last_published_at'))['latest']
+
+
+def get_content_last_modified(page):
+    """
+    When the page, or the pages it lists, were last published.
+    """
+    scope = getattr(page, 'last_modified_from', None)
+    if scope is None:
+        return page.last_published_at
+    version = page_cache.get_page_version(page.pk)
+    latest = caching.get_cache('validators').get_or_set(
+        f'{page.pk}:{scope}:{version}',
+        lambda: get_latest_publish(page, scope),
+    )
+    return max(filter(None, [page.last_published_at, latest]), default=None)
+
+
+def get_validator(page, request):
+    """
+    ``(etag, last_modified)`` of ``page``, with ``last_modified`` as a
+    timestamp, or None if the page type opts out.
+    """
+    hook = getattr(page, 'get_last_modified', None)
+    last_modified = hook(request) if hook is not None else get_content_last_modified(page)
+    if last_modified is None:
+        return None
+    digest, built_at = get_release()
+    if built_at is not None:
+        last_modified = max(last_modified, built_at)
+    version = page_cache.get_page_version(page.pk)
+    tag = hashlib.md5(f'{page.pk}:{last_modified.isoformat()}:{version}:{digest}'.encode()).hexdigest()
+    # Weak, as the front cache may compress the response.
+    return f'W/"{tag[:20]}"', int(last_modified.timestamp())
+
+
+def set_headers(response, validator):
+    etag, last_modified = validator
+    response.setdefault('ETag', etag)
+    response.setdefault('Last-Modified', http_date(last_modified))
+
+
+def get_not_modified_response(request, validator):
+    """
+    A 304 (or 412) response if the request's preconditions say the client
+    has the current version, otherwise None.
+    """
+    etag, last_modified = validator
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_headers(response, validator)
+    return response
+
+
+def evaluate_cached_response(request, response):
+    """
+    ``response``, or a 304 in its place, for a response from the page cache.
+    """
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified', '')),
+        response=response,
+    )
@@ -0,0 +1,307 @@
+"""
+Critical CSS.
+
+The site stylesheet in ``<head>`` blocks rendering until it has downloaded.
+For each page template, ``extract()`` picks the rules of the stylesheet that
+apply to what a visitor sees first; ``build_assets`` stores them under
+``static/build/critical/``, and the ``critical_css`` template tag inlines
+them and loads the full stylesheet without blocking rendering.
+
+No browser is involved. A template's markup is put together from its
+source, following ``{% extends %}``, ``{% block %}`` and ``{% include %}``,
+taking every branch of ``{% if %}`` and one iteration of ``{% for %}``, with
+sample text in place of variables. The first ``CRITICAL_CSS_FOLD_ELEMENTS``
+elements of the body stand in for the first screen, and a rule is kept when
+one of its selectors, ignoring states such as ``:hover``, matches them.
+Templates without critical CSS of their own, such as those of other apps
+that extend ``base/base.html``, get that of ``base/base.html``.
+"""
+
+import functools
+import re
+
+import soupsieve
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.template import Context
+from django.template.base import TextNode, VariableNode
+from django.template.library import SimpleNode
+from django.template.loader import get_template
+from django.template.loader_tags import BlockNode, ExtendsNode, IncludeNode
+from django.templatetags.static import static
+
+from . import assets
+
+
+TEXT_SAMPLE = 'x'
+# What rich text fields and |safe variables render to, roughly.
+RICH_TEXT_SAMPLE = (
+    '<p><a href="#">x</a> <strong>x</strong></p><h2>x</h2><h3>x</h3>'
+    '<ul><li>x</li></ul><ol><li>x</li></ol><blockquote>x</blockquote><img alt="">'
+)
+# Markup in place of simple tags whose output is styled, by tag function.
+TAG_SAMPLES = {
+    'picture': '<picture><source><img alt=""></picture>',
+}
+
+# Pseudo-classes that depend on the document alone; all others (states
+# such as :hover) and pseudo-elements are dropped before matching.
+STRUCTURAL = {
+    'root', 'not', 'is', 'where', 'has', 'empty', 'first-child', 'last-child', 'only-child',
+    'nth-child', 'nth-last-child', 'first-of-type', 'last-of-type', 'only-of-type',
+    'nth-of-type', 'nth-last-of-type',
+}
+PSEUDO = re.compile(r'::?([a-zA-Z-]+)(\((?:[^()]|\([^()]*\))*\))?')
+NOT = re.compile(r':not\((?:[^()]|\([^()]*\))*\)')
+CLASS_OR_ID = re.compile(r'([.#])(-?[_a-zA-Z][\w-]*)')
+COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+RELATIVE_URL = re.compile(r'url\((["\']?)(?!data:|[a-z]+://|/)([^"\')]+)\1\)')
+
+FALLBACK_TEMPLATE = 'base/base.html'
+
+# Nested at-rules whose rules are filtered like top-level ones; @font-face
+# is always kept, other at-rules (such as @keyframes) never are.
+NESTED_AT_RULES = ('@media', '@supports', '@container', '@layer')
+
+
+_inline = {}
+
+
+def is_enabled():
+    return getattr(settings, 'CRITICAL_CSS_ENABLED', True)
+
+
+def get_fold():
+    return getattr(settings, 'CRITICAL_CSS_FOLD_ELEMENTS', 120)
+
+
+def render_nodes(nodelist, blocks):
+    for node in nodelist:
+        if isinstance(node, ExtendsNode):
+            parent = get_template(node.parent_name.resolve(Context())).template
+            own = {block.name: block for block in node.nodelist.get_nodes_by_type(BlockNode)}
+            # Blocks of the most derived template win.
+            yield from render_nodes(parent.nodelist, {**own, **blocks})
+            return
+        if isinstance(node, TextNode):
+            yield node.s
+        elif isinstance(node, VariableNode):
+            filters = {func.__name__ for func, _ in node.filter_expression.filters}
+            yield RICH_TEXT_SAMPLE if filters & {'richtext', 'safe'} else TEXT_SAMPLE
+        elif isinstance(node, BlockNode):
+            yield from render_nodes(blocks.get(node.name, node).nodelist, blocks)
+        elif isinstance(node, IncludeNode):
+            name = node.template.resolve(Context())
+            if isinstance(name, str) and name:
+                yield from render_nodes(get_template(name).template.nodelist, {})
+        elif isinstance(node, SimpleNode):
+            yield TAG_SAMPLES.get(node.func.__name__, '')
+        else:
+            # Every branch of {% if %}, the loop and {% empty %} of {% for %}.
+            for attr in node.child_nodelists:
+                yield from render_nodes(getattr(node, attr, None) or [], blocks)
+
+
+def get_markup(template_name):
+    """
+    Approximate markup of the pages rendered with ``template_name``.
+    """
+    return ''.join(render_nodes(get_template(template_name).template.nodelist, {}))
+
+
+def get_first_screen(markup, fold):
+    """
+    The document of ``markup`` without the elements of its body after the
+    first ``fold``. Returns None when ``markup`` has no body.
+    """
+    soup = BeautifulSoup(markup, 'html.parser')
+    if soup.body is None:
+        return None
+    elements = soup.body.find_all(True)
+    for element in elements[fold:]:
+        # Elements inside one removed earlier are already gone.
+        if not element.decomposed:
+            element.decompose()
+    return soup
+
+
+def split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and not depth:
+            selectors.append(prelude[start:i].strip())
+            start = i + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+def simplify(selector):
+    def replace(match):
+        if match.group(0).startswith(':') and not match.group(0).startswith('::') and match.group(1) in STRUCTURAL:
+            return match.group(0)
+        # A compound left without a type, class or id matches any element.
+        before = selector[match.start() - 1] if match.start() else ' '
+        return '*' if before in ' >+~(,' else ''
+
+    return PSEUDO.sub(replace, selector)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_selector(selector):
+    """
+    ``(classes, ids, pattern)`` for a simplified selector: the classes and
+    ids an element must have somewhere in the document for it to match,
+    and the compiled selector, or None if soupsieve does not support it.
+    """
+    required = CLASS_OR_ID.findall(NOT.sub('', selector))
+    classes = frozenset(name for kind, name in required if kind == '.')
+    ids = frozenset(name for kind, name in required if kind == '#')
+    try:
+        pattern = soupsieve.compile(selector)
+    except Exception:
+        pattern = None
+    return classes, ids, pattern
+
+
+class Document:
+    def __init__(self, soup):
+        self.soup = soup
+        self.classes = set()
+        self.ids = set()
+        for element in soup.find_all(True):
+            self.classes.update(element.get('class', []))
+            if element.get('id'):
+                self.ids.add(element['id'])
+        self._matches = {}
+
+    def matches(self, selector):
+        result = self._matches.get(selector)
+        if result is None:
+            classes, ids, pattern = compile_selector(simplify(selector))
+            if not (classes <= self.classes and ids <= self.ids):
+                result = False
+            elif pattern is None:
+                # Keep what cannot be checked.
+                result = True
+            else:
+                result = pattern.select_one(self.soup) is not None
+            self._matches[selector] = result
+        return result
+
+
+def find_block_end(css, i):
+    """
+    Index of the brace closing the block opened at ``css[i - 1]``.
+    """
+    depth = 1
+    while depth:
+        char = css[i]
+        if char in '"\'':
+            i = find_string_end(css, i)
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        i += 1
+    return i - 1
+
+
+def find_string_end(css, i):
+    quote = css[i]
+    i += 1
+    while css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i
+
+
+def parse(css, i=0):
+    """
+    Rules of ``css`` from ``i`` up to the end or an unmatched ``}``, as
+    ``[(prelude, body)]``, where the body of a nested at-rule is a list of
+    rules. Returns the rules and the index where parsing stopped.
+    """
+    rules = []
+    start = i
+    while i < len(css):
+        char = css[i]
+        if char in '"\'':
+            i = find_string_end(css, i)
+        elif char == ';' and css[start:i].strip().startswith('@'):
+            # @charset and @import.
+            start = i + 1
+        elif char == '{':
+            prelude = css[start:i].strip()
+            if prelude.startswith(NESTED_AT_RULES):
+                body, i = parse(css, i + 1)
+            else:
+                end = find_block_end(css, i + 1)
+                body, i = css[i + 1:end], end
+            rules.append((prelude, body))
+            start = i + 1
+        elif char == '}':
+            return rules, i
+        i += 1
+    return rules, i
+
+
+def select(rules, document):
+    selected = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            body = select(body, document)
+            if body:
+                selected.append((prelude, body))
+        elif prelude == '@font-face':
+            selected.append((prelude, body))
+        elif not prelude.startswith('@'):
+            selectors = [s for s in split_selectors(prelude) if document.matches(s)]
+            if selectors:
+                selected.append((','.join(selectors), body))
+    return selected
+
+
+def serialize(rules):
+    return ''.join(
+        f'{prelude}{{{serialize(body) if isinstance(body, list) else body}}}'
+        for prelude, body in rules
+    )
+
+
+def extract(css, template_name, fold=None):
+    """
+    The rules of ``css`` needed to render the first screen of pages using
+    ``template_name``, or None if the template is not a page.
+    """
+    soup = get_first_screen(get_markup(template_name), get_fold() if fold is None else fold)
+    if soup is None:
+        return None
+    rules, _ = parse(COMMENT.sub('', css))
+    return serialize(select(rules, Document(soup)))
+
+
+def read(template_name):
+    path = assets.get_output_dir() / assets.get_critical_path(template_name)
+    if not path.exists():
+        return None
+    # The URLs are relative to the stylesheet, not to the page.
+    return RELATIVE_URL.sub(
+        lambda match: f'url({static(f"build/{match.group(2)}")})',
+        path.read_text(encoding='utf-8'),
+    ).replace('</', '<\\/')
+
+
+def get_inline(template_name):
+    """
+    The critical CSS to inline in pages rendered with ``template_name``, or
+    None if there is none.
+    """
+    if settings.DEBUG:
+        assets.rebuild_if_stale()
+        return read(template_name) or read(FALLBACK_TEMPLATE)
+    if template_name not in _inline:
+        _inline[template_name] = read(template_name) or read(FALLBACK_TEMPLATE)
+    return _inline[template_name]
@@ -0,0 +1,344 @@
+"""
+Deterministic synthetic content for load tests and benchmarks.
+
+``TextGenerator`` writes Persian-looking text: a Zipf-distributed vocabulary
+of pseudo-words with real words spread over its ranks, written with the
+spelling variants visitors and editors actually use (Arabic letters,
+missing zero-width non-joiners, diacritics).
+
+``DatasetGenerator`` builds a whole site from it: index pages holding at
+most ``PAGES_PER_INDEX`` children each, news, announcements and blog posts
+with rich-text bodies of varying length, and galleries of generated, tagged
+images. Every page gets an initial revision. The same seed and scale give
+the same content; publish dates are spread over the two years before the
+day of generation. Pages are written with ``apps.home.bulk`` in batches, so
+memory use does not depend on the scale.
+"""
+
+import copy
+import io
+import itertools
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.images import ImageFile
+from django.db import reset_queries, transaction
+from django.utils import timezone
+from PIL import Image as PILImage, ImageDraw
+from taggit.models import Tag, TaggedItem
+from wagtail.images import get_image_model
+from wagtail.models import Site
+
+from . import page_cache, statistics
+from .bulk import add_children, add_revisions
+from .importer import assign_unique_slugs
+from .models import (
+    AnnouncementIndexPage,
+    AnnouncementPage,
+    BlogIndexPage,
+    BlogPage,
+    GalleryImage,
+    GalleryPage,
+    HomePage,
+    NewsIndexPage,
+    NewsPage,
+)
+
+
+WORDS = [
+    'کتاب', 'کتابخانه', 'دانشگاه', 'دانشجو', 'پژوهش', 'آزمایشگاه', 'همایش', 'کارگاه',
+    'ثبت‌نام', 'می‌شود', 'برگزار', 'اطلاعیه', 'مهندسی', 'پزشکی', 'فناوری', 'نوآوری',
+    'ورزشی', 'فرهنگی', 'جشنواره', 'مسابقه', 'کنفرانس', 'بین‌المللی', 'استاد', 'مدیریت',
+    'برنامه', 'آموزشی', 'تحصیلات', 'تکمیلی', 'پایان‌نامه', 'مقاله', 'کیفیت', 'یادگیری',
+    'هوش', 'مصنوعی', 'شبکه', 'امنیت', 'داده', 'پردازش', 'زبان', 'فارسی',
+]
+
+LETTERS = 'ابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی'
+
+# Spelling variants applied to the generated text.
+VARIANTS = [
+    lambda word: word,
+    lambda word: word,
+    lambda word: word.replace('ی', 'ي').replace('ک', 'ك'),
+    lambda word: word.replace('\u200c', ''),
+    lambda word: word[:1] + '\u064e' + word[1:],
+]
+
+TAGS = ['دانشگاه', 'همایش', 'ورزشی', 'فرهنگی', 'پژوهش', 'آزمایشگاه', 'دانشجویی', 'مراسم']
+
+# Page counts at scale 1; galleries hold 12 to 60 images from a shared pool.
+SECTIONS = [
+    ('news', NewsIndexPage, NewsPage, 'اخبار', 1000),
+    ('announcements', AnnouncementIndexPage, AnnouncementPage, 'اطلاعیه‌ها', 500),
+    ('blog', BlogIndexPage, BlogPage, 'وبلاگ', 500),
+]
+GALLERIES = 2
+IMAGES = 40
+MAX_IMAGES = 2000
+PAGES_PER_INDEX = 10000
+
+# Share of pages saved as drafts that were never published.
+DRAFT_RATIO = 0.03
+PUBLISHED_OVER = timedelta(days=730)
+
+
+class TextGenerator:
+    """
+    Random text over a Zipf-distributed vocabulary, drawn from ``rng``.
+    """
+
+    def __init__(self, rng, vocabulary_size=20000):
+        self.rng = rng
+        self.vocabulary = [
+            ''.join(rng.choice(LETTERS) for _ in range(rng.randint(3, 7)))
+            for _ in range(vocabulary_size)
+        ]
+        for i, word in enumerate(WORDS):
+            self.vocabulary.insert(i * i, word)
+        # Every spelling variant of every word, weighted by the rank of the
+        # word, so a text is a single choices() call.
+        self.forms = [variant(word) for word in self.vocabulary for variant in VARIANTS]
+        self.cum_weights = list(itertools.accumulate(
+            1 / rank for rank in range(1, len(self.vocabulary) + 1) for _ in VARIANTS
+        ))
+
+    def using(self, rng):
+        """
+        A generator over the same vocabulary that draws from ``rng``.
+        """
+        text = copy.copy(self)
+        text.rng = rng
+        return text
+
+    def words(self, count):
+        return ' '.join(self.rng.choices(self.forms, cum_weights=self.cum_weights, k=count))
+
+    def rich_text(self, words):
+        """
+        About ``words`` words of HTML: paragraphs, with headings and lists
+        between some of them.
+        """
+        parts = []
+        while words > 0:
+            length = min(words, self.rng.randint(25, 90))
+            roll = self.rng.random()
+            if parts and roll < 0.15:
+                parts.append(f'<h2>{self.words(self.rng.randint(3, 6))}</h2>')
+            elif parts and roll < 0.22:
+                items = ''.join(f'<li>{self.words(self.rng.randint(4, 10))}</li>' for _ in range(self.rng.randint(3, 6)))
+                parts.append(f'<ul>{items}</ul>')
+            parts.append(f'<p>{self.words(length)}</p>')
+            words -= length
+        return ''.join(parts)
+
+    def body_length(self):
+        # Log-normal: most bodies have a few hundred words, a few are long.
+        return max(40, min(3000, int(self.rng.lognormvariate(5.3, 0.7))))
+
+
+def generate_image(rng, width, height):
+    """
+    JPEG bytes of a gradient with a few shapes on it.
+    """
+    start = [rng.randint(0, 255) for _ in range(3)]
+    end = [rng.randint(0, 255) for _ in range(3)]
+    image = PILImage.new('RGB', (width, height))
+    draw = ImageDraw.Draw(image)
+    for y in range(height):
+        t = y / height
+        draw.line([(0, y), (width, y)], fill=tuple(int(a + (b - a) * t) for a, b in zip(start, end)))
+    for _ in range(rng.randint(3, 8)):
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        size = rng.randint(width // 10, width // 3)
+        shape = draw.ellipse if rng.random() < 0.5 else draw.rectangle
+        shape([x - size, y - size, x + size, y + size], fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=80)
+    return output.getvalue()
+
+
+class DatasetGenerator:
+    """
+    Generates the dataset for ``scale`` under the root page of the default
+    site, calling ``progress(label, done, total)`` after each batch.
+    """
+
+    def __init__(self, scale=1, seed=1, batch_size=2000, revisions=True, progress=None):
+        self.scale = scale
+        self.seed = seed
+        self.batch_size = batch_size
+        self.revisions = revisions
+        self.progress = progress
+        self.text = TextGenerator(random.Random(seed))
+        self.now = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.counts = {}
+
+    @property
+    def page_models(self):
+        return [page_model for _, _, page_model, _, _ in SECTIONS] + [GalleryPage]
+
+    def rng(self, name):
+        # One stream per part, so that each part's content does not depend
+        # on how much was drawn for the others.
+        return random.Random(f'{self.seed}:{name}')
+
+    def report(self, label, done, total):
+        # With DEBUG on, Django keeps every query, multi-megabyte batch
+        # inserts included.
+        reset_queries()
+        if self.progress:
+            self.progress(label, done, total)
+
+    def get_root(self):
+        site = Site.objects.get(is_default_site=True)
+        root = site.root_page.specific
+        if not isinstance(root, HomePage):
+            root = root.add_child(instance=HomePage(title='صفحه اصلی', slug='dataset'))
+            site.root_page = root
+            site.save()
+        return root
+
+    def add_index(self, root, index_model, title, slug):
+        index = index_model(
+            title=title,
+            slug=slug,
+            intro=f'<p>{self.text.using(self.rng(slug)).words(12)}</p>',
+            live=True,
+            first_published_at=self.now,
+            last_published_at=self.now,
+        )
+        assign_unique_slugs(root, [index])
+        with transaction.atomic():
+            add_children(root, [index])
+            if self.revisions:
+                add_revisions([index])
+        return index
+
+    def published_at(self, rng, position, total):
+        # Older pages first, so that page ids grow with publish dates.
+        age = PUBLISHED_OVER * (1 - (position + rng.random()) / total)
+        return self.now - age
+
+    def build_page(self, model, text, position, total, slug):
+        rng = text.rng
+        live = rng.random() >= DRAFT_RATIO
+        published_at = self.published_at(rng, position, total)
+        page = model(
+            title=text.words(rng.randint(4, 10)),
+            slug=slug,
+            body=text.rich_text(text.body_length()),
+            live=live,
+            has_unpublished_changes=not live,
+            first_published_at=published_at if live else None,
+            last_published_at=published_at if live else None,
+            date=timezone.localdate(published_at),
+        )
+        intro = text.words(rng.randint(12, 30))[:250]
+        if model is AnnouncementPage:
+            page.summary = intro
+        else:
+            page.intro = intro
+        return page
+
+    def generate_section(self, root, name, index_model, page_model, title, per_scale):
+        total = round(per_scale * self.scale)
+        text = self.text.using(self.rng(name))
+        indexes = max(1, math.ceil(total / PAGES_PER_INDEX))
+        done = 0
+        for number in range(indexes):
+            if indexes > 1:
+                index = self.add_index(root, index_model, f'{title} {number + 1}', f'{name}-{number + 1}')
+            else:
+                index = self.add_index(root, index_model, title, name)
+            in_index = total * (number + 1) // indexes - total * number // indexes
+            for start in range(0, in_index, self.batch_size):
+                pages = [
+                    self.build_page(page_model, text, done + i, total, f'{name}-{done + i + 1}')
+                    for i in range(min(self.batch_size, in_index - start))
+                ]
+                with transaction.atomic():
+                    add_children(index, pages, self.batch_size)
+                    if self.revisions:
+                        add_revisions(pages, self.batch_size)
+                done += len(pages)
+                self.report(page_model._meta.verbose_name_plural, done, total)
+        self.counts[page_model] = total
+
+    def generate_images(self):
+        image_model = get_image_model()
+        total = min(MAX_IMAGES, max(1, round(IMAGES * self.scale)))
+        rng = self.rng('images')
+        text = self.text.using(rng)
+        tags = [Tag.objects.get_or_create(name=name)[0] for name in TAGS]
+        content_type = ContentType.objects.get_for_model(image_model)
+        images = []
+        for start in range(0, total, 100):
+            batch = []
+            for i in range(start, min(total, start + 100)):
+                width, height = rng.choice([(1600, 1067), (1200, 800), (800, 1200), (1024, 1024)])
+                file = ImageFile(io.BytesIO(generate_image(rng, width, height)), name=f'dataset-{self.seed}-{i + 1}.jpg')
+                image = image_model(title=text.words(3), file=file, width=width, height=height)
+                image._set_image_file_metadata()
+                batch.append(image)
+            # bulk_create() saves the files but skips the upload signals,
+            # so no renditions are generated in the background here.
+            batch = image_model.objects.bulk_create(batch)
+            TaggedItem.objects.bulk_create([
+                TaggedItem(content_type=content_type, object_id=image.pk, tag=tag)
+                for image in batch
+                for tag in rng.sample(tags, rng.randint(1, 3))
+            ])
+            images.extend(batch)
+            self.report('images', len(images), total)
+        self.counts[image_model] = total
+        return images
+
+    def generate_galleries(self, root, images):
+        total = max(1, round(GALLERIES * self.scale))
+        rng = self.rng('galleries')
+        text = self.text.using(rng)
+        for start in range(0, total, 100):
+            galleries = []
+            for i in range(start, min(total, start + 100)):
+                published_at = self.published_at(rng, i, total)
+                galleries.append(GalleryPage(
+                    title=text.words(rng.randint(2, 5)),
+                    slug=f'gallery-{i + 1}',
+                    intro=f'<p>{text.words(rng.randint(10, 25))}</p>',
+                    description=text.rich_text(rng.randint(40, 120)),
+                    live=True,
+                    first_published_at=published_at,
+                    last_published_at=published_at,
+                ))
+            assign_unique_slugs(root, galleries)
+            with transaction.atomic():
+                add_children(root, galleries, self.batch_size)
+                items = []
+                for gallery in galleries:
+                    for order, image in enumerate(rng.sample(images, min(len(images), rng.randint(12, 60)))):
+                        items.append(GalleryImage(
+                            gallery_page=gallery,
+                            image=image,
+                            title=text.words(3),
+                            caption=text.words(rng.randint(5, 15)),
+                            order=order,
+                        ))
+                GalleryImage.objects.bulk_create(items, batch_size=self.batch_size)
+                if self.revisions:
+                    add_revisions(galleries, self.batch_size)
+            self.report('galleries', min(total, start + 100), total)
+        self.counts[GalleryPage] = total
+
+    def run(self):
+        """
+        Generate everything and return the number of objects per model.
+        """
+        root = self.get_root()
+        for section in SECTIONS:
+            self.generate_section(root, *section)
+        self.generate_galleries(root, self.generate_images())
+        statistics.rebuild()
+        page_cache.invalidate_page(root, include_descendants=False)
+        return self.counts
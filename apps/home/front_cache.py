@@ -0,0 +1,238 @@
+"""
+Cache headers and purging for a front cache (Varnish, Fastly, nginx).
+
+Anonymous page responses get a ``Cache-Control`` header from the policy of
+their page type in ``FRONT_CACHE_POLICIES`` and a ``Surrogate-Key`` header
+with the keys they depend on:
+
+- ``pages``, on every page, to purge everything after a deploy;
+- ``page-<id>``, the page itself;
+- ``type-<app_label.model>`` for each page type the page lists, for page
+  types that set ``last_modified_from`` (see ``apps.home.conditional``).
+
+Publishing or unpublishing a page purges its own key and the key of its
+type, i.e. the page and every listing that may show it; moving a page also
+purges its descendants, whose URLs change. Purges are sent once the
+transaction has committed, from a background thread, to every backend in
+``FRONT_CACHE_BACKENDS``::
+
+    FRONT_CACHE_BACKENDS = {
+        'varnish': {
+            'BACKEND': 'apps.home.front_cache.HTTPBackend',
+            'LOCATION': 'http://varnish:6081/',
+            'HEADER': 'xkey-purge',
+        },
+    }
+
+Pages behind a view restriction and requests of logged-in users are sent
+as private, which also keeps them out of the page cache.
+"""
+
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils.cache import add_never_cache_headers
+from django.utils.module_loading import import_string
+
+from . import page_cache
+
+
+logger = logging.getLogger(__name__)
+
+ALL_KEY = 'pages'
+
+DIRECTIVES = [
+    ('MAX_AGE', 'max-age'),
+    ('S_MAXAGE', 's-maxage'),
+    ('STALE_WHILE_REVALIDATE', 'stale-while-revalidate'),
+    ('STALE_IF_ERROR', 'stale-if-error'),
+]
+
+# Publishing must not wait for the front cache.
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='front-cache')
+
+_backends = None
+
+
+class BaseBackend:
+    def __init__(self, params):
+        self.params = params
+
+    def purge(self, keys):
+        raise NotImplementedError
+
+
+class HTTPBackend(BaseBackend):
+    """
+    Sends the keys in a header of a ``PURGE`` request, ``MAX_KEYS`` at a
+    time: ``Surrogate-Key`` for Fastly or nginx with a purge module,
+    ``xkey-purge`` for Varnish with vmod_xkey.
+    """
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.location = params['LOCATION']
+        self.method = params.get('METHOD', 'PURGE')
+        self.header = params.get('HEADER', 'Surrogate-Key')
+        self.headers = params.get('HEADERS', {})
+        self.max_keys = params.get('MAX_KEYS', 256)
+        self.timeout = params.get('TIMEOUT', 5)
+
+    def purge(self, keys):
+        for i in range(0, len(keys), self.max_keys):
+            response = requests.request(
+                self.method,
+                self.location,
+                headers={**self.headers, self.header: ' '.join(keys[i:i + self.max_keys])},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+
+
+class MemoryBackend(BaseBackend):
+    """
+    Records purges instead of sending them, for development and tests.
+    """
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.purges = []
+
+    def purge(self, keys):
+        self.purges.append(list(keys))
+        logger.debug('Purged %s', ' '.join(keys))
+
+    def get_purged_keys(self):
+        return {key for keys in self.purges for key in keys}
+
+    def clear(self):
+        self.purges.clear()
+
+
+def is_enabled():
+    return getattr(settings, 'FRONT_CACHE_ENABLED', True)
+
+
+def get_backends():
+    global _backends
+    if _backends is None:
+        _backends = {
+            name: import_string(params['BACKEND'])(params)
+            for name, params in getattr(settings, 'FRONT_CACHE_BACKENDS', {}).items()
+        }
+    return _backends
+
+
+def get_policy(page):
+    """
+    The policy of ``page``'s type, over the ``'default'`` policy.
+    """
+    policies = getattr(settings, 'FRONT_CACHE_POLICIES', {})
+    return {**policies.get('default', {}), **policies.get(page._meta.label, {})}
+
+
+def get_cache_control(policy):
+    directives = ['public']
+    for name, directive in DIRECTIVES:
+        if policy.get(name) is not None:
+            directives.append(f'{directive}={policy[name]}')
+    return ', '.join(directives)
+
+
+def get_type_key(model):
+    return f'type-{model._meta.label_lower}'
+
+
+@functools.lru_cache(maxsize=None)
+def get_listed_types(model):
+    """
+    Page types that pages of ``model`` list, from the ``subpage_types`` of
+    it and, for descendants, of those.
+    """
+    scope = getattr(model, 'last_modified_from', None)
+    if scope is None:
+        return ()
+    listed, pending = [], list(model.clean_subpage_models())
+    while pending:
+        subpage_model = pending.pop(0)
+        if subpage_model not in listed:
+            listed.append(subpage_model)
+            if scope == 'descendants':
+                pending.extend(subpage_model.clean_subpage_models())
+    return tuple(listed)
+
+
+def get_keys(page):
+    """
+    Surrogate keys of the responses for ``page``.
+    """
+    keys = [ALL_KEY, f'page-{page.pk}']
+    keys.extend(get_type_key(model) for model in get_listed_types(type(page)))
+    return keys
+
+
+def get_marker(page):
+    """
+    ``(cache_control, keys)`` for an anonymous request for ``page``, None
+    if the response must stay private.
+    """
+    if not page_cache.is_cacheable_page(page):
+        return None
+    return get_cache_control(get_policy(page)), get_keys(page)
+
+
+def set_headers(response, marker):
+    if marker is None:
+        add_never_cache_headers(response)
+        return
+    cache_control, keys = marker
+    # A view's own Cache-Control wins.
+    response.setdefault('Cache-Control', cache_control)
+    response[getattr(settings, 'FRONT_CACHE_KEY_HEADER', 'Surrogate-Key')] = ' '.join(keys)
+
+
+def get_purge_keys(page, include_descendants=False):
+    """
+    Keys to purge when ``page`` changes: the page, and listings of its type.
+    """
+    if include_descendants:
+        pages = page.get_descendants(inclusive=True).values_list('pk', 'content_type_id')
+    else:
+        pages = [(page.pk, page.content_type_id)]
+    keys = set()
+    for page_id, content_type_id in pages:
+        keys.add(f'page-{page_id}')
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is not None:
+            keys.add(get_type_key(model))
+    return sorted(keys)
+
+
+def send(keys):
+    """
+    Purge ``keys`` on every backend now. Returns the backends that failed
+    with their errors.
+    """
+    failed = {}
+    for name, backend in get_backends().items():
+        try:
+            backend.purge(keys)
+        except Exception as e:
+            logger.warning('Purging %d keys on front cache %r failed', len(keys), name, exc_info=True)
+            failed[name] = e
+    return failed
+
+
+def purge(keys):
+    """
+    Purge ``keys`` in the background once the current transaction has
+    committed.
+    """
+    keys = list(keys)
+    if keys and is_enabled() and get_backends():
+        transaction.on_commit(lambda: _background.submit(send, keys))
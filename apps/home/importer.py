@@ -0,0 +1,242 @@
+"""
+Bulk import of news, announcements and blog posts.
+
+Records are flat dicts read one at a time from JSON Lines or CSV:
+
+    {"type": "news", "title": "...", "intro": "...", "body": "<p>...</p>",
+     "slug": "...", "published_at": "2024-03-01T09:00:00", "parent": 12}
+
+Only ``type`` and ``title`` are required. ``intro`` and ``summary`` are
+interchangeable, ``live`` defaults to true and ``parent`` to the first index
+page of the matching type. ``import_records`` consumes them in batches with
+``apps.home.bulk``, one transaction per batch, so memory use does not grow
+with the size of the import and an error only loses the current batch.
+"""
+
+import csv
+import itertools
+import json
+from datetime import datetime, time
+
+from django.db import reset_queries, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.text import slugify
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backends
+
+from . import autocomplete, page_cache, statistics
+from .bulk import add_children, add_revisions
+from .models import (
+    AnnouncementIndexPage,
+    AnnouncementPage,
+    BlogIndexPage,
+    BlogPage,
+    NewsIndexPage,
+    NewsPage,
+)
+
+
+PAGE_TYPES = {
+    'news': NewsPage,
+    'announcement': AnnouncementPage,
+    'blog': BlogPage,
+}
+
+INDEX_TYPES = {
+    NewsPage: NewsIndexPage,
+    AnnouncementPage: AnnouncementIndexPage,
+    BlogPage: BlogIndexPage,
+}
+
+INTRO_FIELDS = {
+    NewsPage: 'intro',
+    AnnouncementPage: 'summary',
+    BlogPage: 'intro',
+}
+
+FORMATS = ['jsonl', 'csv']
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+
+
+class RecordError(ValueError):
+    pass
+
+
+def read_records(file, format='jsonl'):
+    """
+    Yield the records of an open text ``file`` one at a time.
+    """
+    if format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise RecordError(f'Line {number}: {e}')
+
+
+def parse_published_at(value):
+    if not value:
+        return None
+    if isinstance(value, str):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time()) if day else None
+        if parsed is None:
+            raise ValueError(f'Invalid date: {value}')
+        value = parsed
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def parse_bool(value, default=True):
+    if value is None or value == '':
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def build_page(record, now=None):
+    """
+    An unsaved page for ``record``.
+    """
+    model = PAGE_TYPES.get(record.get('type'))
+    if model is None:
+        raise ValueError(f'Unknown type {record.get("type")!r}, expected one of {", ".join(PAGE_TYPES)}')
+    title = (record.get('title') or '').strip()
+    if not title:
+        raise ValueError('Missing title')
+
+    live = parse_bool(record.get('live'))
+    published_at = parse_published_at(record.get('published_at')) or now or timezone.now()
+    page = model(
+        title=title,
+        slug=record.get('slug') or slugify(title, allow_unicode=True)[:200] or model._meta.model_name,
+        body=record.get('body') or '',
+        seo_title=record.get('seo_title') or '',
+        search_description=record.get('search_description') or '',
+        live=live,
+        has_unpublished_changes=not live,
+        first_published_at=published_at if live else None,
+        last_published_at=published_at if live else None,
+        date=timezone.localdate(published_at),
+    )
+    setattr(page, INTRO_FIELDS[model], (record.get('intro') or record.get('summary') or '')[:250])
+    return page
+
+
+def assign_unique_slugs(parent, pages):
+    """
+    Suffix the slugs of ``pages`` that clash with each other or with the
+    existing children of ``parent``.
+    """
+    siblings = Page.objects.filter(path__startswith=parent.path, depth=parent.depth + 1)
+    taken = set(siblings.filter(slug__in={page.slug for page in pages}).values_list('slug', flat=True))
+    # Load the suffixed variants of the clashing slugs, a bounded number of
+    # prefixes per query.
+    clashing = sorted(taken)
+    for i in range(0, len(clashing), 100):
+        prefixes = Q()
+        for slug in clashing[i:i + 100]:
+            prefixes |= Q(slug__startswith=f'{slug}-')
+        taken.update(siblings.filter(prefixes).values_list('slug', flat=True))
+    for page in pages:
+        slug, suffix = page.slug, 1
+        while slug in taken:
+            suffix += 1
+            slug = f'{page.slug}-{suffix}'
+        taken.add(slug)
+        page.slug = slug
+
+
+class Importer:
+    """
+    Inserts records batch by batch under their parent index pages.
+    """
+
+    def __init__(self, batch_size=1000, revisions=False, index=False, default_parent=None):
+        self.batch_size = batch_size
+        self.revisions = revisions
+        self.index = index
+        self.default_parent = default_parent
+        self.parents = {}
+        self.imported = {model: 0 for model in PAGE_TYPES.values()}
+
+    def get_parent(self, model, parent_id):
+        key = (model, parent_id)
+        if key not in self.parents:
+            index_model = INDEX_TYPES[model]
+            if parent_id:
+                parent = index_model.objects.filter(pk=parent_id).first()
+                if parent is None:
+                    raise ValueError(f'Page {parent_id} is not a {index_model._meta.verbose_name}')
+            else:
+                parent = index_model.objects.order_by('path').first()
+                if parent is None:
+                    raise ValueError(f'No {index_model._meta.verbose_name} to import into')
+            self.parents[key] = parent
+        return self.parents[key]
+
+    def import_batch(self, records, first_number):
+        now = timezone.now()
+        groups = {}
+        for number, record in enumerate(records, first_number):
+            try:
+                page = build_page(record, now)
+                parent = self.get_parent(type(page), record.get('parent') or self.default_parent)
+            except ValueError as e:
+                raise RecordError(f'Record {number}: {e}')
+            groups.setdefault((type(page), parent.pk), (parent, []))[1].append(page)
+
+        with transaction.atomic():
+            for (model, _), (parent, pages) in groups.items():
+                assign_unique_slugs(parent, pages)
+                add_children(parent, pages, self.batch_size)
+                if self.revisions:
+                    add_revisions(pages, self.batch_size)
+                if self.index:
+                    for backend in get_search_backends(with_auto_update=True):
+                        backend.add_bulk(model, pages)
+                    autocomplete.index_pages(pages)
+                self.imported[model] += len(pages)
+
+    def run(self, records, progress=None):
+        """
+        Import ``records``, calling ``progress(done)`` after each batch, and
+        refresh the data derived from pages once at the end. Returns the
+        number of imported pages per model.
+        """
+        records = iter(records)
+        done = 0
+        try:
+            while True:
+                batch = list(itertools.islice(records, self.batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch, done + 1)
+                # With DEBUG on, Django keeps every query, multi-megabyte
+                # batch inserts included.
+                reset_queries()
+                done += len(batch)
+                if progress:
+                    progress(done)
+        finally:
+            if done:
+                statistics.rebuild()
+                for parent in {parent.pk: parent for parent in self.parents.values()}.values():
+                    page_cache.invalidate_page(parent)
+        return self.imported
+
+
+def import_records(records, progress=None, **kwargs):
+    return Importer(**kwargs).run(records, progress)
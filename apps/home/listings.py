@@ -0,0 +1,54 @@
+"""
+Helpers for building page listings.
+"""
+
+from django.db.models import F
+from wagtail.models import Site
+
+from .concurrency import gather
+
+
+def resolve_urls(pages, request=None):
+    """
+    Resolve the URL of every page in a listing against one site-root map and
+    store it as ``listing_url``, so templates do not look the site roots up
+    once per item through ``page.url``.
+    """
+    if request is not None:
+        # Wagtail caches the site and site-root map on the request.
+        current_site = Site.find_for_request(request)
+    else:
+        current_site = None
+        site_root_paths = Site.get_site_root_paths()
+    for page in pages:
+        if request is None:
+            page._wagtail_cached_site_root_paths = site_root_paths
+        page.listing_url = page.get_url(request=request, current_site=current_site)
+    return pages
+
+
+def get_latest_content(root_page, sections, per_type=3):
+    """
+    Return the newest live pages of several page types below ``root_page``.
+
+    ``sections`` maps a section name to ``(page_model, summary_field)``. The
+    result maps each section name to at most ``per_type`` pages, newest
+    first, carrying the summary field's value as ``summary``. Each section
+    is a short range scan of its own model, and the sections are queried
+    concurrently.
+    """
+    def latest(page_model, summary_field):
+        def query():
+            queryset = page_model.objects.live().descendant_of(root_page)
+            if any(field.name == 'body' for field in page_model._meta.concrete_fields):
+                queryset = queryset.defer('body')
+            pages = list(queryset.order_by(F('first_published_at').desc(nulls_last=True), '-pk')[:per_type])
+            for page in pages:
+                page.summary = getattr(page, summary_field)
+            return pages
+        return query
+
+    return gather({
+        name: latest(page_model, summary_field)
+        for name, (page_model, summary_field) in sections.items()
+    })
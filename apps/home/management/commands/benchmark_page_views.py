@@ -0,0 +1,57 @@
+"""
+Management command to measure the request overhead of page view counting
+Run with: python manage.py benchmark_page_views [--views N] [--threads N]
+"""
+
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from wagtail.models import Page
+
+from apps.home.page_views import PageViewBuffer, write_counts
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request cost of recording a page view and of flushing the buffer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--views', type=int, default=200000, help='Views to record per thread')
+        parser.add_argument('--threads', type=int, default=2, help='Concurrent recording threads (gthread workers use 2)')
+        parser.add_argument('--pages', type=int, default=500, help='Number of distinct pages to spread the views over')
+        parser.add_argument('--flush', action='store_true', help='Also write the recorded views to the database')
+
+    def handle(self, *args, **options):
+        views = options['views']
+        threads = options['threads']
+        page_ids = list(Page.objects.values_list('pk', flat=True)[:options['pages']]) or [1]
+        # A buffer that never flushes on its own, so only record() is timed.
+        buffer = PageViewBuffer(flush_interval=3600, flush_threshold=float('inf'))
+        buffer._thread = threading.current_thread()
+
+        def run(results, index):
+            start = time.perf_counter()
+            for i in range(views):
+                buffer.record(page_ids[i % len(page_ids)])
+            results[index] = time.perf_counter() - start
+
+        results = [0.0] * threads
+        workers = [threading.Thread(target=run, args=(results, i)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        per_view = max(results) / views * 1e6
+        self.stdout.write(f'✓ Recorded {views * threads} views in {threads} thread(s)')
+        self.stdout.write(self.style.SUCCESS(f'  record(): {per_view:.2f} µs per view (slowest thread)'))
+
+        if options['flush']:
+            counts = buffer.take()
+            start = time.perf_counter()
+            write_counts(counts)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(
+                f'  flush: {len(counts)} rows in {elapsed * 1000:.1f} ms '
+                f'({sum(counts.values())} views, off the request path)'
+            ))
@@ -0,0 +1,89 @@
+"""
+Management command to benchmark page rendering per page type
+Run with: python manage.py benchmark_pages [--requests N] [--save-baseline] [--threshold 0.25]
+
+Run it against a generated dataset (python manage.py generate_dataset). With
+a stored baseline, the command fails when a page type makes more queries per
+request than before or its p95 latency or peak memory grows beyond the
+threshold.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from wagtail.models import Site
+
+from apps.home import benchmarks
+
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'pages.json'
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, queries, response size and memory per page type through the test client'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per page type')
+        parser.add_argument('--pages', type=int, default=10, help='Distinct pages per page type')
+        parser.add_argument('--only', action='append', help='Page type to run (repeatable)')
+        parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='Baseline file')
+        parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+        parser.add_argument('--threshold', type=float, default=0.25, help='Allowed p95 and memory growth (0.25 = 25%%)')
+        parser.add_argument('--page-cache', action='store_true', help='Serve anonymous pages from the page cache')
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING('⚠ DEBUG is on; latencies include its overhead'))
+        host = Site.objects.get(is_default_site=True).hostname
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 Benchmarking {options["requests"]} requests per page type on {host}...'
+        ))
+        self.stdout.write(
+            f'  {"page type":<20} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8} {"KB":>8} {"peak KB":>8}'
+        )
+
+        def progress(name, result):
+            self.stdout.write(
+                f'  {name:<20} {result["p50"]:>8.1f} {result["p95"]:>8.1f} {result["p99"]:>8.1f} '
+                f'{result["queries"]:>8} {result["bytes"] / 1024:>8.1f} {result["peak_memory"] / 1024:>8.0f}'
+            )
+
+        # Measure rendering, not the page cache, and keep the benchmark's
+        # requests out of the view counts.
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, host],
+            PAGE_CACHE_ENABLED=options['page_cache'] and getattr(settings, 'PAGE_CACHE_ENABLED', False),
+            PAGE_VIEWS_ENABLED=False,
+        ):
+            try:
+                results = benchmarks.run(
+                    requests=options['requests'],
+                    count=options['pages'],
+                    only=options['only'],
+                    host=host,
+                    progress=progress,
+                )
+            except benchmarks.ResponseError as e:
+                raise CommandError(e)
+        if not results:
+            raise CommandError('Nothing to benchmark; run generate_dataset first')
+
+        if options['save_baseline']:
+            benchmarks.save_baseline(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f'✅ Baseline saved to {options["baseline"]}'))
+            return
+
+        baseline = benchmarks.load_baseline(options['baseline'])
+        if baseline is None:
+            self.stdout.write('  No baseline yet; store one with --save-baseline')
+            return
+        if baseline['dataset'] != benchmarks.get_dataset_size():
+            self.stdout.write(self.style.WARNING('⚠ The dataset differs from the one the baseline was taken on'))
+        regressions = benchmarks.compare(results, baseline['results'], options['threshold'])
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f'  ✗ {regression}'))
+            raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+        self.stdout.write(self.style.SUCCESS('✅ No regressions against the baseline'))
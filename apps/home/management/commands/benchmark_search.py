@@ -0,0 +1,109 @@
+"""
+Management command to measure search latency over a generated corpus
+Run with: python manage.py benchmark_search [--pages N] [--repeat N] [--keep]
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from wagtail.models import Page, Site
+from wagtail.search.backends import get_search_backend
+
+from apps.home.benchmarks import percentile
+from apps.home.bulk import add_children
+from apps.home.dataset import TextGenerator
+from apps.home.models import NewsIndexPage, NewsPage
+
+
+# Queries written the way visitors type them: Arabic letters, missing or
+# extra zero-width non-joiners, diacritics.
+QUERIES = [
+    'کتابخانه',
+    'كتابخانه',
+    'ثبتنام',
+    'ثبت‌نام دانشجو',
+    'میشود',
+    'هوش مصنوعي',
+    'پژوهِش',
+    'همایش بین المللی',
+    'پایان‌نامه تحصیلات',
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Generate a corpus of news pages, index it and measure search query latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=100000, help='Number of news pages to generate')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query')
+        parser.add_argument('--query', action='append', dest='queries', help='Query to run (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Pages per insert and index batch')
+        parser.add_argument('--vocabulary', type=int, default=20000, help='Number of distinct generated words')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the corpus')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated pages instead of rolling back')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write('  Generated corpus rolled back')
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        site = Site.objects.get(is_default_site=True)
+        index_page = site.root_page.add_child(instance=NewsIndexPage(title='Search benchmark', slug='search-benchmark'))
+
+        # Real words are spread over the ranks of a Zipf-distributed
+        # vocabulary, so queries match anywhere from a handful to most of
+        # the pages.
+        text = TextGenerator(rng, options['vocabulary']).words
+
+        self.stdout.write(f'🚀 Generating {options["pages"]} news pages...')
+        start = time.perf_counter()
+        now = timezone.now()
+        pages = []
+        for i in range(options['pages']):
+            pages.append(NewsPage(
+                title=text(6),
+                slug=f'news-{i}',
+                intro=text(20),
+                body=f'<p>{text(120)}</p>',
+                first_published_at=now,
+                last_published_at=now,
+            ))
+        add_children(index_page, pages, options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'  Created in {elapsed:.1f}s ({len(pages) / elapsed:.0f} pages/s)')
+
+        backend = get_search_backend()
+        start = time.perf_counter()
+        for i in range(0, len(pages), options['batch_size']):
+            backend.add_bulk(NewsPage, pages[i:i + options['batch_size']])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'  Indexed in {elapsed:.1f}s ({len(pages) / elapsed:.0f} pages/s)')
+
+        self.stdout.write(f'\n🔎 {type(backend).__name__}, {options["repeat"]} runs per query (first 10 results + count)')
+        queryset = Page.objects.live().descendant_of(index_page)
+        for query in options['queries'] or QUERIES:
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                results = queryset.search(query)
+                list(results[:10])
+                count = results.count()
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f'  {query}: {count} hits, p50 {statistics.median(timings):.1f} ms, '
+                f'p95 {percentile(timings, 0.95):.1f} ms, max {max(timings):.1f} ms'
+            )
@@ -0,0 +1,66 @@
+"""
+Management command to compare the WSGI (gthread) and ASGI (uvicorn) server modes
+Run with: python manage.py benchmark_server [--duration 20] [--concurrency 8] [--slow-clients 8]
+
+Starts gunicorn with gunicorn.conf.py in each mode against the current
+database, once with regular clients only and once with slow clients added,
+and reports throughput and latency of the regular clients. Run it against a
+generated dataset (python manage.py generate_dataset) with DEBUG off.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Site
+
+from apps.home import server_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Load test gunicorn in its gthread and uvicorn modes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', choices=server_benchmark.MODES, help='Mode to run (repeatable)')
+        parser.add_argument('--duration', type=int, default=20, help='Seconds of load per run (default: 20)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Regular keep-alive clients (default: 8)')
+        parser.add_argument('--slow-clients', type=int, default=8, help='Slow clients in the second run (default: 8)')
+        parser.add_argument('--slow-seconds', type=float, default=2, help='Time a slow client takes to send its request')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (default: 2)')
+        parser.add_argument('--threads', type=int, default=2, help='Threads per gthread worker (default: 2)')
+        parser.add_argument('--pages', type=int, default=10, help='Distinct pages per page type')
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING('⚠ DEBUG is on in the servers; latencies include its overhead'))
+        urls = server_benchmark.get_urls(options['pages'])
+        if not urls:
+            raise CommandError('Nothing to benchmark; run generate_dataset first')
+        host = Site.objects.get(is_default_site=True).hostname
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 {options["duration"]}s per run, {options["concurrency"]} clients, '
+            f'{options["workers"]} workers, {len(urls)} URLs on {host}...'
+        ))
+        self.stdout.write(
+            f'  {"mode":<6} {"slow":>5} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}'
+        )
+        for mode in options['mode'] or server_benchmark.MODES:
+            for slow_clients in sorted({0, options['slow_clients']}):
+                try:
+                    result = server_benchmark.run(
+                        mode,
+                        urls,
+                        host=host,
+                        workers=options['workers'],
+                        threads=options['threads'],
+                        concurrency=options['concurrency'],
+                        duration=options['duration'],
+                        slow_clients=slow_clients,
+                        slow_seconds=options['slow_seconds'],
+                    )
+                except server_benchmark.ServerError as e:
+                    raise CommandError(f'{mode}: {e}')
+                self.stdout.write(
+                    f'  {mode:<6} {slow_clients:>5} {result["throughput"]:>8.1f} {result["p50"]:>8.1f} '
+                    f'{result["p95"]:>8.1f} {result["p99"]:>8.1f} {result["errors"]:>7}'
+                )
+        self.stdout.write(self.style.SUCCESS('✅ Done'))
@@ -0,0 +1,69 @@
+"""
+Management command to generate a synthetic dataset for load and benchmark tests
+Run with: python manage.py generate_dataset [--scale N] [--seed N] [--index]
+
+Scale 1 is 2,000 pages, 2 galleries and 40 images; --scale 500 builds a
+million-page site. The same seed and scale always give the same content.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.home import autocomplete, dataset, search_indexing
+
+
+class Command(BaseCommand):
+    help = 'Generate index pages, news, announcements, blog posts and galleries at a given scale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1, help='Size multiplier (1 = 2,000 pages)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the content')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Pages per transaction')
+        parser.add_argument('--no-revisions', action='store_false', dest='revisions', help='Skip the initial revisions')
+        parser.add_argument('--index', action='store_true', help='Rebuild the search and autocomplete indexes afterwards')
+        parser.add_argument('--workers', type=int, help='Worker processes for --index (default: CPU count; always 1 on SQLite)')
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0:
+            raise CommandError('--scale must be positive')
+        pages = sum(round(count * options['scale']) for *_, count in dataset.SECTIONS)
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 Generating dataset at scale {options["scale"]:g} (~{pages} pages, seed {options["seed"]})...'
+        ))
+        start = time.perf_counter()
+
+        def progress(label, done, total):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'  {label}: {done}/{total} ({elapsed:.0f}s)')
+
+        generator = dataset.DatasetGenerator(
+            scale=options['scale'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            revisions=options['revisions'],
+            progress=progress,
+        )
+        counts = generator.run()
+        elapsed = time.perf_counter() - start
+        total = sum(count for model, count in counts.items() if model in generator.page_models)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Generated {total} pages in {elapsed:.1f}s ({total / elapsed:.0f} pages/s)'
+        ))
+        for model, count in counts.items():
+            self.stdout.write(f'  {model._meta.verbose_name_plural}: {count}')
+
+        if options['index']:
+            workers = search_indexing.get_worker_count(options['workers'])
+            if options['workers'] and options['workers'] > workers:
+                self.stderr.write(self.style.WARNING('⚠️  SQLite takes one writer at a time; indexing with 1 worker'))
+            self.stdout.write(f'🔎 Rebuilding the search index with {workers} workers...')
+            start = time.perf_counter()
+            indexed = search_indexing.rebuild_in_pool(workers=workers)
+            autocomplete.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Indexed {indexed} objects in {time.perf_counter() - start:.1f}s'
+            ))
+        else:
+            self.stdout.write('  Run rebuild_search_index and rebuild_autocomplete_index to make the pages searchable')
+        self.stdout.write('  Run generate_renditions to pre-generate the image renditions')
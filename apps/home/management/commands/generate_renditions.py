@@ -0,0 +1,54 @@
+"""
+Management command to pre-generate image renditions
+Run with: python manage.py generate_renditions [--all-images] [--workers N]
+"""
+
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from wagtail.images import get_image_model
+
+from apps.home import renditions
+from apps.home.models import GalleryImage
+
+
+class Command(BaseCommand):
+    help = 'Generate missing renditions for gallery images (or all images) across a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all-images', action='store_true', help='Include images that are not used in a gallery')
+        parser.add_argument('--spec', action='append', dest='specs', help='Filter spec to generate (repeatable); defaults to RENDITION_FILTER_SPECS')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=20, help='Images per task')
+
+    def handle(self, *args, **options):
+        specs = options['specs'] or renditions.get_filter_specs()
+        if options['all_images']:
+            image_ids = get_image_model().objects.values_list('pk', flat=True)
+        else:
+            image_ids = GalleryImage.objects.exclude(image=None).values_list('image_id', flat=True).distinct()
+        image_ids = sorted(image_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 Generating {", ".join(specs)} for {len(image_ids)} images with {options["workers"]} workers...'
+        ))
+        start = time.perf_counter()
+
+        def progress(done, total, counts):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'  {done}/{total} images, {counts[0]} created ({done / elapsed:.1f} images/s)')
+
+        created, skipped, failed = renditions.generate_in_pool(
+            image_ids,
+            specs,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - start
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Completed in {elapsed:.1f}s: {created} created ({rate:.1f} renditions/s), '
+            f'{skipped} already existed, {failed} failed.'
+        ))
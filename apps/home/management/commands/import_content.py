@@ -0,0 +1,70 @@
+"""
+Management command to import news, announcements and blog posts in bulk
+Run with: python manage.py import_content FILE [--format jsonl|csv] [--revisions] [--index]
+
+FILE holds one record per line (JSON Lines) or per row (CSV); use - to read
+from standard input. See apps/home/importer.py for the record fields.
+"""
+
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.home import importer
+
+
+class Command(BaseCommand):
+    help = 'Import pages from a JSON Lines or CSV file in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for standard input')
+        parser.add_argument('--format', choices=importer.FORMATS, help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Records per transaction')
+        parser.add_argument('--parent', type=int, help='Index page for records without a parent')
+        parser.add_argument('--revisions', action='store_true', help='Create an initial revision for each page')
+        parser.add_argument('--index', action='store_true', help='Add the pages to the search and autocomplete indexes')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        if path == '-':
+            file = sys.stdin
+        else:
+            try:
+                file = open(path, encoding='utf-8-sig', newline='')
+            except OSError as e:
+                raise CommandError(e)
+
+        self.stdout.write(self.style.SUCCESS(f'🚀 Importing {os.path.basename(path)} ({format})...'))
+        start = time.perf_counter()
+
+        def progress(done):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'  {done} pages ({done / elapsed:.0f} pages/s)')
+
+        content_importer = importer.Importer(
+            batch_size=options['batch_size'],
+            revisions=options['revisions'],
+            index=options['index'],
+            default_parent=options['parent'],
+        )
+        try:
+            imported = content_importer.run(importer.read_records(file, format), progress)
+        except importer.RecordError as e:
+            total = sum(content_importer.imported.values())
+            raise CommandError(f'{e} ({total} pages imported before the failing batch)')
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+        elapsed = time.perf_counter() - start
+        for model, count in imported.items():
+            if count:
+                self.stdout.write(f'  {model._meta.verbose_name_plural}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Imported {sum(imported.values())} pages in {elapsed:.1f}s'
+        ))
+        if not options['index']:
+            self.stdout.write('  Run rebuild_search_index and rebuild_autocomplete_index to make them searchable')
@@ -4,7 +4,8 @@ Run with: python manage.py populate_sample_data
 """
 
 from django.core.management.base import BaseCommand
-from wagtail.models import Page
+from wagtail.models import Page, Site
+from apps.home import importer
 from apps.home.models import HomePage, BlogIndexPage, BlogPage
 
 
@@ -23,12 +24,15 @@ class Command(BaseCommand):
         
         # Create Home Page if it doesn't exist
         if not HomePage.objects.exists():
+            # A fresh Wagtail install already has a welcome page at "home"
+            slug = "portal" if root_page.get_children().filter(slug="home").exists() else "home"
             home_page = root_page.add_child(instance=HomePage(
                 title="صفحه اصلی",
-                slug="home",
+                slug=slug,
                 intro="<p>خوش آمدید به پورتال ما! این یک مرکز مدیریت محتوا است که بر پایه Django و Wagtail بنا شده است.</p>",
                 live=True
             ))
+            Site.objects.filter(is_default_site=True).update(root_page=home_page)
             self.stdout.write(self.style.SUCCESS(f'✓ Home page created: {home_page.title}'))
         else:
             home_page = HomePage.objects.first()
@@ -36,7 +40,7 @@ class Command(BaseCommand):
         
         # Create Blog Index Page if it doesn't exist
         if not BlogIndexPage.objects.exists():
-            blog_index = root_page.add_child(instance=BlogIndexPage(
+            blog_index = home_page.add_child(instance=BlogIndexPage(
                 title="وبلاگ",
                 slug="blog",
                 intro="<p>آخرین مقالات و نوشته های ما را اینجا بخوانید.</p>",
@@ -71,20 +75,19 @@ class Command(BaseCommand):
             }
         ]
         
-        # Add blog posts
-        created_count = 0
+        # Add blog posts in one batch
+        existing = set(BlogPage.objects.filter(
+            title__in=[post_data["title"] for post_data in sample_posts]
+        ).values_list('title', flat=True))
+        records = []
         for i, post_data in enumerate(sample_posts):
-            if not BlogPage.objects.filter(title=post_data["title"]).exists():
-                blog_post = blog_index.add_child(instance=BlogPage(
-                    title=post_data["title"],
-                    slug=f"blog-post-{i+1}",
-                    intro=post_data["intro"],
-                    body=post_data["body"],
-                    live=True
-                ))
-                self.stdout.write(self.style.SUCCESS(f'✓ Blog post {i+1} created: {blog_post.title}'))
-                created_count += 1
-            else:
+            if post_data["title"] in existing:
                 self.stdout.write(self.style.WARNING(f'✓ Blog post "{post_data["title"]}" already exists'))
+            else:
+                records.append(dict(post_data, type='blog', slug=f"blog-post-{i+1}", parent=blog_index.pk))
+        imported = importer.import_records(records, revisions=True, index=True)
+        created_count = imported[BlogPage]
+        for record in records:
+            self.stdout.write(self.style.SUCCESS(f'✓ Blog post created: {record["title"]}'))
         
         self.stdout.write(self.style.SUCCESS(f'\n✅ Completed! {created_count} new posts created.'))
@@ -0,0 +1,43 @@
+"""
+Management command to apply queued search index updates
+Run with: python manage.py process_search_index_queue [--loop] [--batch-size N]
+
+Web workers apply the queue themselves; run this from cron, or with --loop
+as a dedicated worker, to catch updates left behind by stopped workers.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.home import search_indexing
+from apps.home.models import PendingSearchUpdate
+
+
+class Command(BaseCommand):
+    help = 'Apply pending search index updates in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Updates per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new updates')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            pending = PendingSearchUpdate.objects.count()
+            applied = 0
+            start = time.perf_counter()
+            while True:
+                count = search_indexing.process_queue(options['batch_size'])
+                if not count:
+                    break
+                applied += count
+                self.stdout.write(f'  {applied}/{pending} updates applied')
+            if applied:
+                elapsed = time.perf_counter() - start
+                self.stdout.write(self.style.SUCCESS(f'✅ Applied {applied} updates in {elapsed:.1f}s'))
+            if not options['loop']:
+                if not applied:
+                    self.stdout.write('✓ Search index queue is empty')
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,53 @@
+"""
+Management command to purge pages from the front cache
+Run with: python manage.py purge_front_cache [--all] [--page ID] [KEY ...]
+
+Sends a purge of the given surrogate keys to every backend in
+FRONT_CACHE_BACKENDS right away. --all purges every page, e.g. after a
+deploy changed the templates; --page purges a page and the listings of its
+type, as publishing it does.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Page
+
+from apps.home import front_cache
+
+
+class Command(BaseCommand):
+    help = 'Purge surrogate keys from the front cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('keys', nargs='*', metavar='KEY', help='Surrogate keys, e.g. page-12 or type-home.newspage')
+        parser.add_argument('--all', action='store_true', help='Purge every page')
+        parser.add_argument(
+            '--page',
+            type=int,
+            action='append',
+            default=[],
+            metavar='ID',
+            help='Purge a page and the listings of its type; can be repeated',
+        )
+
+    def handle(self, *args, **options):
+        backends = front_cache.get_backends()
+        if not backends:
+            raise CommandError('No front cache configured; set FRONT_CACHE_PURGE_URL or FRONT_CACHE_BACKENDS')
+
+        keys = list(options['keys'])
+        if options['all']:
+            keys.append(front_cache.ALL_KEY)
+        for page in Page.objects.filter(pk__in=options['page']):
+            keys.extend(front_cache.get_purge_keys(page))
+        keys = sorted(set(keys))
+        if not keys:
+            raise CommandError('Nothing to purge; give keys, --page or --all')
+
+        failed = front_cache.send(keys)
+        for name, error in failed.items():
+            self.stderr.write(self.style.ERROR(f'❌ {name}: {error}'))
+        if len(failed) == len(backends):
+            raise CommandError('Purging failed')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Purged {len(keys)} keys on {len(backends) - len(failed)} of {len(backends)} front caches'
+        ))
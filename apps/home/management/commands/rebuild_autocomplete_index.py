@@ -0,0 +1,34 @@
+"""
+Management command to rebuild the search suggestion index
+Run with: python manage.py rebuild_autocomplete_index [--batch-size N]
+
+Publishing keeps the index up to date; run this after importing content
+outside the editor or after changing how prefixes are built.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.home import autocomplete
+from apps.home.models import AutocompletePrefix
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the prefix index behind the autocomplete endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Pages per batch')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🚀 Rebuilding the autocomplete index...'))
+        start = time.perf_counter()
+
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} pages')
+
+        pages = autocomplete.rebuild(options['batch_size'], progress)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Indexed {pages} pages ({AutocompletePrefix.objects.count()} prefixes) in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,38 @@
+"""
+Management command to rebuild the home page content statistics
+Run with: python manage.py rebuild_content_statistics [--check]
+
+Schedule it with --check (e.g. hourly from cron) to detect counters that
+drifted because of changes made outside the ORM signals, such as raw SQL
+or queryset.update() calls.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.home import statistics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the content statistics shown on the home page'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report counters that differ from a fresh count; exit with an error if any do',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drift = statistics.find_drift()
+            if drift:
+                for field, (stored, actual) in drift.items():
+                    self.stdout.write(self.style.WARNING(f'✗ {field}: stored {stored}, actual {actual}'))
+                raise CommandError(f'{len(drift)} counter(s) out of date; run without --check to rebuild.')
+            self.stdout.write(self.style.SUCCESS('✅ Content statistics are up to date.'))
+            return
+
+        values = statistics.rebuild()
+        for field, value in values.items():
+            self.stdout.write(f'✓ {field}: {value}')
+        self.stdout.write(self.style.SUCCESS('✅ Content statistics rebuilt.'))
@@ -0,0 +1,78 @@
+"""
+Management command to list and summarize request profiles
+Run with: python manage.py request_profiles [name] [--top 25] [--token] [--clear]
+
+Without a name, lists the stored profiles. With a name (or "latest"), shows
+the functions that took the most samples: "own" is time spent in the
+function itself, "total" includes the functions it called. The .collapsed
+files in PROFILING_DIR can also be opened in speedscope or fed to
+flamegraph.pl.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.home import profiling
+
+
+class Command(BaseCommand):
+    help = 'List captured request profiles or summarize one of them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Profile to summarize, or "latest"')
+        parser.add_argument('--top', type=int, default=25, help='Number of functions to show (default: 25)')
+        parser.add_argument(
+            '--token',
+            action='store_true',
+            help='Print a token that profiles any request sent with it in X-Profile-Token',
+        )
+        parser.add_argument('--clear', action='store_true', help='Delete all stored profiles')
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(profiling.make_token())
+            return
+        if options['clear']:
+            count = len(profiling.list_profiles())
+            profiling.rotate(profiling.get_directory(), 0)
+            self.stdout.write(self.style.SUCCESS(f'✅ Deleted {count} profile(s).'))
+            return
+
+        profiles = profiling.list_profiles()
+        if not profiles:
+            self.stdout.write(f'No profiles in {profiling.get_directory()}')
+            return
+        if options['name']:
+            self.summarize(profiles, options['name'], options['top'])
+        else:
+            self.list(profiles)
+
+    def list(self, profiles):
+        self.stdout.write(f'  {"profile":<50} {"status":>6} {"ms":>9} {"samples":>8} {"queries":>8}  trigger')
+        for name, metadata in profiles:
+            self.stdout.write(
+                f'  {name:<50} {metadata["status"]:>6} {metadata["duration_ms"]:>9.1f} '
+                f'{metadata["samples"]:>8} {metadata.get("queries", "-"):>8}  {metadata["trigger"]}'
+            )
+
+    def summarize(self, profiles, name, top):
+        if name == 'latest':
+            name, metadata = profiles[-1]
+        else:
+            metadata = dict(profiles).get(name)
+            if metadata is None:
+                raise CommandError(f'No profile named {name}')
+
+        stacks = profiling.load_stacks(name)
+        samples = sum(stacks.values())
+        if not samples:
+            raise CommandError(f'{name} has no samples; the request was shorter than the sampling interval')
+        own, total = profiling.summarize(stacks)
+
+        self.stdout.write(
+            f'🔍 {metadata["method"]} {metadata["path"]} ({metadata.get("view") or "-"}): '
+            f'{metadata["status"]}, {metadata["duration_ms"]} ms, {samples} samples'
+        )
+        for title, counter in (('Own time', own), ('Total time', total)):
+            self.stdout.write(f'\n  {title}')
+            for frame, count in counter.most_common(top):
+                self.stdout.write(f'  {count / samples:>6.1%}  {frame}')
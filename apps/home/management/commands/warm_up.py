@@ -0,0 +1,102 @@
+"""
+Management command to warm up the application and report startup times
+Run with: python manage.py warm_up [--report] [--runs 3]
+
+Without options, runs the warm-up steps that gunicorn.conf.py runs before
+forking workers and prints how long each took. With --report, starts fresh
+Python processes the way a gunicorn worker starts, with and without the
+warm-up, and compares the import time and the latency of the first and
+second request to one page of each type.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Site
+
+from apps.home import benchmarks, warmup
+
+
+# Runs in a fresh interpreter: argv is [warm, host, url, ...].
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import portal.wsgi
+imported = time.perf_counter() - start
+from apps.home import warmup
+warm_up = sum(warmup.warm_up().values()) if sys.argv[1] == '1' else 0
+first_requests = warmup.measure_first_requests(sys.argv[3:], host=sys.argv[2])
+print(json.dumps({'import': imported, 'warm_up': warm_up, 'requests': first_requests}))
+'''
+
+SCENARIOS = ['home', 'news_index', 'news', 'blog', 'gallery']
+
+
+class Command(BaseCommand):
+    help = 'Prime URL resolvers, templates, content types and other lazily loaded state'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--report',
+            action='store_true',
+            help='Compare import and first-request latency of cold and warmed-up processes',
+        )
+        parser.add_argument('--runs', type=int, default=3, help='Processes per variant for --report (default: 3)')
+
+    def handle(self, *args, **options):
+        if not options['report']:
+            timings = warmup.warm_up()
+            for name, seconds in timings.items():
+                self.stdout.write(f'✓ {name}: {seconds * 1000:.0f} ms')
+            self.stdout.write(self.style.SUCCESS(f'✅ {warmup.describe(timings)}'))
+            return
+
+        scenarios = benchmarks.get_scenarios(1)
+        urls = [scenarios[name][0][0] for name in SCENARIOS if scenarios[name][0]]
+        if not urls:
+            raise CommandError('No pages to request; run generate_dataset first')
+        host = Site.objects.get(is_default_site=True).hostname
+
+        self.stdout.write(self.style.SUCCESS(f'🚀 Starting {options["runs"]} processes per variant...'))
+        results = {
+            label: self.probe(warm, host, urls, options['runs'])
+            for label, warm in (('cold', False), ('warm', True))
+        }
+
+        self.stdout.write(f'  {"median ms":<36} {"cold":>8} {"warm":>8}')
+        self.write_row('import', results, lambda run: run['import'])
+        self.write_row('warm-up', results, lambda run: run['warm_up'])
+        for url in urls:
+            self.write_row(f'first {url}', results, lambda run: run['requests'][url][0])
+        self.write_row('first requests, total', results, lambda run: sum(t[0] for t in run['requests'].values()))
+        self.write_row('second requests, total', results, lambda run: sum(t[1] for t in run['requests'].values()))
+        # Without preloading every worker imports the application; with it,
+        # the import and the warm-up happen once, in the gunicorn master.
+        self.write_row(
+            'new worker until warm',
+            results,
+            lambda run: (0 if run['warm_up'] else run['import']) + sum(t[0] for t in run['requests'].values()),
+        )
+        self.stdout.write('  (warm: forked from a preloaded, warmed-up master)')
+
+    def probe(self, warm, host, urls, runs):
+        probes = []
+        for _ in range(runs):
+            process = subprocess.run(
+                [sys.executable, '-c', PROBE, '1' if warm else '0', host, *urls],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+            )
+            if process.returncode:
+                raise CommandError(process.stderr.strip().splitlines()[-1])
+            probes.append(json.loads(process.stdout.strip().splitlines()[-1]))
+        return probes
+
+    def write_row(self, label, results, value):
+        cold, warm = (statistics.median(value(run) for run in results[name]) * 1000 for name in ('cold', 'warm'))
+        self.stdout.write(f'  {label[:36]:<36} {cold:>8.1f} {warm:>8.1f}')
@@ -0,0 +1,185 @@
+"""
+Middleware for the home app.
+"""
+
+import time
+from contextlib import ExitStack
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import conditional, front_cache, page_cache, page_views, performance, profiling
+
+
+class PerformanceMiddleware:
+    """
+    Collect per-request performance metrics (see ``apps.home.performance``),
+    log them and send them as a ``Server-Timing`` header to staff and to
+    requests with a valid token.
+
+    Place it first in ``MIDDLEWARE`` so that the figures cover the other
+    middleware, page cache hits included. When
+    ``PERFORMANCE_METRICS_ENABLED`` is off it removes itself from the
+    middleware chain.
+    """
+
+    def __init__(self, get_response):
+        if not performance.is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics, token = performance.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            performance.finish(token)
+
+        if metrics.template_started is not None and metrics.template_time is None:
+            # Streaming and unrendered responses.
+            metrics.template_time = 0.0
+        metrics.total = time.perf_counter() - metrics.started
+        if metrics.view_started is not None and metrics.view_time is None:
+            metrics.view_time = metrics.total - (metrics.view_started - metrics.started)
+        performance.log(request, response, metrics)
+        if performance.wants_server_timing(request):
+            response['Server-Timing'] = performance.format_server_timing(metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = performance.get_current()
+        if metrics is not None:
+            # Wagtail pages are renamed after their page type while served.
+            metrics.view_name = request.resolver_match.view_name
+            metrics.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        metrics = performance.get_current()
+        if metrics is None:
+            return response
+        now = time.perf_counter()
+        metrics.view_time = now - metrics.view_started if metrics.view_started else None
+        metrics.template_started = now
+
+        def rendered(response):
+            metrics.template_time = time.perf_counter() - metrics.template_started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Run requests selected by ``profiling.get_trigger()`` under the sampling
+    profiler and store their profiles. Profiled responses carry the
+    profile's name in ``X-Profile``.
+
+    Place it after ``AuthenticationMiddleware`` so that staff users can be
+    recognised.
+    """
+
+    def __init__(self, get_response):
+        if not profiling.is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = profiling.get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        sampler = profiling.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        response['X-Profile'] = profiling.save(request, response, sampler, trigger)
+        return response
+
+
+class PageCacheMiddleware:
+    """
+    Serve anonymous GET requests for Wagtail pages from the full-page cache.
+
+    A cache hit returns before URL resolution, so neither the page tree
+    lookup nor ``get_context()`` and template rendering run. Responses are
+    only stored for requests that the ``before_serve_page`` hook marked as
+    cacheable, i.e. requests that were actually served by a home app page.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not page_cache.is_enabled() or not page_cache.is_cacheable_request(request):
+            return self.get_response(request)
+
+        cached = page_cache.get_cached_response(request)
+        if cached is not None:
+            page_id, response = cached
+            response['X-Page-Cache'] = 'HIT'
+            if conditional.is_enabled():
+                response = conditional.evaluate_cached_response(request, response)
+            # Revalidations answered with a 304 are not views.
+            if response.status_code == 200:
+                page_views.record(page_id)
+            return response
+
+        response = self.get_response(request)
+        marker = getattr(request, '_page_cache', None)
+        if marker is not None and page_cache.is_cacheable_response(response):
+            page_id, version = marker
+            page_cache.store_response(request, page_id, version, response)
+            response['X-Page-Cache'] = 'MISS'
+        return response
+
+
+class ConditionalPageMiddleware:
+    """
+    Send the validator that the ``answer_conditional_request`` hook worked
+    out for a page as ``ETag`` and ``Last-Modified`` with its response.
+
+    Place it after ``PageCacheMiddleware`` so that cached responses carry
+    the headers too. When ``CONDITIONAL_GET_ENABLED`` is off it removes
+    itself from the middleware chain.
+    """
+
+    def __init__(self, get_response):
+        if not conditional.is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        validator = getattr(request, '_page_validator', None)
+        if validator is not None and response.status_code == 200:
+            conditional.set_headers(response, validator)
+        return response
+
+
+class FrontCacheMiddleware:
+    """
+    Send ``Cache-Control`` and ``Surrogate-Key`` for a front cache with
+    anonymous page responses (see ``apps.home.front_cache``), and mark
+    page responses for logged-in users private.
+
+    Place it after ``PageCacheMiddleware`` so that the page cache stores
+    the headers with the response and skips private ones. When
+    ``FRONT_CACHE_ENABLED`` is off it removes itself from the middleware
+    chain.
+    """
+
+    def __init__(self, get_response):
+        if not front_cache.is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.status_code not in (200, 304) or not hasattr(request, '_front_cache'):
+            return response
+        front_cache.set_headers(response, request._front_cache)
+        return response
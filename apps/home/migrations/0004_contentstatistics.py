@@ -0,0 +1,38 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0003_announcementindexpage_announcementpage_newsindexpage_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentStatistics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("news_pages", models.PositiveIntegerField(default=0)),
+                ("news_published_today", models.PositiveIntegerField(default=0)),
+                ("today", models.DateField(blank=True, null=True)),
+                ("announcement_pages", models.PositiveIntegerField(default=0)),
+                ("blog_pages", models.PositiveIntegerField(default=0)),
+                ("gallery_images", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Content Statistics",
+                "verbose_name_plural": "Content Statistics",
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wagtailcore", "0089_log_entry_data_json_null_to_object"),
+        ("home", "0004_contentstatistics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PageViewCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                (
+                    "page",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="wagtailcore.page",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Page View Count",
+                "verbose_name_plural": "Page View Counts",
+                "indexes": [
+                    models.Index(fields=["date"], name="page_view_count_date_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="pageviewcount",
+            constraint=models.UniqueConstraint(
+                fields=("page", "date"), name="unique_page_view_count_per_day"
+            ),
+        ),
+    ]
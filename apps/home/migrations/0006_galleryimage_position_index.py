@@ -0,0 +1,20 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0005_pageviewcount"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="galleryimage",
+            index=models.Index(
+                fields=["gallery_page", "order", "id"],
+                name="gallery_image_position_idx",
+            ),
+        ),
+    ]
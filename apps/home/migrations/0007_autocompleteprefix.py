@@ -0,0 +1,55 @@
+# Generated by Django 4.2.9 on 2026-10-18 16:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wagtailcore", "0089_log_entry_data_json_null_to_object"),
+        ("home", "0006_galleryimage_position_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AutocompletePrefix",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("prefix", models.CharField(max_length=20)),
+                ("score", models.PositiveSmallIntegerField(default=1)),
+                (
+                    "page",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="wagtailcore.page",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Autocomplete Prefix",
+                "verbose_name_plural": "Autocomplete Prefixes",
+                "indexes": [
+                    models.Index(
+                        fields=["prefix", "-score", "-page"],
+                        name="autocomplete_prefix_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="autocompleteprefix",
+            constraint=models.UniqueConstraint(
+                fields=("prefix", "page"), name="unique_autocomplete_prefix_per_page"
+            ),
+        ),
+    ]
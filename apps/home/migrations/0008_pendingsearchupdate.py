@@ -0,0 +1,53 @@
+# Generated by Django 4.2.9 on 2026-10-18 16:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("home", "0007_autocompleteprefix"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingSearchUpdate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.CharField(max_length=50)),
+                ("queued_at", models.DateTimeField()),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Pending Search Update",
+                "verbose_name_plural": "Pending Search Updates",
+                "indexes": [
+                    models.Index(fields=["queued_at"], name="pending_search_update_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="pendingsearchupdate",
+            constraint=models.UniqueConstraint(
+                fields=("content_type", "object_id"),
+                name="unique_pending_search_update",
+            ),
+        ),
+    ]
@@ -3,6 +3,10 @@ Models for the home app.
 """
 
 from django.db import models
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
 from wagtail.models import Page
 from wagtail.fields import RichTextField
 from wagtail.admin.panels import FieldPanel, InlinePanel
@@ -11,6 +15,11 @@ from wagtail.images.models import Image
 from modelcluster.fields import ParentalKey
 from modelcluster.contrib.taggit import ClusterTaggableManager
 
+from . import caching, conditional, page_cache
+from .listings import get_latest_content, resolve_urls
+from .pagination import paginate, paginate_by_position
+from .renditions import prefetch_rendition_sets
+
 
 class HomePage(Page):
     """
@@ -31,9 +40,64 @@ class HomePage(Page):
         'home.NewsIndexPage',
     ]
 
+    template = 'home/home.html'
+
+    feed_size = 3
+
+    # The feed lists pages from every section (see apps.home.conditional).
+    last_modified_from = 'descendants'
+    # The statistics change without anything being published: the visit
+    # count all the time and today's news count at midnight.
+    statistics_interval = 600
+
     def __str__(self):
         return self.title
 
+    def get_feed(self, request=None):
+        """
+        Latest news, announcements, blog posts and galleries below this
+        page, one concurrent query per type.
+        """
+        feed = get_latest_content(self, {
+            'news': (NewsPage, 'intro'),
+            'announcements': (AnnouncementPage, 'summary'),
+            'blog': (BlogPage, 'intro'),
+            'galleries': (GalleryPage, 'intro'),
+        }, per_type=self.feed_size)
+        for pages in feed.values():
+            resolve_urls(pages, request)
+        return feed
+
+    def render_feed(self, request=None):
+        """
+        Rendered feed fragment. Publishing any page below the home page
+        replaces the home page's version token, which retires the fragment.
+        """
+        key = f'home:{self.pk}:{page_cache.get_page_version(self.pk)}'
+        return caching.get_cache('feed').get_or_set(
+            key,
+            lambda: render_to_string('home/includes/home_feed.html', {
+                'page': self,
+                'feed': self.get_feed(request),
+            }),
+        )
+
+    def get_last_modified(self, request):
+        """
+        Treat the page as modified at the start of every
+        ``statistics_interval`` too, so that revalidating clients see the
+        statistics at most that much out of date.
+        """
+        last_modified = conditional.get_content_last_modified(self)
+        interval_start = conditional.get_interval_start(self.statistics_interval)
+        return max(last_modified, interval_start) if last_modified else interval_start
+
+    def get_context(self, request):
+        context = super().get_context(request)
+        context['feed_html'] = self.render_feed(request)
+        context['statistics'] = ContentStatistics.load()
+        return context
+
     class Meta:
         verbose_name = "Home Page"
         verbose_name_plural = "Home Pages"
@@ -51,11 +115,14 @@ class BlogIndexPage(Page):
     ]
 
     subpage_types = ['home.BlogPage']
+    last_modified_from = 'children'
 
     def get_context(self, request):
         context = super().get_context(request)
-        blog_pages = self.get_children().live().order_by('-first_published_at')
+        blog_pages = paginate(BlogPage.objects.child_of(self).live().defer('body'), request)
+        resolve_urls(blog_pages, request)
         context['blog_posts'] = blog_pages
+        context['pagination'] = blog_pages
         return context
 
     class Meta:
@@ -72,7 +139,7 @@ class BlogPage(Page):
     body = RichTextField()
 
     search_fields = Page.search_fields + [
-        index.SearchField('intro'),
+        index.SearchField('intro', boost=1.5),
         index.SearchField('body'),
     ]
 
@@ -104,10 +171,14 @@ class NewsIndexPage(Page):
     ]
 
     subpage_types = ['home.NewsPage']
+    last_modified_from = 'children'
 
     def get_context(self, request):
         context = super().get_context(request)
-        context['news_posts'] = self.get_children().live().order_by('-first_published_at')
+        news_pages = paginate(NewsPage.objects.child_of(self).live().defer('body'), request)
+        resolve_urls(news_pages, request)
+        context['news_posts'] = news_pages
+        context['pagination'] = news_pages
         return context
 
     class Meta:
@@ -125,7 +196,7 @@ class NewsPage(Page):
     body = RichTextField()
 
     search_fields = Page.search_fields + [
-        index.SearchField('intro'),
+        index.SearchField('intro', boost=1.5),
         index.SearchField('body'),
     ]
 
@@ -157,10 +228,14 @@ class AnnouncementIndexPage(Page):
     ]
 
     subpage_types = ['home.AnnouncementPage']
+    last_modified_from = 'children'
 
     def get_context(self, request):
         context = super().get_context(request)
-        context['announcement_posts'] = self.get_children().live().order_by('-first_published_at')
+        announcement_pages = paginate(AnnouncementPage.objects.child_of(self).live().defer('body'), request)
+        resolve_urls(announcement_pages, request)
+        context['announcement_posts'] = announcement_pages
+        context['pagination'] = announcement_pages
         return context
 
     class Meta:
@@ -178,7 +253,7 @@ class AnnouncementPage(Page):
     body = RichTextField()
 
     search_fields = Page.search_fields + [
-        index.SearchField('summary'),
+        index.SearchField('summary', boost=1.5),
         index.SearchField('body'),
     ]
 
@@ -215,9 +290,29 @@ class GalleryPage(Page):
     parent_page_types = ['wagtailcore.Page']
     subpage_types = []
 
+    template = 'home/gallery.html'
+
+    images_per_chunk = 24
+
+    def get_image_chunk(self, after=None):
+        """
+        One chunk of gallery images, ordered by ``(order, id)``, with the
+        renditions they display prefetched. Returns the images and the
+        cursor of the next chunk.
+        """
+        images = prefetch_rendition_sets(self.gallery_images.all(), 'image', 'gallery')
+        return paginate_by_position(images, after, self.images_per_chunk)
+
+    def get_next_chunk_url(self, cursor):
+        if cursor is None:
+            return None
+        return reverse('gallery_images', args=[self.pk]) + '?' + urlencode({'after': cursor})
+
     def get_context(self, request):
         context = super().get_context(request)
-        context['gallery_images'] = self.gallery_images.all()
+        gallery_images, cursor = self.get_image_chunk()
+        context['gallery_images'] = gallery_images
+        context['next_chunk_url'] = self.get_next_chunk_url(cursor)
         return context
 
     class Meta:
@@ -255,8 +350,131 @@ class GalleryImage(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['gallery_page', 'order', 'id'], name='gallery_image_position_idx'),
+        ]
         verbose_name = "Gallery Image"
         verbose_name_plural = "Gallery Images"
 
     def __str__(self):
         return self.title or f"Image from {self.gallery_page.title}"
+
+
+class ContentStatistics(models.Model):
+    """
+    Live content counters for the home page dashboard card.
+
+    There is a single row, kept up to date incrementally by the signal
+    handlers in ``apps.home.signals``; ``rebuild_content_statistics``
+    recomputes it from scratch.
+    """
+
+    news_pages = models.PositiveIntegerField(default=0)
+    news_published_today = models.PositiveIntegerField(default=0)
+    today = models.DateField(null=True, blank=True)
+    announcement_pages = models.PositiveIntegerField(default=0)
+    blog_pages = models.PositiveIntegerField(default=0)
+    gallery_images = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Content Statistics"
+        verbose_name_plural = "Content Statistics"
+
+    def __str__(self):
+        return "Content statistics"
+
+    @classmethod
+    def load(cls):
+        statistics, _ = cls.objects.get_or_create(pk=1)
+        return statistics
+
+    @property
+    def news_today(self):
+        if self.today != timezone.localdate():
+            return 0
+        return self.news_published_today
+
+
+class PageViewCount(models.Model):
+    """
+    Number of views of a page on one day. Rows are written in bulk by the
+    page view buffer in ``apps.home.page_views``.
+    """
+
+    page = models.ForeignKey(
+        'wagtailcore.Page',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Page View Count"
+        verbose_name_plural = "Page View Counts"
+        constraints = [
+            models.UniqueConstraint(fields=['page', 'date'], name='unique_page_view_count_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='page_view_count_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.page_id} on {self.date}: {self.views}"
+
+
+class AutocompletePrefix(models.Model):
+    """
+    Prefix of a word in the title or intro of a live page, for search
+    suggestions. Maintained by ``apps.home.autocomplete``.
+    """
+
+    prefix = models.CharField(max_length=20)
+    page = models.ForeignKey(
+        'wagtailcore.Page',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        verbose_name = "Autocomplete Prefix"
+        verbose_name_plural = "Autocomplete Prefixes"
+        constraints = [
+            models.UniqueConstraint(fields=['prefix', 'page'], name='unique_autocomplete_prefix_per_page'),
+        ]
+        indexes = [
+            models.Index(fields=['prefix', '-score', '-page'], name='autocomplete_prefix_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.prefix} -> {self.page_id}"
+
+
+class PendingSearchUpdate(models.Model):
+    """
+    An object whose search index entries are out of date. Written on save
+    and delete, applied in batches by ``apps.home.search_indexing``.
+    """
+
+    content_type = models.ForeignKey(
+        'contenttypes.ContentType',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    object_id = models.CharField(max_length=50)
+    queued_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Pending Search Update"
+        verbose_name_plural = "Pending Search Updates"
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_pending_search_update'),
+        ]
+        indexes = [
+            models.Index(fields=['queued_at'], name='pending_search_update_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id}"
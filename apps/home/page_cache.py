@@ -0,0 +1,126 @@
+"""
+Full-page response cache for pages served by Wagtail.
+
+Responses are stored under a key derived from the site, path, query string
+and the configured vary headers. Each entry remembers the page it was
+rendered from together with that page's version token; publishing,
+unpublishing, moving or deleting a page replaces the token of the page and
+of its ancestors, which makes every stored entry for them stale at once.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+
+from . import caching
+
+
+def is_enabled():
+    return getattr(settings, 'PAGE_CACHE_ENABLED', False)
+
+
+def get_response_cache():
+    return caching.get_cache('pages')
+
+
+def get_version_cache():
+    # Version tokens decide whether an entry is fresh, so they are always
+    # read from the shared tier.
+    return caching.get_cache('page_versions')
+
+
+def is_cacheable_request(request):
+    """
+    Only anonymous GET/HEAD requests are served from or stored in the cache.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    user = getattr(request, 'user', None)
+    return user is None or not user.is_authenticated
+
+
+def is_cacheable_response(response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    cache_control = response.get('Cache-Control', '')
+    return 'private' not in cache_control and 'no-store' not in cache_control
+
+
+def is_cacheable_page(page):
+    """
+    Pages of the home app are cached unless their class sets
+    ``page_cache_enabled = False`` or a view restriction (password, login
+    or group) applies to them.
+    """
+    return (
+        page._meta.app_label == 'home'
+        and getattr(page, 'page_cache_enabled', True)
+        and not page.get_view_restrictions().exists()
+    )
+
+
+def get_response_key(request):
+    parts = [
+        request.scheme,
+        request.get_host(),
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+    ]
+    for header in getattr(settings, 'PAGE_CACHE_VARY_HEADERS', ['Accept-Language']):
+        parts.append(request.headers.get(header, ''))
+    return hashlib.md5('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_page_version(page_id):
+    """
+    Return the current version token for a page, creating one if needed.
+    """
+    cache = get_version_cache()
+    version = cache.get(page_id)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(page_id, version, None):
+            version = cache.get(page_id, version)
+    return version
+
+
+def get_cached_response(request):
+    """
+    Return ``(page_id, response)`` for a fresh cached response, or None.
+    """
+    entry = get_response_cache().get(get_response_key(request))
+    if entry is None:
+        return None
+    page_id, version, response = entry
+    if get_version_cache().get(page_id) != version:
+        return None
+    return page_id, response
+
+
+def store_response(request, page_id, version, response):
+    get_response_cache().set(get_response_key(request), (page_id, version, response))
+
+
+def invalidate_pages(page_ids):
+    """
+    Give each page a fresh version token so that all of its cached
+    responses are treated as stale.
+    """
+    page_ids = set(page_ids)
+    if not page_ids:
+        return
+    get_version_cache().set_many({page_id: uuid.uuid4().hex for page_id in page_ids}, None)
+
+
+def invalidate_page(page, include_descendants=False):
+    """
+    Invalidate a page together with its ancestors, whose listings depend
+    on it. Descendants are included when their URLs change (page moves).
+    """
+    page_ids = set(page.get_ancestors().values_list('pk', flat=True))
+    if include_descendants:
+        page_ids.update(page.get_descendants(inclusive=True).values_list('pk', flat=True))
+    else:
+        page_ids.add(page.pk)
+    invalidate_pages(page_ids)
@@ -0,0 +1,222 @@
+"""
+Page view counting.
+
+Recording a view only increments an in-process counter under a lock; a
+background thread in each worker writes the accumulated counts to daily
+``PageViewCount`` rows every ``PAGE_VIEWS_FLUSH_INTERVAL`` seconds, or
+sooner once ``PAGE_VIEWS_FLUSH_THRESHOLD`` views are pending. Requests never
+wait for the database, and the database sees one short transaction per
+flush instead of one UPDATE per view.
+"""
+
+import atexit
+import datetime
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from . import caching
+
+
+logger = logging.getLogger(__name__)
+
+# Rows incremented per UPDATE at most. Each row takes its page id and date
+# in the WHERE clause and both again with its views in the CASE expression.
+WRITE_BATCH_SIZE = 500
+PARAMS_PER_ROW = 5
+
+
+def is_enabled():
+    return getattr(settings, 'PAGE_VIEWS_ENABLED', True)
+
+
+class PageViewBuffer:
+    """
+    Thread-safe buffer of ``(page_id, date) -> views`` increments.
+    """
+
+    def __init__(self, flush_interval=30, flush_threshold=1000):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._counts = Counter()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._today = None
+        self._today_checked_at = 0
+
+    def today(self):
+        # Resolving the local date is the most expensive part of recording
+        # a view, so it is re-checked at most once a second.
+        now = time.monotonic()
+        if now - self._today_checked_at >= 1:
+            self._today = timezone.localdate()
+            self._today_checked_at = now
+        return self._today
+
+    def record(self, page_id, date=None):
+        key = (page_id, date or self.today())
+        with self._lock:
+            self._counts[key] += 1
+            self._pending += 1
+            pending = self._pending
+        if self._thread is None:
+            self._start()
+        if pending >= self.flush_threshold:
+            self._wake.set()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='page-view-flusher', daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing page views failed')
+            finally:
+                close_old_connections()
+
+    def take(self):
+        """
+        Remove and return the buffered counts.
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._pending = 0
+        return counts
+
+    def flush(self):
+        counts = self.take()
+        if not counts:
+            return 0
+        try:
+            write_counts(counts)
+        except Exception:
+            # Keep the views for the next attempt rather than losing them.
+            with self._lock:
+                self._counts.update(counts)
+                self._pending += sum(counts.values())
+            raise
+        return sum(counts.values())
+
+
+def get_write_batch_size():
+    """
+    Rows per UPDATE that keep it within the database's parameter limit,
+    999 on SQLite.
+    """
+    max_params = connection.features.max_query_params
+    if max_params is None:
+        return WRITE_BATCH_SIZE
+    return max(1, min(WRITE_BATCH_SIZE, max_params // PARAMS_PER_ROW))
+
+
+def write_counts(counts):
+    """
+    Add ``{(page_id, date): views}`` to the daily rows: missing rows are
+    inserted in one statement, then the rows are incremented in place by
+    one UPDATE per ``get_write_batch_size()`` rows.
+    """
+    from wagtail.models import Page
+
+    from .models import PageViewCount
+
+    # Pages deleted since their views were recorded are dropped.
+    page_ids = set(Page.objects.filter(pk__in={page_id for page_id, _ in counts}).values_list('pk', flat=True))
+    counts = {key: views for key, views in counts.items() if key[0] in page_ids}
+    with transaction.atomic():
+        PageViewCount.objects.bulk_create(
+            [PageViewCount(page_id=page_id, date=date) for page_id, date in counts],
+            ignore_conflicts=True,
+        )
+        items = list(counts.items())
+        batch_size = get_write_batch_size()
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            rows = Q()
+            for (page_id, date), _ in batch:
+                rows |= Q(page_id=page_id, date=date)
+            PageViewCount.objects.filter(rows).update(views=F('views') + Case(
+                *[When(page_id=page_id, date=date, then=Value(views)) for (page_id, date), views in batch],
+                default=Value(0),
+            ))
+
+
+buffer = PageViewBuffer(
+    flush_interval=getattr(settings, 'PAGE_VIEWS_FLUSH_INTERVAL', 30),
+    flush_threshold=getattr(settings, 'PAGE_VIEWS_FLUSH_THRESHOLD', 1000),
+)
+
+
+def record(page_id):
+    if is_enabled():
+        buffer.record(page_id)
+
+
+def get_page_total(page_id, days=None):
+    """
+    Views of one page, over all time or the last ``days`` days.
+    """
+    return caching.get_cache('page_views').get_or_set(
+        f'page:{page_id}:{days}',
+        lambda: _sum_views(page_id=page_id, days=days),
+    )
+
+
+def get_site_total(days=None):
+    """
+    Views of all pages, over all time or the last ``days`` days.
+    """
+    return caching.get_cache('page_views').get_or_set(
+        f'site:{days}',
+        lambda: _sum_views(days=days),
+    )
+
+
+def get_most_viewed(days=7, limit=10):
+    """
+    ``(page_id, views)`` pairs of the most viewed pages in the last
+    ``days`` days.
+    """
+    from .models import PageViewCount
+
+    return caching.get_cache('page_views').get_or_set(
+        f'top:{days}:{limit}',
+        lambda: list(
+            PageViewCount.objects.filter(date__gte=_since(days))
+            .values('page_id')
+            .annotate(total=Sum('views'))
+            .order_by('-total')
+            .values_list('page_id', 'total')[:limit]
+        ),
+    )
+
+
+def _since(days):
+    return timezone.localdate() - datetime.timedelta(days=days - 1)
+
+
+def _sum_views(page_id=None, days=None):
+    from .models import PageViewCount
+
+    queryset = PageViewCount.objects.all()
+    if page_id is not None:
+        queryset = queryset.filter(page_id=page_id)
+    if days is not None:
+        queryset = queryset.filter(date__gte=_since(days))
+    return queryset.aggregate(total=Sum('views'))['total'] or 0
@@ -0,0 +1,168 @@
+"""
+Keyset (cursor) pagination for index page listings.
+
+Listings are ordered newest first on ``(first_published_at, id)``. A cursor
+names the last item of the previous page (``?after=``) or the first item of
+the next page (``?before=``), so every page is a bounded range scan on the
+ordering columns regardless of how deep into the archive it is. Pages that were made live
+without being published have no ``first_published_at``; they sort after
+all dated pages.
+
+Gallery images are chunked the same way on their ``(order, id)`` position.
+"""
+
+import calendar
+import datetime
+
+from django.db.models import F, Q
+from django.http import Http404
+
+
+DEFAULT_PAGE_SIZE = 12
+MAX_PAGE_SIZE = 50
+MAX_ID = 2 ** 63 - 1
+
+
+NEWEST_FIRST = (F('first_published_at').desc(nulls_last=True), '-pk')
+OLDEST_FIRST = (F('first_published_at').asc(nulls_first=True), 'pk')
+
+
+def encode_cursor(item):
+    published_at = item.first_published_at
+    if published_at is None:
+        return f'n-{item.pk}'
+    micros = calendar.timegm(published_at.utctimetuple()) * 10 ** 6 + published_at.microsecond
+    return f'{micros}-{item.pk}'
+
+
+def _parse_id(value):
+    # Values past a 64-bit column would only fail later, in the query.
+    number = int(value)
+    if number > MAX_ID:
+        raise ValueError(value)
+    return number
+
+
+def decode_cursor(value):
+    try:
+        micros, pk = value.split('-')
+        pk = _parse_id(pk)
+        if micros == 'n':
+            return None, pk
+        micros = int(micros)
+        published_at = datetime.datetime.fromtimestamp(
+            micros // 10 ** 6, tz=datetime.timezone.utc
+        ).replace(microsecond=micros % 10 ** 6)
+    except (ValueError, OverflowError, OSError):
+        raise Http404('Invalid cursor')
+    return published_at, pk
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        page_size = int(request.GET.get('per_page', default))
+    except ValueError:
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated listing.
+    """
+
+    def __init__(self, request, object_list, has_next, has_previous):
+        self.request = request
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _url(self, param, item):
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[param] = encode_cursor(item)
+        return f'{self.request.path}?{query.urlencode()}'
+
+    @property
+    def next_url(self):
+        if self.has_next and self.object_list:
+            return self._url('after', self.object_list[-1])
+        return None
+
+    @property
+    def previous_url(self):
+        if self.has_previous and self.object_list:
+            return self._url('before', self.object_list[0])
+        return None
+
+
+def paginate(queryset, request, page_size=DEFAULT_PAGE_SIZE, max_page_size=MAX_PAGE_SIZE):
+    """
+    Return the ``KeysetPage`` of ``queryset`` selected by the ``after`` or
+    ``before`` query parameter. Fetches one row beyond the page size to
+    find out whether another page follows.
+    """
+    page_size = get_page_size(request, page_size, max_page_size)
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+
+    if before:
+        published_at, pk = decode_cursor(before)
+        if published_at is None:
+            condition = Q(first_published_at__isnull=False) | Q(first_published_at__isnull=True, pk__gt=pk)
+        else:
+            condition = (
+                Q(first_published_at__gt=published_at)
+                | Q(first_published_at=published_at, pk__gt=pk)
+            )
+        items = list(queryset.filter(condition).order_by(*OLDEST_FIRST)[:page_size + 1])
+        has_previous = len(items) > page_size
+        items = items[:page_size]
+        items.reverse()
+        return KeysetPage(request, items, has_next=True, has_previous=has_previous)
+
+    if after:
+        published_at, pk = decode_cursor(after)
+        if published_at is None:
+            condition = Q(first_published_at__isnull=True, pk__lt=pk)
+        else:
+            condition = (
+                Q(first_published_at__lt=published_at)
+                | Q(first_published_at=published_at, pk__lt=pk)
+                | Q(first_published_at__isnull=True)
+            )
+        queryset = queryset.filter(condition)
+    items = list(queryset.order_by(*NEWEST_FIRST)[:page_size + 1])
+    has_next = len(items) > page_size
+    return KeysetPage(request, items[:page_size], has_next=has_next, has_previous=bool(after))
+
+
+def decode_position_cursor(value):
+    try:
+        order, pk = (_parse_id(part) for part in value.split('-'))
+    except (ValueError, OverflowError):
+        raise Http404('Invalid cursor')
+    return order, pk
+
+
+def paginate_by_position(queryset, after=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Keyset pagination over objects ordered by ``(order, id)``, such as
+    gallery images. Returns the items and the cursor of the next chunk, or
+    None when this is the last one.
+    """
+    if after:
+        order, pk = decode_position_cursor(after)
+        queryset = queryset.filter(Q(order__gt=order) | Q(order=order, pk__gt=pk))
+    items = list(queryset.order_by('order', 'pk')[:page_size + 1])
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, f'{items[-1].order}-{items[-1].pk}'
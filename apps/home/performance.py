@@ -0,0 +1,200 @@
+"""
+Per-request performance metrics.
+
+``PerformanceMiddleware`` gives every request a ``RequestMetrics`` that
+collects the number and duration of SQL queries (through a database
+execute wrapper), cache namespace hits and misses (reported by
+``apps.home.caching``), the time spent in the view and the time spent
+rendering its template response. When the request is done the metrics are:
+
+* logged on the ``apps.home.performance`` logger, at INFO, or at WARNING
+  when the request was slow or went over its query budget; the figures are
+  also attached to the record as ``extra`` fields for structured handlers;
+* sent back as a ``Server-Timing`` header to staff users and to requests
+  carrying a token from ``make_token()`` in ``X-Server-Timing-Token``.
+
+Query budgets (``PERFORMANCE_QUERY_BUDGETS``) are keyed by page model label
+for Wagtail pages (``home.NewsIndexPage``) and by URL name or view path for
+other views. With ``PERFORMANCE_METRICS_ENABLED = False`` the middleware
+removes itself at startup.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'apps.home.performance.server-timing'
+TOKEN_HEADER = 'HTTP_X_SERVER_TIMING_TOKEN'
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+def is_enabled():
+    return getattr(settings, 'PERFORMANCE_METRICS_ENABLED', True)
+
+
+class RequestMetrics:
+    """
+    Figures of one request; durations are in seconds. Counters are updated
+    under a lock, as the query threads of ``apps.home.concurrency`` update
+    them alongside the request's thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.view_name = None
+        self.view_started = None
+        self.view_time = None
+        self.template_started = None
+        self.template_time = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # Execute wrapper installed on every database connection.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.db_time += duration
+                self.db_queries += 1
+
+    def add_cache(self, name, amount=1):
+        with self._lock:
+            if name == 'hits':
+                self.cache_hits += amount
+            elif name == 'misses':
+                self.cache_misses += amount
+
+    def as_dict(self):
+        def ms(value):
+            return None if value is None else round(value * 1000, 2)
+
+        return {
+            'view': self.view_name,
+            'total_ms': ms(self.total),
+            'db_queries': self.db_queries,
+            'db_ms': ms(self.db_time),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'view_ms': ms(self.view_time),
+            'template_ms': ms(self.template_time),
+        }
+
+
+def start():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def get_current():
+    return _current.get()
+
+
+def record_cache(name, amount=1):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_cache(name, amount)
+
+
+def set_view_name(name):
+    """
+    Name the current request's view for budgets and logs, e.g. with the
+    label of the Wagtail page being served.
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.view_name = name
+
+
+def get_query_budget(metrics, resolver_match=None):
+    budgets = getattr(settings, 'PERFORMANCE_QUERY_BUDGETS', {})
+    names = [metrics.view_name]
+    if resolver_match is not None:
+        names.append(resolver_match._func_path)
+    for name in names:
+        if name in budgets:
+            return budgets[name]
+    return None
+
+
+def make_token():
+    """
+    A token that makes any request receive the ``Server-Timing`` header
+    for ``PERFORMANCE_TOKEN_MAX_AGE`` seconds.
+    """
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('server-timing')
+
+
+def has_valid_token(request):
+    token = request.META.get(TOKEN_HEADER)
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=getattr(settings, 'PERFORMANCE_TOKEN_MAX_AGE', 86400)
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def wants_server_timing(request):
+    if has_valid_token(request):
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+def format_server_timing(metrics):
+    entries = [
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries"',
+        f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+    ]
+    if metrics.view_time is not None:
+        entries.append(f'view;dur={metrics.view_time * 1000:.1f}')
+    if metrics.template_time is not None:
+        entries.append(f'template;dur={metrics.template_time * 1000:.1f}')
+    entries.append(f'total;dur={metrics.total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def log(request, response, metrics):
+    fields = metrics.as_dict()
+    fields.update(method=request.method, path=request.path, status=response.status_code)
+    budget = get_query_budget(metrics, getattr(request, 'resolver_match', None))
+    over_budget = budget is not None and metrics.db_queries > budget
+    slow = metrics.total * 1000 > getattr(settings, 'PERFORMANCE_SLOW_REQUEST_MS', 1000)
+    level = logging.WARNING if over_budget or slow else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    message = (
+        f'{request.method} {request.path} {response.status_code} view={metrics.view_name} '
+        f'total={fields["total_ms"]}ms db={metrics.db_queries}/{fields["db_ms"]}ms '
+        f'cache={metrics.cache_hits}/{metrics.cache_misses}'
+    )
+    if metrics.template_time is not None:
+        message += f' template={fields["template_ms"]}ms'
+    if over_budget:
+        message += f' (query budget {budget} exceeded)'
+    elif slow:
+        message += ' (slow request)'
+    fields['query_budget'] = budget
+    logger.log(level, message, extra={'performance': fields})
@@ -0,0 +1,77 @@
+"""
+Normalization of Persian text for search.
+
+The same word reaches the portal in several spellings: with the Arabic
+``ي``/``ك`` instead of the Persian ``ی``/``ک``, with or without a zero-width
+non-joiner (``می‌روم`` / ``میروم``), with diacritics or tatweel, and with
+Persian, Arabic or Latin digits. ``normalize`` folds all of them into one
+form; it is applied to indexed content and to queries alike.
+"""
+
+import re
+import unicodedata
+
+
+ZWNJ = '\u200c'
+
+CHARACTER_MAP = {
+    'ي': 'ی',  # Arabic yeh
+    'ى': 'ی',  # alef maksura
+    'ئ': 'ی',
+    'ك': 'ک',  # Arabic kaf
+    'ة': 'ه',
+    'ۀ': 'ه',
+    'أ': 'ا',
+    'إ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+}
+CHARACTER_MAP.update({chr(0x06F0 + i): str(i) for i in range(10)})  # Persian digits
+CHARACTER_MAP.update({chr(0x0660 + i): str(i) for i in range(10)})  # Arabic-Indic digits
+
+# Diacritics (harakat, superscript alef, Quranic marks), tatweel and the
+# invisible joiners and direction marks are dropped.
+REMOVED_CHARACTERS = (
+    [chr(code) for code in range(0x064B, 0x0660)]
+    + [chr(code) for code in range(0x06D6, 0x06EE)]
+    + ['\u0670', '\u0640', ZWNJ, '\u200d', '\u200e', '\u200f', '\u00ad']
+)
+
+REPLACEMENTS = {
+    **CHARACTER_MAP,
+    **{character: '' for character in REMOVED_CHARACTERS},
+}
+# Scanning with a character class only calls back on the characters that
+# change; on mostly clean text this is about twice as fast as str.translate().
+REPLACEMENT_RE = re.compile('[%s]' % ''.join(re.escape(character) for character in REPLACEMENTS))
+
+WHITESPACE_RE = re.compile(r'\s+')
+JOINED_WORD_RE = re.compile(r'\S*\u200c\S*')
+
+
+def _replace(match):
+    return REPLACEMENTS[match.group(0)]
+
+
+def _expand_joined_word(match):
+    word = match.group(0)
+    return f"{word.replace(ZWNJ, '')} {word.replace(ZWNJ, ' ')}"
+
+
+def normalize(text, expand_joins=False):
+    """
+    Return ``text`` with Persian spelling variants folded into one form.
+
+    Words written with a zero-width non-joiner are folded into one word.
+    With ``expand_joins``, used for indexed content, their parts are kept
+    as well, so that ``بین‌المللی`` is found by ``بینالمللی``,
+    ``بین‌المللی`` and ``بین المللی``.
+    """
+    if not text:
+        return ''
+    if expand_joins and ZWNJ in text:
+        text = JOINED_WORD_RE.sub(_expand_joined_word, text)
+    # NFKC maps Arabic presentation forms back to the base letters.
+    text = unicodedata.normalize('NFKC', text)
+    text = REPLACEMENT_RE.sub(_replace, text).casefold()
+    return WHITESPACE_RE.sub(' ', text).strip()
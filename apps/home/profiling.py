@@ -0,0 +1,215 @@
+"""
+On-demand sampling profiler for individual requests.
+
+``ProfilingMiddleware`` profiles a request when a staff user adds
+``?_profile`` to the URL, when the request carries a token from
+``make_token()`` in ``X-Profile-Token``, or at random for a
+``PROFILING_SAMPLE_RATE`` fraction of all requests. A background thread then
+samples the request thread's stack every ``PROFILING_INTERVAL`` seconds of
+wall-clock time, so time spent waiting on the database or the cache shows up
+as well as Python code.
+
+Each profile is written to ``PROFILING_DIR`` as a ``.collapsed`` file, one
+``frame;frame;frame count`` line per distinct stack (the input format of
+flamegraph.pl and speedscope), next to a ``.json`` file with the request
+details. Only the newest ``PROFILING_MAX_PROFILES`` are kept. The
+``request_profiles`` command lists and summarizes them.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.text import slugify
+
+from . import performance
+
+
+TOKEN_SALT = 'apps.home.profiling'
+TOKEN_HEADER = 'HTTP_X_PROFILE_TOKEN'
+QUERY_FLAG = '_profile'
+
+
+def is_enabled():
+    return getattr(settings, 'PROFILING_ENABLED', True)
+
+
+def get_directory():
+    return Path(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+def make_token():
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def has_valid_token(request):
+    token = request.META.get(TOKEN_HEADER)
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def get_trigger(request):
+    """
+    Why ``request`` should be profiled, or None.
+    """
+    if has_valid_token(request):
+        return 'token'
+    if QUERY_FLAG in request.GET:
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return 'staff'
+    rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+    if rate and random.random() < rate:
+        return 'sample'
+    return None
+
+
+def describe_frame(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in sorted({p for p in sys.path if p}, key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f'{name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class Sampler:
+    """
+    Samples the stack of the thread ``thread_id`` from a background thread
+    until stopped.
+    """
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _label(self, frame):
+        # Frames are labelled once per code object and line of definition.
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = describe_frame(frame)
+        return label
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+
+def start():
+    """
+    Start sampling the calling thread.
+    """
+    sampler = Sampler(threading.get_ident(), getattr(settings, 'PROFILING_INTERVAL', 0.001))
+    sampler.start()
+    return sampler
+
+
+def save(request, response, sampler, trigger):
+    """
+    Write the profile of ``request`` and drop the oldest profiles over the
+    limit. Returns the profile's name.
+    """
+    directory = get_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    now = timezone.now()
+    slug = slugify(request.path.replace('/', ' ')) or 'root'
+    name = f'{now:%Y%m%d-%H%M%S-%f}-{slug[:60]}'
+    with open(directory / f'{name}.collapsed', 'w', encoding='utf-8') as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(f'{";".join(stack)} {count}\n')
+    metadata = {
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'created_at': now.isoformat(),
+        'duration_ms': round(sampler.duration * 1000, 2),
+        'samples': sum(sampler.stacks.values()),
+        'interval_ms': sampler.interval * 1000,
+        'trigger': trigger,
+    }
+    metrics = performance.get_current()
+    if metrics is not None:
+        metadata.update(view=metrics.view_name, queries=metrics.db_queries)
+    with open(directory / f'{name}.json', 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    rotate(directory, getattr(settings, 'PROFILING_MAX_PROFILES', 200))
+    return name
+
+
+def rotate(directory, keep):
+    names = sorted(path.stem for path in directory.glob('*.json'))
+    for name in names[:-keep] if keep else names:
+        for suffix in ('.json', '.collapsed'):
+            (directory / f'{name}{suffix}').unlink(missing_ok=True)
+
+
+def list_profiles():
+    """
+    ``[(name, metadata)]`` of the stored profiles, oldest first.
+    """
+    directory = get_directory()
+    profiles = []
+    for path in sorted(directory.glob('*.json')):
+        with open(path, encoding='utf-8') as f:
+            profiles.append((path.stem, json.load(f)))
+    return profiles
+
+
+def load_stacks(name):
+    stacks = Counter()
+    with open(get_directory() / f'{name}.collapsed', encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            stacks[tuple(stack.split(';'))] += int(count)
+    return stacks
+
+
+def summarize(stacks):
+    """
+    ``(own, total)`` sample counts per frame: ``own`` counts the samples in
+    which the frame was running, ``total`` the samples in which it was
+    anywhere on the stack.
+    """
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        for frame in set(stack):
+            total[frame] += count
+    return own, total
@@ -0,0 +1,237 @@
+"""
+Ahead-of-time generation of image renditions.
+
+Templates ask for renditions with ``{% image %}``; if a rendition does not
+exist yet Wagtail resizes the original inside the request. The functions
+here generate every rendition the project declares in
+``RENDITION_FILTER_SPECS`` and ``RENDITION_SETS`` beforehand: in a background thread after an
+image upload or gallery publish, and in bulk across a process pool from the
+``generate_renditions`` management command. Generation is idempotent;
+renditions that already exist are skipped.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Prefetch
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter, SourceImageIOError
+
+
+logger = logging.getLogger(__name__)
+
+# Uploads and publishes queue their renditions here so that the editor's
+# request returns without waiting for Pillow.
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='renditions')
+
+
+def get_filter_specs():
+    """
+    Every filter spec the project declares: ``RENDITION_FILTER_SPECS`` plus
+    the specs of all ``RENDITION_SETS``.
+    """
+    specs = list(getattr(settings, 'RENDITION_FILTER_SPECS', []))
+    specs.extend(get_rendition_set_filter_specs())
+    return list(dict.fromkeys(specs))
+
+
+def generate_for_images(image_ids, filter_specs=None):
+    """
+    Create the missing renditions of the given images and return
+    ``(created, skipped, failed)`` counts.
+    """
+    filter_specs = filter_specs or get_filter_specs()
+    filters = [Filter(spec) for spec in filter_specs]
+    created = skipped = failed = 0
+    images = get_image_model().objects.filter(pk__in=image_ids).prefetch_renditions(*filter_specs)
+    for image in images:
+        missing = [f.spec for f in filters if f not in image.find_existing_renditions(*filters)]
+        skipped += len(filters) - len(missing)
+        if not missing:
+            continue
+        try:
+            image.get_renditions(*missing)
+        except (SourceImageIOError, OSError):
+            logger.warning('Could not generate renditions for image %s', image.pk, exc_info=True)
+            failed += len(missing)
+        else:
+            created += len(missing)
+    return created, skipped, failed
+
+
+def _generate_in_background(image_ids):
+    try:
+        generate_for_images(image_ids)
+    except Exception:
+        logger.exception('Generating renditions failed')
+    finally:
+        close_old_connections()
+
+
+def schedule(image_ids):
+    """
+    Generate renditions for ``image_ids`` in the background once the
+    current transaction has committed.
+    """
+    image_ids = [image_id for image_id in image_ids if image_id is not None]
+    if image_ids and getattr(settings, 'RENDITION_PREGENERATION_ENABLED', True):
+        transaction.on_commit(lambda: _background.submit(_generate_in_background, image_ids))
+
+
+def _generate_chunk(image_ids, filter_specs):
+    try:
+        return generate_for_images(image_ids, filter_specs)
+    finally:
+        close_old_connections()
+
+
+def generate_in_pool(image_ids, filter_specs=None, workers=None, chunk_size=20, progress=None):
+    """
+    Fan ``image_ids`` out over a pool of worker processes in chunks.
+    Calls ``progress(done, total, counts)`` after each chunk and returns the
+    summed ``(created, skipped, failed)`` counts.
+    """
+    filter_specs = filter_specs or get_filter_specs()
+    image_ids = list(image_ids)
+    chunks = [image_ids[i:i + chunk_size] for i in range(0, len(image_ids), chunk_size)]
+    totals = [0, 0, 0]
+    done = 0
+
+    # Forked workers must not share the parent's database connections.
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(_generate_chunk, chunk, filter_specs): len(chunk) for chunk in chunks}
+        for future in as_completed(futures):
+            totals = [total + count for total, count in zip(totals, future.result())]
+            done += futures[future]
+            if progress:
+                progress(done, len(image_ids), totals)
+    return tuple(totals)
+
+
+FORMAT_MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+}
+
+
+class RenditionSet:
+    """
+    A named group of renditions (several widths in several formats) used
+    to emit responsive ``<picture>`` markup. Configured in ``RENDITION_SETS``:
+
+        'gallery': {
+            'widths': [320, 500, 800, 1200],
+            'formats': ['avif', 'webp', 'original'],
+            'default_width': 500,
+            'sizes': '(max-width: 576px) 100vw, 33vw',
+        }
+
+    The last format is used for the ``<img>`` fallback; ``original`` keeps
+    the format of the uploaded file.
+    """
+
+    def __init__(self, name, widths, formats, default_width=None, sizes='100vw'):
+        self.name = name
+        self.widths = sorted(widths)
+        self.formats = list(formats)
+        self.default_width = default_width or self.widths[0]
+        self.sizes = sizes
+
+    @staticmethod
+    def get_filter_spec(width, image_format):
+        if image_format == 'original':
+            return f'width-{width}'
+        return f'width-{width}|format-{image_format}'
+
+    @property
+    def filter_specs(self):
+        return [
+            self.get_filter_spec(width, image_format)
+            for image_format in self.formats
+            for width in self.widths
+        ]
+
+    def get_srcset(self, renditions, image_format):
+        # Wagtail does not upscale, so widths beyond the original collapse
+        # into the same rendition; list each actual width once.
+        by_width = {}
+        for width in self.widths:
+            rendition = renditions[self.get_filter_spec(width, image_format)]
+            by_width.setdefault(rendition.width, rendition)
+        return ', '.join(f'{rendition.url} {width}w' for width, rendition in sorted(by_width.items()))
+
+    def render(self, image, alt='', **attrs):
+        """
+        Return ``<picture>`` markup for ``image``. Renditions that were
+        prefetched are used as is; missing ones are created in one pass.
+        """
+        renditions = image.get_renditions(*self.filter_specs)
+        fallback_format = self.formats[-1]
+        fallback = renditions[self.get_filter_spec(self.default_width, fallback_format)]
+
+        sources = format_html_join(
+            '',
+            '<source type="{}" srcset="{}" sizes="{}">',
+            (
+                (FORMAT_MIME_TYPES[image_format], self.get_srcset(renditions, image_format), self.sizes)
+                for image_format in self.formats[:-1]
+            ),
+        )
+        attrs.setdefault('loading', 'lazy')
+        attrs.setdefault('decoding', 'async')
+        extra_attrs = flatatt(attrs)
+        return format_html(
+            '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"{}></picture>',
+            sources,
+            fallback.url,
+            self.get_srcset(renditions, fallback_format),
+            self.sizes,
+            fallback.width,
+            fallback.height,
+            alt,
+            extra_attrs,
+        )
+
+
+def get_rendition_set(name):
+    config = getattr(settings, 'RENDITION_SETS', {})[name]
+    return RenditionSet(
+        name,
+        widths=config['widths'],
+        formats=config.get('formats', ['original']),
+        default_width=config.get('default_width'),
+        sizes=config.get('sizes', '100vw'),
+    )
+
+
+def get_rendition_set_filter_specs(*names):
+    names = names or getattr(settings, 'RENDITION_SETS', {}).keys()
+    specs = []
+    for name in names:
+        specs.extend(get_rendition_set(name).filter_specs)
+    return specs
+
+
+def prefetch_rendition_sets(queryset, image_field, *names):
+    """
+    Prefetch the renditions of the named sets for ``image_field`` of every
+    object in ``queryset``, so rendering a whole gallery costs one rendition
+    query instead of one per image.
+    """
+    Rendition = get_image_model().get_rendition_model()
+    return queryset.select_related(image_field).prefetch_related(
+        Prefetch(
+            f'{image_field}__renditions',
+            queryset=Rendition.objects.filter(filter_spec__in=get_rendition_set_filter_specs(*names)),
+            to_attr='prefetched_renditions',
+        )
+    )
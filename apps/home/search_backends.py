@@ -0,0 +1,248 @@
+"""
+Search backend for the portal.
+
+Wraps Wagtail's database search backend and normalizes Persian text (see
+``apps.home.persian``) both when content is indexed and when a query is
+compiled, so that spelling variants find each other. The index itself is
+the database's own inverted index:
+
+- PostgreSQL: ``tsvector`` columns with a GIN index, ranked with
+  ``ts_rank`` using field boosts as ``A``-``D`` weights.
+- SQLite: the FTS5 table, ranked with ``bm25()`` using ``COLUMN_WEIGHTS``.
+
+Other databases use Wagtail's backends unchanged. Configure it with::
+
+    WAGTAILSEARCH_BACKENDS = {
+        'default': {
+            'BACKEND': 'apps.home.search_backends',
+            'SEARCH_CONFIG': 'simple',
+            'COLUMN_WEIGHTS': {'title': 10.0, 'body': 1.0},
+        }
+    }
+
+Content indexed before switching backends keeps its old spelling until
+``python manage.py update_index`` has been run.
+"""
+
+import copy
+
+from django.db.models import Case, Exists, FloatField, Func, IntegerField, OuterRef, Value, When
+from django.db.models.functions import Cast
+from wagtail.search.backends import database
+from wagtail.search.backends.database.postgres import postgres
+from wagtail.search.backends.database.sqlite import sqlite
+from wagtail.search.backends.database.sqlite.query import MatchExpression, normalize as normalize_query_tree
+from wagtail.search.models import SQLiteFTSIndexEntry
+from wagtail.search.query import MatchAll, Not
+from wagtail.search.utils import get_content_type_pk, get_descendants_content_types_pks
+
+from .persian import normalize
+
+
+def normalize_query(query):
+    """
+    Return a copy of a search query tree with every query string normalized.
+    """
+    query = copy.copy(query)
+    if hasattr(query, 'query_string'):
+        # A double quote would end an FTS5 string early.
+        query.query_string = normalize(query.query_string.replace('"', ' '))
+    if hasattr(query, 'subquery'):
+        query.subquery = normalize_query(query.subquery)
+    if hasattr(query, 'subqueries'):
+        query.subqueries = [normalize_query(subquery) for subquery in query.subqueries]
+    return query
+
+
+class PersianQueryCompilerMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.query = normalize_query(self.query)
+
+
+class PersianObjectIndexerMixin:
+    def prepare_value(self, value):
+        return normalize(super().prepare_value(value), expand_joins=True)
+
+
+class PersianIndexMixin:
+    """
+    Index that builds its entries with ``indexer_class``; otherwise the same
+    as Wagtail's ``Index.add_items``.
+    """
+
+    indexer_class = None
+
+    def add_items(self, model, objs):
+        if not model.get_search_fields():
+            return
+        indexers = [self.indexer_class(obj, self.backend) for obj in objs]
+        if indexers:
+            content_type_pk = get_content_type_pk(model)
+            if getattr(self, '_enable_upsert', False):
+                self.add_items_upsert(content_type_pk, indexers)
+            else:
+                self.add_items_update_then_create(content_type_pk, indexers)
+
+
+# PostgreSQL
+
+class PersianPostgresObjectIndexer(PersianObjectIndexerMixin, postgres.ObjectIndexer):
+    pass
+
+
+class PersianPostgresIndex(PersianIndexMixin, postgres.Index):
+    indexer_class = PersianPostgresObjectIndexer
+
+
+class PersianPostgresSearchQueryCompiler(PersianQueryCompilerMixin, postgres.PostgresSearchQueryCompiler):
+    pass
+
+
+class PersianPostgresAutocompleteQueryCompiler(PersianQueryCompilerMixin, postgres.PostgresAutocompleteQueryCompiler):
+    pass
+
+
+class PersianPostgresSearchBackend(postgres.PostgresSearchBackend):
+    query_compiler_class = PersianPostgresSearchQueryCompiler
+    autocomplete_query_compiler_class = PersianPostgresAutocompleteQueryCompiler
+
+    def __init__(self, params):
+        # Neither stemming nor stop words of PostgreSQL's dictionaries suit
+        # Persian; match on the normalized words themselves.
+        params.setdefault('SEARCH_CONFIG', 'simple')
+        super().__init__(params)
+
+    def get_index_for_model(self, model, db_alias=None):
+        return PersianPostgresIndex(self, db_alias)
+
+
+# SQLite
+
+class WeightedBM25(Func):
+    """
+    ``bm25()`` of the FTS5 table with a weight per column. FTS5 returns
+    more relevant rows as more negative scores.
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, weights):
+        super().__init__()
+        self.weights = weights
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # The FTS5 table was created with columns (autocomplete, body, title).
+        weights = [self.weights.get(column, 1.0) for column in ('autocomplete', 'body', 'title')]
+        return 'bm25(wagtailsearch_indexentry_fts, %s, %s, %s)', weights
+
+
+class PersianSQLiteObjectIndexer(PersianObjectIndexerMixin, sqlite.ObjectIndexer):
+    pass
+
+
+class PersianSQLiteIndex(PersianIndexMixin, sqlite.Index):
+    indexer_class = PersianSQLiteObjectIndexer
+
+
+class PersianSQLiteSearchQueryCompiler(PersianQueryCompilerMixin, sqlite.SQLiteSearchQueryCompiler):
+    """
+    Ranks matches by weighted ``bm25()`` inside the FTS query and keeps that
+    order in the results, which Wagtail's compiler loses when it filters the
+    queryset by the matching ids.
+    """
+
+    column_weights = {'title': 10.0, 'body': 1.0}
+
+    def get_ranked_object_ids(self, config):
+        """
+        Ids (as stored in the index, i.e. strings) of the objects of the
+        queryset that match the query, most relevant first.
+        """
+        search_query = self.build_search_query(normalize_query_tree(self.query), config=config)
+        # Checking each match against the queryset by primary key is much
+        # cheaper than materializing the ids of a large queryset.
+        pk_field = self.queryset.model._meta.pk
+        in_queryset = self.queryset.filter(
+            pk=Cast(OuterRef('index_entry__object_id'), output_field=pk_field)
+        )
+        return (
+            SQLiteFTSIndexEntry.objects
+            .filter(MatchExpression(self.fields or self.FTS_TABLE_FIELDS, search_query))
+            .filter(
+                Exists(in_queryset),
+                index_entry__content_type__in=get_descendants_content_types_pks(self.queryset.model),
+            )
+            .annotate(rank=WeightedBM25(self.column_weights))
+            .order_by('rank')
+            .values_list('index_entry__object_id', 'rank')
+        )
+
+    def search(self, config, start, stop, score_field=None):
+        query = normalize_query_tree(self.query)
+        if not self.order_by_relevance or isinstance(query, (MatchAll, Not)):
+            return super().search(config, start, stop, score_field=score_field)
+
+        ranked = list(self.get_ranked_object_ids(config)[start:stop])
+        pk_field = self.queryset.model._meta.pk
+        pks = [pk_field.to_python(object_id) for object_id, rank in ranked]
+        queryset = self.queryset.filter(pk__in=pks)
+        if not pks:
+            return queryset
+        queryset = queryset.order_by(
+            Case(*[When(pk=pk, then=Value(position)) for position, pk in enumerate(pks)], output_field=IntegerField())
+        )
+        if score_field is not None:
+            queryset = queryset.annotate(**{score_field: Case(
+                *[When(pk=pk, then=Value(-rank)) for pk, (object_id, rank) in zip(pks, ranked)],
+                output_field=FloatField(),
+            )})
+        return queryset
+
+    def count(self, config):
+        query = normalize_query_tree(self.query)
+        if not self.order_by_relevance or isinstance(query, (MatchAll, Not)):
+            return super().search(config, None, None).count()
+        return self.get_ranked_object_ids(config).count()
+
+
+class PersianSQLiteAutocompleteQueryCompiler(PersianQueryCompilerMixin, sqlite.SQLiteAutocompleteQueryCompiler):
+    pass
+
+
+class PersianSQLiteSearchResults(sqlite.SQLiteSearchResults):
+    def __init__(self, backend, query_compiler, *args, **kwargs):
+        super().__init__(backend, query_compiler, *args, **kwargs)
+        query_compiler.column_weights = backend.column_weights
+
+    def _do_count(self):
+        compiler = self.query_compiler
+        if hasattr(compiler, 'count'):
+            return compiler.count(compiler.get_config(self.backend))
+        return super()._do_count()
+
+
+class PersianSQLiteSearchBackend(sqlite.SQLiteSearchBackend):
+    query_compiler_class = PersianSQLiteSearchQueryCompiler
+    autocomplete_query_compiler_class = PersianSQLiteAutocompleteQueryCompiler
+    results_class = PersianSQLiteSearchResults
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.column_weights = params.get('COLUMN_WEIGHTS', PersianSQLiteSearchQueryCompiler.column_weights)
+
+    def get_index_for_model(self, model, db_alias=None):
+        return PersianSQLiteIndex(self, db_alias)
+
+
+def SearchBackend(params):
+    """
+    Return the Persian-aware backend for the 'default' database, or
+    Wagtail's own backend where there is none.
+    """
+    backend = database.SearchBackend(params)
+    if isinstance(backend, postgres.PostgresSearchBackend):
+        return PersianPostgresSearchBackend(params)
+    if isinstance(backend, sqlite.SQLiteSearchBackend):
+        return PersianSQLiteSearchBackend(params)
+    return backend
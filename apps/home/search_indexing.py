@@ -0,0 +1,243 @@
+"""
+Deferred and bulk search indexing.
+
+Wagtail updates the search index inside ``post_save``, i.e. inside the
+editor's request, one object at a time. For the page models of this app
+saves and deletes only record a ``PendingSearchUpdate`` row instead: one
+row per object, so repeated saves of the same page before it is indexed
+coalesce into a single update. A background thread in each worker applies
+the queue in batches ``SEARCH_INDEX_QUEUE_DELAY`` seconds after a change,
+and ``process_search_index_queue`` drains whatever a stopped worker left
+behind. Whether an update adds or removes an object is decided when it is
+applied, from the object's state at that time.
+
+``rebuild_in_pool`` reindexes whole models in chunks across a process pool
+for the ``rebuild_search_index`` command.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from wagtail.search.backends import get_search_backend, get_search_backends
+from wagtail.search.index import class_is_indexed, get_indexed_models
+from wagtail.search.signal_handlers import post_delete_signal_handler, post_save_signal_handler
+
+from .models import PendingSearchUpdate
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_enabled():
+    return getattr(settings, 'SEARCH_INDEX_QUEUE_ENABLED', True)
+
+
+def get_queued_models():
+    """
+    Indexed models of this app whose updates go through the queue.
+    """
+    return [model for model in apps.get_app_config('home').get_models() if class_is_indexed(model)]
+
+
+def enqueue(model, object_ids):
+    """
+    Queue index updates for ``object_ids`` of ``model``. Objects that are
+    already queued move to the back of the queue.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    now = timezone.now()
+    PendingSearchUpdate.objects.bulk_create(
+        [
+            PendingSearchUpdate(content_type=content_type, object_id=str(object_id), queued_at=now)
+            for object_id in object_ids
+        ],
+        update_conflicts=True,
+        unique_fields=['content_type', 'object_id'],
+        update_fields=['queued_at'],
+    )
+    transaction.on_commit(worker.notify)
+
+
+def enqueue_instance(sender, instance, **kwargs):
+    enqueue(type(instance), [instance.pk])
+
+
+def register_signal_handlers():
+    """
+    Route the index updates of the queued models through the queue instead
+    of Wagtail's inline signal handlers.
+    """
+    for model in get_queued_models():
+        post_save.disconnect(post_save_signal_handler, sender=model)
+        post_delete.disconnect(post_delete_signal_handler, sender=model)
+        post_save.connect(enqueue_instance, sender=model)
+        post_delete.connect(enqueue_instance, sender=model)
+
+
+def update_objects(model, object_ids):
+    """
+    Bring the index entries of ``object_ids`` of ``model`` up to date:
+    index the objects that exist and remove the ones that are gone.
+    """
+    objects = list(model.get_indexed_objects().filter(pk__in=object_ids))
+    found = {str(obj.pk) for obj in objects}
+    missing = [object_id for object_id in object_ids if object_id not in found]
+    for backend in get_search_backends(with_auto_update=True):
+        if objects:
+            backend.add_bulk(model, objects)
+        for object_id in missing:
+            backend.delete(model(pk=object_id))
+
+
+def process_queue(batch_size=None):
+    """
+    Apply up to ``batch_size`` of the oldest queued updates and return how
+    many were applied.
+    """
+    batch_size = batch_size or getattr(settings, 'SEARCH_INDEX_QUEUE_BATCH_SIZE', 200)
+    updates = list(PendingSearchUpdate.objects.order_by('queued_at')[:batch_size])
+    if not updates:
+        return 0
+
+    object_ids = defaultdict(list)
+    for update in updates:
+        object_ids[update.content_type_id].append(update.object_id)
+    for content_type_id, ids in object_ids.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is not None:
+            update_objects(model, ids)
+
+    # Rows queued again since they were read, even by a transaction that
+    # started before this batch, stay for the next one.
+    applied = Q()
+    for update in updates:
+        applied |= Q(pk=update.pk, queued_at=update.queued_at)
+    PendingSearchUpdate.objects.filter(applied).delete()
+    return len(updates)
+
+
+class QueueWorker:
+    """
+    Background thread that drains the queue a short delay after it is
+    notified, so that a burst of saves is indexed in one batch.
+    """
+
+    def __init__(self, delay=2, poll_interval=60):
+        self.delay = delay
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def notify(self):
+        if self._thread is None:
+            self._start()
+        self._wake.set()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='search-indexer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            # Let the rest of a burst of saves join the batch.
+            time.sleep(self.delay)
+            try:
+                while process_queue():
+                    pass
+            except Exception:
+                logger.exception('Applying queued search index updates failed')
+            finally:
+                close_old_connections()
+
+
+worker = QueueWorker(delay=getattr(settings, 'SEARCH_INDEX_QUEUE_DELAY', 2))
+
+
+def get_worker_count(workers=None):
+    """
+    Worker processes for ``rebuild_in_pool``: ``workers``, by default one
+    per CPU, but always one on SQLite, which takes one writer at a time and
+    fails the others with "database is locked".
+    """
+    if connections['default'].vendor == 'sqlite':
+        return 1
+    return workers or os.cpu_count()
+
+
+def _index_objects(backend_name, model_label, object_ids):
+    model = apps.get_model(model_label)
+    objects = list(model.get_indexed_objects().filter(pk__in=object_ids))
+    get_search_backend(backend_name).add_bulk(model, objects)
+    return len(objects)
+
+
+def _index_chunk(backend_name, model_label, object_ids):
+    try:
+        return _index_objects(backend_name, model_label, object_ids)
+    finally:
+        close_old_connections()
+
+
+def rebuild_in_pool(backend_name='default', models=None, chunk_size=1000, workers=None, progress=None):
+    """
+    Reindex every object of ``models`` (default: all indexed models) in
+    chunks across a pool of worker processes, then drop the entries of
+    objects that no longer exist. With one worker (see
+    ``get_worker_count``) the chunks are indexed in this process. Calls
+    ``progress(done, total)`` after each chunk and returns the number of
+    indexed objects.
+    """
+    backend = get_search_backend(backend_name)
+    models = models or get_indexed_models()
+    chunks = []
+    for model in models:
+        ids = list(model.get_indexed_objects().order_by('pk').values_list('pk', flat=True))
+        chunks.extend((model._meta.label, ids[i:i + chunk_size]) for i in range(0, len(ids), chunk_size))
+    total = sum(len(ids) for _, ids in chunks)
+    done = indexed = 0
+
+    workers = get_worker_count(workers)
+    if workers == 1:
+        for model_label, ids in chunks:
+            indexed += _index_objects(backend_name, model_label, ids)
+            done += len(ids)
+            if progress:
+                progress(done, total)
+    else:
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(_index_chunk, backend_name, model_label, ids): len(ids)
+                for model_label, ids in chunks
+            }
+            for future in as_completed(futures):
+                indexed += future.result()
+                done += futures[future]
+                if progress:
+                    progress(done, total)
+
+    for model in models:
+        index = backend.get_index_for_model(model)
+        if hasattr(index, 'delete_stale_model_entries'):
+            index.delete_stale_model_entries(model)
+    return indexed
@@ -0,0 +1,181 @@
+"""
+Load test of the application server in its WSGI and ASGI modes.
+
+``run()`` starts gunicorn with ``gunicorn.conf.py`` in the given mode and
+sends it requests from ``concurrency`` keep-alive clients for ``duration``
+seconds, while ``slow_clients`` other connections trickle their request
+headers in over ``slow_seconds``, the way clients on poor mobile networks
+do. It reports the throughput and latency percentiles of the regular
+clients, so the two modes can be compared on the same pages and data.
+"""
+
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+from .benchmarks import get_scenarios, percentile
+
+
+MODES = ['wsgi', 'asgi']
+
+
+class ServerError(Exception):
+    pass
+
+
+def get_urls(count=10):
+    """
+    Pages of every public page type, in turn.
+    """
+    urls = []
+    for scenario_urls, needs_login in get_scenarios(count).values():
+        if not needs_login:
+            urls.extend(scenario_urls)
+    return urls
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, workers, threads):
+    env = dict(
+        os.environ,
+        SERVER_MODE=mode,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(threads),
+        GUNICORN_ACCESS_LOG='/dev/null',
+    )
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', str(settings.BASE_DIR / 'gunicorn.conf.py')],
+        cwd=settings.BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def get(port, host, url, timeout=30):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        connection.request('GET', url, headers={'Host': host})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def wait_until_ready(process, port, host, url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise ServerError(f'gunicorn exited with status {process.returncode}')
+        try:
+            if get(port, host, url) == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise ServerError(f'gunicorn did not answer {url} within {timeout} seconds')
+
+
+def regular_client(port, host, urls, offset, deadline, timings, errors):
+    connection = None
+    i = offset
+    while time.monotonic() < deadline:
+        url = urls[i % len(urls)]
+        i += 1
+        if connection is None:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        start = time.perf_counter()
+        try:
+            connection.request('GET', url, headers={'Host': host})
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(url)
+            connection.close()
+            connection = None
+            continue
+        if response.status == 200:
+            timings.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(url)
+        if response.will_close:
+            connection.close()
+            connection = None
+    if connection is not None:
+        connection.close()
+
+
+def slow_client(port, host, url, deadline, slow_seconds, completed):
+    request = f'GET {url} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: slow-client\r\nConnection: close\r\n\r\n'.encode()
+    pieces = 10
+    size = -(-len(request) // pieces)
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=30) as sock:
+                for i in range(0, len(request), size):
+                    sock.sendall(request[i:i + size])
+                    time.sleep(slow_seconds / pieces)
+                while sock.recv(65536):
+                    pass
+            completed.append(url)
+        except OSError:
+            time.sleep(0.1)
+
+
+def load(port, host, urls, concurrency=8, duration=20, slow_clients=0, slow_seconds=2):
+    deadline = time.monotonic() + duration
+    timings, errors, slow_completed = [], [], []
+    threads = [
+        threading.Thread(target=regular_client, args=(port, host, urls, i, deadline, timings, errors))
+        for i in range(concurrency)
+    ] + [
+        threading.Thread(target=slow_client, args=(port, host, urls[0], deadline, slow_seconds, slow_completed))
+        for _ in range(slow_clients)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    if not timings:
+        raise ServerError(f'No request succeeded; {len(errors)} failed')
+    return {
+        'requests': len(timings),
+        'errors': len(errors),
+        'throughput': round(len(timings) / elapsed, 1),
+        'p50': round(percentile(timings, 0.5), 1),
+        'p95': round(percentile(timings, 0.95), 1),
+        'p99': round(percentile(timings, 0.99), 1),
+        'slow_requests': len(slow_completed),
+    }
+
+
+def run(mode, urls, host='localhost', workers=2, threads=2, **options):
+    """
+    Start gunicorn in ``mode``, warm it up with every URL, apply the load
+    and stop it again. ``options`` are passed on to ``load()``.
+    """
+    port = get_free_port()
+    process = start_server(mode, port, workers, threads)
+    try:
+        wait_until_ready(process, port, host, urls[0])
+        for url in urls:
+            get(port, host, url)
+        return load(port, host, urls, **options)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
@@ -0,0 +1,160 @@
+"""
+Signal handlers for the home app.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from . import autocomplete, front_cache, page_cache, renditions, search_indexing, static_export, statistics
+from .models import AnnouncementPage, BlogPage, GalleryImage, GalleryPage, NewsPage
+
+
+if search_indexing.is_enabled():
+    search_indexing.register_signal_handlers()
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def invalidate_page_cache(sender, instance, **kwargs):
+    page_cache.invalidate_page(instance)
+
+
+@receiver(post_page_move)
+def invalidate_moved_page_cache(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    page_cache.invalidate_page(instance, include_descendants=True)
+    page_cache.invalidate_page(parent_page_before)
+    page_cache.invalidate_page(parent_page_after)
+
+
+@receiver(post_delete)
+def invalidate_deleted_page_cache(sender, instance, **kwargs):
+    # post_delete fires once per model in the inheritance chain; reacting to
+    # the base Page row alone invalidates each deleted page exactly once.
+    if sender is Page:
+        page_cache.invalidate_page(instance)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def purge_front_cache(sender, instance, **kwargs):
+    front_cache.purge(front_cache.get_purge_keys(instance))
+
+
+@receiver(post_page_move)
+def purge_moved_page_front_cache(sender, instance, **kwargs):
+    front_cache.purge(front_cache.get_purge_keys(instance, include_descendants=True))
+
+
+@receiver(post_delete)
+def purge_deleted_page_front_cache(sender, instance, **kwargs):
+    if sender is Page:
+        front_cache.purge(front_cache.get_purge_keys(instance))
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def update_static_export(sender, instance, **kwargs):
+    static_export.schedule([instance])
+
+
+@receiver(post_page_move)
+def update_moved_static_export(sender, instance, parent_page_before, url_path_before, url_path_after, **kwargs):
+    if url_path_before == url_path_after:
+        # Reordered among its siblings.
+        static_export.schedule([instance])
+        return
+    # The old directory holds the whole subtree.
+    static_export.schedule([instance], removed_paths=[url_path_before], include_descendants=True)
+    static_export.schedule([parent_page_before])
+
+
+@receiver(post_delete)
+def update_deleted_static_export(sender, instance, **kwargs):
+    if sender is Page:
+        static_export.schedule([instance], removed_paths=[instance.url_path])
+
+
+@receiver(pre_save, sender=NewsPage)
+@receiver(pre_save, sender=AnnouncementPage)
+@receiver(pre_save, sender=BlogPage)
+def remember_live_state(sender, instance, **kwargs):
+    # Publishing works on an object rebuilt from a revision, so the live
+    # state before the save has to come from the database.
+    instance._was_live = (
+        instance.pk is not None
+        and Page.objects.filter(pk=instance.pk, live=True).exists()
+    )
+
+
+@receiver(post_save, sender=NewsPage)
+@receiver(post_save, sender=AnnouncementPage)
+@receiver(post_save, sender=BlogPage)
+def count_live_change(sender, instance, **kwargs):
+    was_live = getattr(instance, '_was_live', False)
+    if instance.live != was_live:
+        statistics.record_live_change(instance, 1 if instance.live else -1)
+
+
+@receiver(post_delete, sender=NewsPage)
+@receiver(post_delete, sender=AnnouncementPage)
+@receiver(post_delete, sender=BlogPage)
+def count_deleted_page(sender, instance, **kwargs):
+    if instance.live:
+        statistics.record_live_change(instance, -1)
+
+
+@receiver(post_save, sender=GalleryImage)
+def count_added_gallery_image(sender, instance, created, **kwargs):
+    if created:
+        statistics.record_gallery_image_change(1)
+
+
+@receiver(post_delete, sender=GalleryImage)
+def count_removed_gallery_image(sender, instance, **kwargs):
+    statistics.record_gallery_image_change(-1)
+
+
+@receiver(post_save, sender=get_image_model())
+def pregenerate_uploaded_image_renditions(sender, instance, created, **kwargs):
+    if created:
+        renditions.schedule([instance.pk])
+
+
+@receiver(page_published, sender=GalleryPage)
+def pregenerate_gallery_renditions(sender, instance, **kwargs):
+    renditions.schedule(instance.gallery_images.values_list('image_id', flat=True))
+
+
+@receiver(page_published, sender=NewsPage)
+@receiver(page_published, sender=AnnouncementPage)
+@receiver(page_published, sender=BlogPage)
+def update_autocomplete_index(sender, instance, **kwargs):
+    autocomplete.index_pages([instance])
+
+
+@receiver(page_unpublished, sender=NewsPage)
+@receiver(page_unpublished, sender=AnnouncementPage)
+@receiver(page_unpublished, sender=BlogPage)
+def remove_from_autocomplete_index(sender, instance, **kwargs):
+    autocomplete.remove_pages([instance.pk])
+
+
+@receiver(post_delete, sender=NewsPage)
+@receiver(post_delete, sender=AnnouncementPage)
+@receiver(post_delete, sender=BlogPage)
+@receiver(post_page_move)
+def invalidate_autocomplete_cache(sender, instance, **kwargs):
+    # Deleted pages lose their prefixes by cascade; moved pages change URL.
+    autocomplete.invalidate()
+
+
+@receiver(post_save, sender=PageViewRestriction)
+@receiver(post_delete, sender=PageViewRestriction)
+def update_restricted_autocomplete_index(sender, instance, **kwargs):
+    # Restrictions also go when their page is deleted.
+    page = Page.objects.filter(pk=instance.page_id).first()
+    if page is not None:
+        autocomplete.index_subtree(page)
@@ -0,0 +1,306 @@
+"""
+Static HTML export of the public pages.
+
+``export_static`` renders every live, public page of this app below a
+site's root page, across a pool of worker processes, to
+``STATIC_EXPORT_DIR/<url_path>index.html`` with a gzipped copy next to it,
+so that nginx can serve the pages without the application. Its root is
+``STATIC_EXPORT_DIR`` followed by the ``url_path`` of the site's root page,
+``/home/dataset/`` on the generated dataset::
+
+    root /app/export/home/dataset;
+    location / {
+        if ($args) { proxy_pass http://portal; }
+        gzip_static on;
+        try_files $uri/index.html @portal;
+    }
+
+Files are replaced atomically and only when their content changed. A full
+export then removes the files of pages that are no longer exported.
+
+With ``STATIC_EXPORT_ENABLED`` on, publishing or unpublishing a page
+re-renders, once the transaction has committed and in a background thread,
+the page (or removes it) and the listings that show it: its index page and
+the home page (see ``last_modified_from`` in ``apps.home.conditional``).
+Moving or deleting a page does the same for its subtree.
+
+Pages are rendered with ``page.serve()`` for an anonymous request without
+a query string, so ``before_serve_page`` hooks do not run: views of
+exported pages are not counted, and paginated and other URLs with a query
+string are left to the application.
+"""
+
+import gzip
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import close_old_connections, connections, transaction
+from django.test import RequestFactory
+from wagtail.models import Page, Site
+
+from . import page_cache
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.html'
+
+# Publishes queue their re-renders here so that the editor's request
+# returns without waiting for them.
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='static-export')
+_pending_lock = threading.Lock()
+_pending = None
+
+
+def is_enabled():
+    return getattr(settings, 'STATIC_EXPORT_ENABLED', False)
+
+
+def get_export_dir():
+    return Path(getattr(settings, 'STATIC_EXPORT_DIR', settings.BASE_DIR / 'export'))
+
+
+def get_path(url_path, export_dir=None):
+    return (export_dir or get_export_dir()) / url_path.strip('/') / INDEX_FILE
+
+
+def get_exported_pages():
+    """
+    Live, public pages of this app below the root pages of the sites.
+    """
+    pages = Page.objects.none()
+    for site in Site.objects.select_related('root_page'):
+        pages |= Page.objects.descendant_of(site.root_page, inclusive=True)
+    return pages.live().public().filter(content_type__app_label='home')
+
+
+def get_request(page):
+    """
+    An anonymous GET request for ``page``, or None if it has no URL.
+    """
+    url_parts = page.get_url_parts()
+    if url_parts is None:
+        return None
+    site_id, root_url, page_path = url_parts
+    scheme, host = root_url.split('://', 1)
+    hostname, _, port = host.partition(':')
+    request = RequestFactory().get(
+        page_path,
+        SERVER_NAME=hostname,
+        SERVER_PORT=port or ('443' if scheme == 'https' else '80'),
+        secure=scheme == 'https',
+    )
+    request.user = AnonymousUser()
+    return request
+
+
+def render(page):
+    """
+    The HTML of ``page``, or None if it does not render to a 200 response.
+    """
+    request = get_request(page)
+    if request is None:
+        return None
+    response = page.serve(request)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def write(path, content):
+    """
+    Write ``content`` and its gzipped copy to ``path`` atomically. Returns
+    False if the file already had that content.
+    """
+    try:
+        if path.read_bytes() == content:
+            return False
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    for target, data in ((path, content), (path.with_name(f'{path.name}.gz'), gzip.compress(content, mtime=0))):
+        temporary = target.with_name(f'.{target.name}.{os.getpid()}.{threading.get_ident()}')
+        temporary.write_bytes(data)
+        os.replace(temporary, target)
+    return True
+
+
+def remove(url_path, export_dir=None):
+    """
+    Remove the files of the page at ``url_path``, and its directory once
+    nothing is exported below it.
+    """
+    export_dir = export_dir or get_export_dir()
+    path = get_path(url_path, export_dir)
+    for target in (path, path.with_name(f'{path.name}.gz')):
+        target.unlink(missing_ok=True)
+    directory = path.parent
+    while directory != export_dir and directory.is_dir() and not any(directory.iterdir()):
+        directory.rmdir()
+        directory = directory.parent
+
+
+def export_pages(pages, export_dir=None):
+    """
+    Render and write ``pages``. Returns ``(written, unchanged, failed)``.
+    """
+    export_dir = export_dir or get_export_dir()
+    counts = [0, 0, 0]
+    for page in pages:
+        try:
+            content = render(page)
+        except Exception:
+            logger.warning('Could not export page %s', page.pk, exc_info=True)
+            counts[2] += 1
+            continue
+        if content is None:
+            counts[2] += 1
+        elif write(get_path(page.url_path, export_dir), content):
+            counts[0] += 1
+        else:
+            counts[1] += 1
+    return tuple(counts)
+
+
+def _export_chunk(page_ids, export_dir):
+    try:
+        pages = Page.objects.filter(pk__in=page_ids).specific()
+        return export_pages([page for page in pages if page_cache.is_cacheable_page(page)], export_dir)
+    finally:
+        close_old_connections()
+
+
+def export_in_pool(export_dir=None, workers=None, chunk_size=200, progress=None):
+    """
+    Export every page of ``get_exported_pages()`` across a pool of worker
+    processes, then remove the files of pages that are not exported.
+    Calls ``progress(done, total, counts)`` after each chunk and returns
+    the summed ``(written, unchanged, failed)`` counts and the number of
+    removed pages.
+    """
+    export_dir = Path(export_dir or get_export_dir())
+    pages = list(get_exported_pages().order_by('path').values_list('pk', 'url_path'))
+    chunks = [[pk for pk, _ in pages[i:i + chunk_size]] for i in range(0, len(pages), chunk_size)]
+    totals = [0, 0, 0]
+    done = 0
+
+    # Forked workers must not share the parent's database connections.
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(_export_chunk, chunk, export_dir): len(chunk) for chunk in chunks}
+        for future in as_completed(futures):
+            totals = [total + count for total, count in zip(totals, future.result())]
+            done += futures[future]
+            if progress:
+                progress(done, len(pages), totals)
+
+    removed = prune(export_dir, {get_path(url_path, export_dir) for _, url_path in pages})
+    return tuple(totals), removed
+
+
+def prune(export_dir, paths):
+    """
+    Remove the exported pages under ``export_dir`` that are not in
+    ``paths``, and return how many there were.
+    """
+    removed = 0
+    for path in list(export_dir.rglob(INDEX_FILE)):
+        if path not in paths:
+            remove('/' + str(path.parent.relative_to(export_dir)) + '/', export_dir)
+            removed += 1
+    return removed
+
+
+def get_listings(page):
+    """
+    The pages above ``page`` that list it: its parent if it lists its
+    children, and ancestors that list their descendants.
+    """
+    ancestors = page.get_ancestors().specific(defer=True)
+    parent_path = page.path[:-page.steplen]
+    return [
+        ancestor for ancestor in ancestors
+        if getattr(ancestor, 'last_modified_from', None) == 'descendants'
+        or (getattr(ancestor, 'last_modified_from', None) == 'children' and ancestor.path == parent_path)
+    ]
+
+
+def get_affected_page_ids(pages):
+    """
+    ``pages`` and the listings that show them.
+    """
+    page_ids = set()
+    for page in pages:
+        page_ids.add(page.pk)
+        page_ids.update(listing.pk for listing in get_listings(page))
+    return page_ids
+
+
+def refresh(page_ids, removed_paths=(), export_dir=None):
+    """
+    Bring the exported files of ``page_ids`` up to date, and remove the
+    directories of ``removed_paths``, the ``url_path`` of pages that are
+    gone or moved with their subtrees. Returns the
+    ``(written, unchanged, failed)`` counts.
+    """
+    export_dir = Path(export_dir or get_export_dir())
+    for url_path in removed_paths:
+        shutil.rmtree(export_dir / url_path.strip('/'), ignore_errors=True)
+    pages = {page.pk: page for page in Page.objects.filter(pk__in=page_ids).specific()}
+    exported = set(get_exported_pages().filter(pk__in=page_ids).values_list('pk', flat=True))
+    for page in pages.values():
+        if page.pk not in exported or not page_cache.is_cacheable_page(page):
+            remove(page.url_path, export_dir)
+    return export_pages(
+        [page for page in pages.values() if page.pk in exported and page_cache.is_cacheable_page(page)],
+        export_dir,
+    )
+
+
+def _refresh_pending():
+    global _pending
+    with _pending_lock:
+        page_ids, removed_paths = _pending
+        _pending = None
+    try:
+        refresh(page_ids, removed_paths)
+    except Exception:
+        logger.exception('Updating the static export failed')
+    finally:
+        close_old_connections()
+
+
+def _add_pending(page_ids, removed_paths):
+    global _pending
+    with _pending_lock:
+        # Changes that arrive while a refresh is queued join it.
+        if _pending is None:
+            _pending = (set(), set())
+            _background.submit(_refresh_pending)
+        _pending[0].update(page_ids)
+        _pending[1].update(removed_paths)
+
+
+def schedule(pages, removed_paths=(), include_descendants=False):
+    """
+    Refresh the export of ``pages`` and the listings that show them in the
+    background once the current transaction has committed. Descendants are
+    included when their URLs change (page moves).
+    """
+    if not is_enabled():
+        return
+    page_ids = get_affected_page_ids(pages)
+    if include_descendants:
+        for page in pages:
+            page_ids.update(page.get_descendants().values_list('pk', flat=True))
+    removed_paths = list(removed_paths)
+    transaction.on_commit(lambda: _add_pending(page_ids, removed_paths))
@@ -0,0 +1,88 @@
+"""
+Incremental maintenance of ``ContentStatistics``.
+
+Signal handlers report each change of a page's live state and each added
+or removed gallery image; the counters are adjusted with single UPDATE
+statements so the home page never has to count rows.
+"""
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AnnouncementPage, BlogPage, ContentStatistics, GalleryImage, NewsPage
+
+
+PAGE_COUNTERS = {
+    NewsPage: 'news_pages',
+    AnnouncementPage: 'announcement_pages',
+    BlogPage: 'blog_pages',
+}
+
+
+def _adjust(**deltas):
+    updated = ContentStatistics.objects.filter(pk=1).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        # No row yet: build it from the current data, which already
+        # includes this change.
+        rebuild()
+
+
+def record_live_change(page, delta):
+    """
+    Apply a page going live (``delta=1``) or leaving the live site
+    (``delta=-1``) to the counters.
+    """
+    field = PAGE_COUNTERS.get(type(page))
+    if field is None:
+        return
+    _adjust(**{field: delta})
+    if isinstance(page, NewsPage) and page.first_published_at is not None:
+        record_news_today(timezone.localdate(page.first_published_at), delta)
+
+
+def record_news_today(published_on, delta):
+    today = timezone.localdate()
+    if published_on != today:
+        return
+    statistics = ContentStatistics.objects.filter(pk=1)
+    updated = statistics.filter(today=today).update(news_published_today=F('news_published_today') + delta)
+    if not updated and delta > 0:
+        statistics.update(news_published_today=delta, today=today)
+
+
+def record_gallery_image_change(delta):
+    _adjust(gallery_images=delta)
+
+
+def compute():
+    """
+    Count everything from scratch.
+    """
+    today = timezone.localdate()
+    values = {field: model.objects.live().count() for model, field in PAGE_COUNTERS.items()}
+    values['news_published_today'] = NewsPage.objects.live().filter(first_published_at__date=today).count()
+    values['today'] = today
+    values['gallery_images'] = GalleryImage.objects.count()
+    return values
+
+
+def rebuild():
+    values = compute()
+    ContentStatistics.objects.update_or_create(pk=1, defaults=values)
+    return values
+
+
+def find_drift():
+    """
+    Return ``{field: (stored, actual)}`` for every counter that differs from
+    a fresh count.
+    """
+    stored = ContentStatistics.load()
+    drift = {}
+    for field, actual in compute().items():
+        value = stored.news_today if field == 'news_published_today' else getattr(stored, field)
+        if field != 'today' and value != actual:
+            drift[field] = (value, actual)
+    return drift
@@ -0,0 +1,82 @@
+"""
+Template tags for the home app.
+"""
+
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from apps.home import critical_css as critical, page_views, renditions
+
+
+register = template.Library()
+
+PERSIAN_DIGITS = str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹')
+
+
+@register.filter
+def persian_digits(value):
+    """
+    Render the digits of ``value`` with Persian numerals.
+    """
+    return str(value).translate(PERSIAN_DIGITS)
+
+
+@register.filter
+def compact_number(value):
+    """
+    Abbreviate large numbers, e.g. 24300 -> 24K.
+    """
+    value = int(value or 0)
+    for divisor, suffix in ((1_000_000, 'M'), (1_000, 'K')):
+        if value >= divisor:
+            return f'{value // divisor}{suffix}'
+    return str(value)
+
+
+@register.simple_tag
+def page_view_count(page, days=None):
+    """
+    Views of ``page``, over all time or the last ``days`` days.
+    """
+    return page_views.get_page_total(page.pk, days)
+
+
+@register.simple_tag
+def site_view_count(days=None):
+    """
+    Views of the whole site, over all time or the last ``days`` days.
+    """
+    return page_views.get_site_total(days)
+
+
+@register.simple_tag
+def picture(image, set_name, alt='', **attrs):
+    """
+    Responsive ``<picture>`` markup for ``image`` using the rendition set
+    ``set_name`` from ``RENDITION_SETS``.
+    """
+    if not image:
+        return ''
+    return renditions.get_rendition_set(set_name).render(image, alt=alt, **attrs)
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context, path='build/site.min.css'):
+    """
+    Inline the critical CSS of the page's template and load the stylesheet
+    ``path`` without blocking rendering; without critical CSS, link it.
+    """
+    href = static(path)
+    css = critical.get_inline(context.template.name) if critical.is_enabled() else None
+    if css is None:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    return format_html(
+        '<style>{}</style>\n'
+        '    <link rel="stylesheet" href="{}" media="print" onload="this.media=\'all\'">\n'
+        '    <noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(css),
+        href,
+        href,
+    )
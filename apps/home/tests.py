@@ -0,0 +1,252 @@
+"""
+Tests for the home app.
+"""
+
+import datetime
+import threading
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.models import Page, PageViewRestriction, Site
+
+from . import autocomplete, caching, page_views, pagination, performance, search_indexing
+from .models import NewsIndexPage, NewsPage, PageViewCount, PendingSearchUpdate
+
+
+class RebuildSearchIndexTests(TestCase):
+    def setUp(self):
+        root = Page.objects.get(depth=1)
+        self.index = root.add_child(instance=NewsIndexPage(title='News', slug='news'))
+        for i in range(5):
+            self.index.add_child(instance=NewsPage(
+                title=f'Zanzibar story {i}', slug=f'story-{i}', intro='Intro', body='<p>Body</p>',
+            ))
+
+    def test_rebuild_with_several_workers(self):
+        # SQLite takes one writer at a time, so the chunks run in this
+        # process instead of the pool asked for.
+        self.assertEqual(search_indexing.get_worker_count(2), 1)
+        self.assertEqual(NewsPage.objects.live().search('Zanzibar').count(), 0)
+        progress = []
+        indexed = search_indexing.rebuild_in_pool(
+            workers=2, chunk_size=2, progress=lambda done, total: progress.append(done),
+        )
+
+        self.assertGreaterEqual(indexed, 6)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], indexed)
+        self.assertEqual(NewsPage.objects.live().search('Zanzibar').count(), 5)
+
+    def test_chunk_indexes_its_objects_only(self):
+        page_ids = list(NewsPage.objects.order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(search_indexing._index_objects('default', 'home.NewsPage', page_ids[:2]), 2)
+        self.assertEqual(NewsPage.objects.live().search('Zanzibar').count(), 2)
+
+    def test_update_queued_while_applied_is_kept(self):
+        page = NewsPage.objects.first()
+        PendingSearchUpdate.objects.all().delete()
+        search_indexing.enqueue(NewsPage, [page.pk])
+
+        def save_during_update(model, object_ids):
+            # A save whose transaction queued the page just after it was read.
+            PendingSearchUpdate.objects.update(queued_at=F('queued_at') + datetime.timedelta(microseconds=1))
+
+        with mock.patch.object(search_indexing, 'update_objects', side_effect=save_during_update):
+            self.assertEqual(search_indexing.process_queue(), 1)
+        self.assertEqual(PendingSearchUpdate.objects.count(), 1)
+
+        self.assertEqual(search_indexing.process_queue(), 1)
+        self.assertEqual(PendingSearchUpdate.objects.count(), 0)
+
+    def test_command_with_several_workers(self):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('rebuild_search_index', workers=4, chunk_size=2, stdout=stdout, stderr=stderr)
+
+        self.assertIn('Indexed', stdout.getvalue())
+        self.assertEqual(NewsPage.objects.live().search('Zanzibar').count(), 5)
+
+
+class GetOrSetTests(TestCase):
+    def test_nested_get_or_set(self):
+        namespace = caching.get_cache('tests')
+        prefix = uuid.uuid4().hex
+        results = []
+
+        def compute():
+            # Enough inner keys that some would share a lock with the outer
+            # key if locks were shared between keys.
+            return sum(namespace.get_or_set(f'{prefix}:{i}', lambda i=i: i) for i in range(200))
+
+        thread = threading.Thread(target=lambda: results.append(namespace.get_or_set(prefix, compute)), daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+
+        self.assertFalse(thread.is_alive(), 'get_or_set deadlocked')
+        self.assertEqual(results, [sum(range(200))])
+        self.assertEqual(caching._key_locks, {})
+
+
+class RequestMetricsTests(TestCase):
+    def test_counters_from_several_threads(self):
+        metrics = performance.RequestMetrics()
+
+        def work():
+            for _ in range(10000):
+                metrics(lambda *args: None, 'SELECT 1', (), False, {})
+                metrics.add_cache('hits')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(metrics.db_queries, 40000)
+        self.assertEqual(metrics.cache_hits, 40000)
+
+
+class WriteCountsTests(TestCase):
+    def test_rows_are_incremented_in_one_update(self):
+        page_ids = list(Page.objects.values_list('pk', flat=True)[:2])
+        today = datetime.date(2024, 5, 1)
+        yesterday = today - datetime.timedelta(days=1)
+        PageViewCount.objects.create(page_id=page_ids[0], date=today, views=10)
+
+        with CaptureQueriesContext(connection) as queries:
+            page_views.write_counts({(page_ids[0], today): 2, (page_ids[1], today): 3, (page_ids[1], yesterday): 4})
+
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual(
+            set(PageViewCount.objects.values_list('page_id', 'date', 'views')),
+            {(page_ids[0], today, 12), (page_ids[1], today, 3), (page_ids[1], yesterday, 4)},
+        )
+
+    def test_updates_stay_within_the_parameter_limit(self):
+        page_id = Page.objects.values_list('pk', flat=True).first()
+        start = datetime.date(2024, 1, 1)
+        counts = {(page_id, start + datetime.timedelta(days=i)): i + 1 for i in range(450)}
+
+        with CaptureQueriesContext(connection) as queries:
+            page_views.write_counts(counts)
+
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        batch_size = page_views.get_write_batch_size()
+        self.assertEqual(len(updates), -(-len(counts) // batch_size))
+        self.assertEqual(sum(PageViewCount.objects.values_list('views', flat=True)), sum(counts.values()))
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class PageViewTests(TestCase):
+    def setUp(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = root.add_child(instance=NewsIndexPage(title='News', slug='news'))
+        self.index.save_revision().publish()
+        page_views.buffer.take()
+
+    def tearDown(self):
+        page_views.buffer.take()
+
+    def test_revalidations_are_not_counted(self):
+        response = self.client.get(self.index.url)
+        self.assertEqual(response.status_code, 200)
+        revalidation = self.client.get(self.index.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidation.status_code, 304)
+
+        self.assertEqual(sum(page_views.buffer.take().values()), 1)
+
+
+@override_settings(
+    PAGE_CACHE_ENABLED=True,
+    FRONT_CACHE_ENABLED=False,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = root.add_child(instance=NewsIndexPage(title='News', slug=f'news-{uuid.uuid4().hex[:8]}'))
+        self.index.save_revision().publish()
+        page_views.buffer.take()
+
+    def tearDown(self):
+        page_views.buffer.take()
+
+    def test_public_page_is_cached(self):
+        self.assertEqual(self.client.get(self.index.url)['X-Page-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.index.url)['X-Page-Cache'], 'HIT')
+
+    def test_password_restricted_page_is_not_cached(self):
+        restriction = PageViewRestriction.objects.create(
+            page=self.index, restriction_type=PageViewRestriction.PASSWORD, password='secret',
+        )
+        visitor = self.client_class()
+        visitor.post(
+            f'/_util/authenticate_with_password/{restriction.pk}/{self.index.pk}/',
+            {'password': 'secret', 'return_url': self.index.url},
+        )
+        response = visitor.get(self.index.url)
+        self.assertTemplateUsed(response, 'home/news_index_page.html')
+        self.assertNotIn('X-Page-Cache', response)
+
+        response = self.client.get(self.index.url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertTemplateUsed(response, 'wagtailcore/password_required.html')
+
+
+class CursorTests(TestCase):
+    def test_invalid_cursors(self):
+        for value in ['', 'x-1', '1-2-3', '99999999999999999999-1', '253402300800000000-1', '1-99999999999999999999']:
+            with self.subTest(value=value), self.assertRaises(Http404):
+                pagination.decode_cursor(value)
+
+    def test_invalid_position_cursors(self):
+        for value in ['', 'x-1', '1-99999999999999999999']:
+            with self.subTest(value=value), self.assertRaises(Http404):
+                pagination.decode_position_cursor(value)
+
+    def test_round_trip(self):
+        root = Page.objects.get(depth=1)
+        index = root.add_child(instance=NewsIndexPage(title='News', slug='news'))
+        index.save_revision().publish()
+        index.refresh_from_db()
+        self.assertEqual(pagination.decode_cursor(pagination.encode_cursor(index)), (index.first_published_at, index.pk))
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = root.add_child(instance=NewsIndexPage(title='News', slug='news'))
+        self.index.save_revision().publish()
+        self.page = self.index.add_child(instance=NewsPage(
+            title='TOPSECRET', slug='topsecret', intro='Intro', body='<p>Body</p>',
+        ))
+        self.page.save_revision().publish()
+        autocomplete.rebuild()
+        autocomplete.invalidate()
+
+    def get_titles(self):
+        response = self.client.get('/api/autocomplete/', {'q': 'TOPSEC'})
+        return [result['title'] for result in response.json()['results']]
+
+    def test_restricted_pages_are_not_suggested(self):
+        self.assertEqual(self.get_titles(), ['TOPSECRET'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restriction = PageViewRestriction.objects.create(
+                page=self.index, restriction_type=PageViewRestriction.PASSWORD, password='secret',
+            )
+        self.assertEqual(self.get_titles(), [])
+        autocomplete.rebuild()
+        self.assertFalse(autocomplete.find_page_ids('TOPSEC'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restriction.delete()
+        self.assertEqual(self.get_titles(), ['TOPSECRET'])
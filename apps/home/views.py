@@ -2,26 +2,49 @@
 Views for the home app.
 """
 
-from django.shortcuts import render
-from wagtail.models import Page
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 
-from .models import AnnouncementPage, NewsPage
+from . import autocomplete, caching
+from .models import GalleryPage
 
 
-def home(request):
+@staff_member_required
+def cache_stats(request):
     """
-    Home page view.
+    Cache hit/miss counters of the worker process serving this request.
     """
+    return JsonResponse(caching.get_stats())
+
+
+def gallery_images(request, page_id):
+    """
+    Next chunk of a gallery as rendered HTML, for lazy loading on scroll.
+    """
+    page = get_object_or_404(GalleryPage.objects.live(), pk=page_id)
+    for restriction in page.get_view_restrictions():
+        if not restriction.accept_request(request):
+            raise Http404
+    images, cursor = page.get_image_chunk(request.GET.get('after'))
+    return JsonResponse({
+        'html': render_to_string('home/includes/gallery_items.html', {'gallery_images': images}, request),
+        'count': len(images),
+        'next': page.get_next_chunk_url(cursor),
+    })
+
+
+def autocomplete_suggestions(request):
+    """
+    Search suggestions for the partial query ``q``.
+    """
+    query = request.GET.get('q', '')[:100]
     try:
-        home_page = Page.objects.get(depth=2).specific
-    except Page.DoesNotExist:
-        home_page = None
-    
-    news_items = NewsPage.objects.live().order_by('-first_published_at')[:3]
-    announcement_items = AnnouncementPage.objects.live().order_by('-first_published_at')[:3]
-
-    return render(request, 'home/home.html', {
-        'page': home_page,
-        'news_items': news_items,
-        'announcement_items': announcement_items,
+        limit = max(1, min(int(request.GET.get('limit', autocomplete.DEFAULT_LIMIT)), 20))
+    except ValueError:
+        limit = autocomplete.DEFAULT_LIMIT
+    return JsonResponse({
+        'query': query,
+        'results': autocomplete.get_suggestions(query, limit, request),
     })
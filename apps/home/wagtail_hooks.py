@@ -0,0 +1,65 @@
+"""
+Wagtail hooks for the home app.
+"""
+
+from wagtail import hooks
+
+from . import conditional, front_cache, page_cache, page_views, performance
+
+
+@hooks.register('before_serve_page')
+def mark_page_cacheable(page, request, serve_args, serve_kwargs):
+    """
+    Let the page cache middleware store this response. The version token is
+    read before rendering so that a publish during the render cannot leave
+    stale content behind under the new version.
+    """
+    if (
+        page_cache.is_enabled()
+        and page_cache.is_cacheable_request(request)
+        and page_cache.is_cacheable_page(page)
+    ):
+        request._page_cache = (page.pk, page_cache.get_page_version(page.pk))
+
+
+@hooks.register('before_serve_page')
+def mark_front_cacheable(page, request, serve_args, serve_kwargs):
+    """
+    Let ``FrontCacheMiddleware`` send the page type's cache policy and the
+    page's surrogate keys, or mark the response private. Registered before
+    ``answer_conditional_request`` so that 304 responses get them too.
+    """
+    if front_cache.is_enabled():
+        request._front_cache = front_cache.get_marker(page) if page_cache.is_cacheable_request(request) else None
+
+
+@hooks.register('before_serve_page')
+def name_page_request(page, request, serve_args, serve_kwargs):
+    # Every page goes through Wagtail's serve view; performance metrics and
+    # query budgets are kept per page type instead.
+    performance.set_view_name(page._meta.label)
+
+
+@hooks.register('before_serve_page')
+def answer_conditional_request(page, request, serve_args, serve_kwargs):
+    """
+    Answer anonymous revalidations of unchanged pages with a 304 before the
+    page's context is built and its template rendered. Full responses get
+    the validator from ``ConditionalPageMiddleware``.
+    """
+    if not conditional.is_enabled() or not page_cache.is_cacheable_request(request):
+        return None
+    validator = conditional.get_validator(page, request)
+    if validator is None:
+        return None
+    request._page_validator = validator
+    return conditional.get_not_modified_response(request, validator)
+
+
+@hooks.register('before_serve_page')
+def record_page_view(page, request, serve_args, serve_kwargs):
+    # Registered after ``answer_conditional_request`` so that revalidations
+    # answered with a 304 are not counted; views served from the page cache
+    # are recorded by the middleware.
+    if request.method == 'GET':
+        page_views.record(page.pk)
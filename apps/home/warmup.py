@@ -0,0 +1,160 @@
+"""
+Worker warm-up.
+
+Django and Wagtail load much of what a request needs lazily, once per
+process: the URL resolvers, Wagtail's hooks, translation catalogs, compiled
+templates, the content type cache, the site root paths and the rich text
+rewriters. ``warm_up()`` loads all of it up front.
+
+With ``preload_app`` gunicorn runs it in the master, and ``prepare_fork()``
+then closes the master's connections and freezes the garbage collector, so
+that the forked workers start warm and share the loaded objects with the
+master copy-on-write instead of each paying for them on a first request.
+Without preloading it runs in every worker before it accepts requests (see
+``gunicorn.conf.py``).
+"""
+
+import gc
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+from django.utils import translation
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.resolve('/')
+
+
+def load_hooks():
+    from wagtail import hooks
+
+    hooks.search_for_hooks()
+
+
+def load_translations():
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('')
+
+
+def get_project_templates():
+    """
+    Names of the templates that belong to this project rather than to
+    Django, Wagtail or other installed packages.
+    """
+    base_dir = Path(settings.BASE_DIR).resolve()
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory).resolve()
+            if base_dir not in directory.parents:
+                continue
+            for path in sorted(directory.rglob('*.html')):
+                yield engine, str(path.relative_to(directory))
+
+
+def load_templates():
+    for engine, name in get_project_templates():
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError:
+            logger.exception('Template %s does not compile', name)
+
+
+def load_content_types():
+    ContentType.objects.get_for_models(*apps.get_models(), for_concrete_models=False)
+
+
+def load_sites():
+    from wagtail.models import Site
+
+    Site.get_site_root_paths()
+
+
+def load_rich_text():
+    from wagtail.rich_text import expand_db_html
+
+    expand_db_html('<p></p>')
+
+
+def load_images():
+    from PIL import Image
+    from wagtail.images import get_image_model
+
+    Image.init()
+    get_image_model()
+
+
+STEPS = [
+    ('urls', load_urls),
+    ('hooks', load_hooks),
+    ('translations', load_translations),
+    ('templates', load_templates),
+    ('content types', load_content_types),
+    ('sites', load_sites),
+    ('rich text', load_rich_text),
+    ('images', load_images),
+]
+
+
+def measure_first_requests(urls, host=None):
+    """
+    Latency in seconds of the first and the second request to each of
+    ``urls`` in this process.
+    """
+    from django.test import Client
+
+    client = Client(HTTP_HOST=host) if host else Client()
+    # The WSGI handler of a server loads its middleware on import; the
+    # client's own handler would only do so on its first request.
+    client.handler.load_middleware()
+    results = {}
+    for url in urls:
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            client.get(url)
+            timings.append(time.perf_counter() - start)
+        results[url] = timings
+    return results
+
+
+def warm_up():
+    """
+    Run every warm-up step and return ``{step: seconds}``.
+    """
+    timings = {}
+    for name, step in STEPS:
+        start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def describe(timings):
+    steps = ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in timings.items())
+    return f'Warmed up in {sum(timings.values()) * 1000:.0f} ms ({steps})'
+
+
+def prepare_fork():
+    """
+    Get the warmed-up master ready to fork: children must not share its
+    database and cache connections, and objects moved to the permanent
+    generation are not written to by the children's garbage collections.
+    """
+    connections.close_all()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
+    gc.collect()
+    gc.freeze()
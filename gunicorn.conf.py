@@ -0,0 +1,52 @@
+"""
+Gunicorn configuration.
+Run with: gunicorn -c gunicorn.conf.py
+
+SERVER_MODE selects how requests are served:
+
+- wsgi (default): portal.wsgi on gthread workers. Each request holds a
+  thread from the moment its headers start arriving until the last byte of
+  the response is sent, so slow clients tie up threads.
+- asgi: portal.asgi on uvicorn workers. The event loop reads requests and
+  writes responses; a thread is only used while Django runs the request.
+
+The application is preloaded and warmed up in the master before the
+workers are forked (apps/home/warmup.py), so new and recycled workers serve
+their first request warm. Preloaded code is not reloaded on HUP; restart
+gunicorn to deploy, or set GUNICORN_PRELOAD=false to warm up each worker
+separately instead.
+"""
+
+import os
+
+mode = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+timeout = 60
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes', 'on')
+
+if mode == 'asgi':
+    wsgi_app = 'portal.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'portal.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 2))
+
+
+def when_ready(server):
+    if preload_app:
+        from apps.home import warmup
+
+        server.log.info(warmup.describe(warmup.warm_up()))
+        warmup.prepare_fork()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        from apps.home import warmup
+
+        worker.log.info(warmup.describe(warmup.warm_up()))
@@ -0,0 +1,11 @@
+"""
+ASGI config for portal project.
+Creates the ASGI application for deployment under uvicorn workers.
+"""
+
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portal.settings')
+
+application = get_asgi_application()
@@ -18,6 +18,7 @@ env = environ.Env(
     SECRET_KEY=(str, 'change-me-in-production'),
     ALLOWED_HOSTS=(list, ['localhost', '127.0.0.1']),
     DATABASE_URL=(str, 'sqlite:///db.sqlite3'),
+    CACHE_URL=(str, 'locmemcache://'),
 )
 
 # Read environment file
@@ -64,15 +65,20 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + WAGTAIL_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.home.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.home.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'wagtail.contrib.redirects.middleware.RedirectMiddleware',
+    'apps.home.middleware.PageCacheMiddleware',
+    'apps.home.middleware.ConditionalPageMiddleware',
+    'apps.home.middleware.FrontCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'portal.urls'
@@ -81,7 +87,7 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [
-            os.path.join(PROJECT_DIR, 'templates'),
+            os.path.join(BASE_DIR, 'templates'),
         ],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -103,6 +109,37 @@ DATABASES = {
     'default': env.db('DATABASE_URL', default='sqlite:///' + str(BASE_DIR / 'db.sqlite3')),
 }
 
+# Cache
+# A bounded in-process LRU in front of the shared cache selected by
+# CACHE_URL, e.g. filecache:///var/tmp/portal or redis://localhost:6379/1
+# (the Redis backend needs the redis package). locmemcache:// stands in for
+# the shared tier in development and tests.
+CACHES = {
+    'default': {
+        'BACKEND': 'apps.home.cache_backends.TieredCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': env.int('CACHE_L1_MAX_ENTRIES', default=1000),
+            'L1_TIMEOUT': env.int('CACHE_L1_TIMEOUT', default=30),
+        },
+    },
+    'shared': env.cache('CACHE_URL'),
+}
+
+# Per-namespace timeouts for apps.home.caching; LOCAL=False bypasses the
+# in-process tier for values that must be consistent across workers.
+CACHE_NAMESPACES = {
+    'pages': {'TIMEOUT': env.int('PAGE_CACHE_TIMEOUT', default=600)},
+    'page_versions': {'TIMEOUT': None, 'LOCAL': False},
+    'listings': {'TIMEOUT': 300},
+    'feed': {'TIMEOUT': 120},
+    'menus': {'TIMEOUT': 3600},
+    'page_views': {'TIMEOUT': 300},
+    'autocomplete': {'TIMEOUT': 600},
+    'validators': {'TIMEOUT': 60},
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -129,10 +166,12 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [
-    os.path.join(PROJECT_DIR, 'static'),
+    os.path.join(BASE_DIR, 'static'),
 ]
 
-# Make sure whitenoise finds the files
+# Hashed names served with immutable cache headers, plus gzip copies and,
+# with the Brotli package installed, Brotli copies. static/build/ holds the
+# bundles made by build_assets from static/ and assets/vendor/.
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files
@@ -144,15 +183,132 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Wagtail settings
 WAGTAIL_SITE_NAME = 'Portal'
-WAGTAIL_SEARCH_BACKENDS = {
+# Database full-text search with Persian normalization (apps/home/search_backends.py).
+# COLUMN_WEIGHTS rank title matches above body matches on SQLite; PostgreSQL
+# uses the boosts of the models' search fields.
+WAGTAILSEARCH_BACKENDS = {
     'default': {
-        'BACKEND': 'wagtail.search.backends.database',
+        'BACKEND': 'apps.home.search_backends',
+        'SEARCH_CONFIG': 'simple',
+        'COLUMN_WEIGHTS': {'title': 10.0, 'body': 1.0},
     }
 }
 
+# Index updates of the home app's pages are queued on save and applied in
+# batches by a background thread of each worker (apps/home/search_indexing.py).
+SEARCH_INDEX_QUEUE_ENABLED = env.bool('SEARCH_INDEX_QUEUE_ENABLED', default=True)
+SEARCH_INDEX_QUEUE_DELAY = 2
+SEARCH_INDEX_QUEUE_BATCH_SIZE = 200
+
+# Image renditions generated ahead of time for uploads and galleries.
+# RENDITION_SETS are rendered as responsive <picture> elements by the
+# {% picture %} template tag; the last format is the <img> fallback.
+RENDITION_FILTER_SPECS = []
+RENDITION_SETS = {
+    'gallery': {
+        'widths': [320, 500, 800, 1200],
+        'formats': ['avif', 'webp', 'original'],
+        'default_width': 500,
+        'sizes': '(max-width: 576px) 100vw, (max-width: 992px) 50vw, 33vw',
+    },
+}
+RENDITION_PREGENERATION_ENABLED = True
+
 # Wagtail admin
 WAGTAILADMIN_BASE_URL = 'http://localhost:8000'
 
+# Full-page cache for anonymous requests to home app pages
+PAGE_CACHE_ENABLED = env.bool('PAGE_CACHE_ENABLED', default=False)
+
+# Page view counting: views are buffered per worker and written in bulk
+PAGE_VIEWS_ENABLED = env.bool('PAGE_VIEWS_ENABLED', default=True)
+PAGE_VIEWS_FLUSH_INTERVAL = 30
+PAGE_VIEWS_FLUSH_THRESHOLD = 1000
+PAGE_CACHE_VARY_HEADERS = ['Accept-Language']
+
+# Conditional GET (apps/home/conditional.py): anonymous page responses carry
+# ETag and Last-Modified, and revalidations of unchanged pages get a 304
+# without the page being rendered.
+CONDITIONAL_GET_ENABLED = env.bool('CONDITIONAL_GET_ENABLED', default=True)
+
+# Front cache (apps/home/front_cache.py): anonymous page responses carry the
+# Cache-Control policy of their page type, by model label over 'default', and
+# a FRONT_CACHE_KEY_HEADER with their surrogate keys. Publishing purges the
+# affected keys on FRONT_CACHE_BACKENDS; FRONT_CACHE_PURGE_URL adds one that
+# sends PURGE requests. Without purging the front cache keeps pages for a
+# minute. Browsers revalidate every time, which conditional GET makes cheap.
+FRONT_CACHE_ENABLED = env.bool('FRONT_CACHE_ENABLED', default=True)
+FRONT_CACHE_KEY_HEADER = env('FRONT_CACHE_KEY_HEADER', default='Surrogate-Key')
+FRONT_CACHE_BACKENDS = {}
+if env('FRONT_CACHE_PURGE_URL', default=''):
+    FRONT_CACHE_BACKENDS['default'] = {
+        'BACKEND': 'apps.home.front_cache.HTTPBackend',
+        'LOCATION': env('FRONT_CACHE_PURGE_URL'),
+        'HEADER': env('FRONT_CACHE_PURGE_HEADER', default='Surrogate-Key'),
+    }
+FRONT_CACHE_MAX_AGE = env.int('FRONT_CACHE_MAX_AGE', default=86400 if FRONT_CACHE_BACKENDS else 60)
+FRONT_CACHE_POLICIES = {
+    'default': {
+        'MAX_AGE': 0,
+        'S_MAXAGE': FRONT_CACHE_MAX_AGE,
+        'STALE_WHILE_REVALIDATE': 60,
+        'STALE_IF_ERROR': 86400,
+    },
+    # The statistics change without a publish (HomePage.statistics_interval).
+    'home.HomePage': {'S_MAXAGE': min(FRONT_CACHE_MAX_AGE, 600)},
+}
+
+# Static export (apps/home/static_export.py): `manage.py export_static` renders
+# the public pages to STATIC_EXPORT_DIR for nginx to serve. With
+# STATIC_EXPORT_ENABLED, publishing and unpublishing re-render the page and
+# the listings that show it there.
+STATIC_EXPORT_ENABLED = env.bool('STATIC_EXPORT_ENABLED', default=False)
+STATIC_EXPORT_DIR = env('STATIC_EXPORT_DIR', default=str(BASE_DIR / 'export'))
+
+# Independent queries of a request, such as the sections of the home page
+# feed, run concurrently on a per-process thread pool (apps/home/concurrency.py).
+# Unset, this is on for every database but SQLite.
+CONCURRENT_QUERIES_ENABLED = env.bool('CONCURRENT_QUERIES_ENABLED', default=None)
+CONCURRENT_QUERY_THREADS = env.int('CONCURRENT_QUERY_THREADS', default=4)
+
+# Per-request performance metrics (apps/home/performance.py): logged on the
+# apps.home.performance logger, at WARNING for slow requests and requests
+# over their query budget, and sent as a Server-Timing header to staff and
+# to requests with a token from `manage.py server_timing_token`.
+PERFORMANCE_METRICS_ENABLED = env.bool('PERFORMANCE_METRICS_ENABLED', default=True)
+PERFORMANCE_SLOW_REQUEST_MS = env.int('PERFORMANCE_SLOW_REQUEST_MS', default=1000)
+PERFORMANCE_TOKEN_MAX_AGE = 24 * 60 * 60
+# Maximum SQL queries per request, by page model label, URL name or view path
+PERFORMANCE_QUERY_BUDGETS = {
+    'home.HomePage': 15,
+    'home.NewsIndexPage': 12,
+    'home.AnnouncementIndexPage': 12,
+    'home.BlogIndexPage': 12,
+    'home.NewsPage': 12,
+    'home.AnnouncementPage': 12,
+    'home.BlogPage': 12,
+    'home.GalleryPage': 12,
+    'gallery_images': 8,
+    'autocomplete': 5,
+}
+
+# Sampling profiler for single requests (apps/home/profiling.py): staff add
+# ?_profile to a URL, others send a token from `manage.py request_profiles
+# --token` in X-Profile-Token. PROFILING_SAMPLE_RATE also profiles that
+# fraction of all requests.
+PROFILING_ENABLED = env.bool('PROFILING_ENABLED', default=True)
+PROFILING_SAMPLE_RATE = env.float('PROFILING_SAMPLE_RATE', default=0.0)
+PROFILING_INTERVAL = 0.001
+PROFILING_DIR = env('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILING_MAX_PROFILES = 200
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+
+# Critical CSS (apps/home/critical_css.py): pages inline the rules their first
+# CRITICAL_CSS_FOLD_ELEMENTS elements need and load the stylesheet without
+# blocking rendering. Changing the fold requires running build_assets.
+CRITICAL_CSS_ENABLED = env.bool('CRITICAL_CSS_ENABLED', default=True)
+CRITICAL_CSS_FOLD_ELEMENTS = env.int('CRITICAL_CSS_FOLD_ELEMENTS', default=120)
+
 # Security settings for production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -13,6 +13,9 @@ DATABASES = {
     'default': env.db('DATABASE_URL', default='sqlite:///' + str(BASE_DIR / 'db.sqlite3')),
 }
 
+# Shared cache tier; defaults to a file cache that all workers can read
+CACHES['shared'] = env.cache('CACHE_URL', default='filecache://' + str(BASE_DIR / 'cache'))
+
 # Email configuration for production
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = env('EMAIL_HOST', default='smtp.example.com')
@@ -45,6 +48,17 @@ LOGGING = {
             'class': 'logging.FileHandler',
             'filename': os.path.join(BASE_DIR, 'logs', 'portal.log'),
         },
+        'performance': {
+            'class': 'logging.FileHandler',
+            'filename': os.path.join(BASE_DIR, 'logs', 'performance.log'),
+            'formatter': 'timestamped',
+        },
+    },
+    'formatters': {
+        'timestamped': {
+            'format': '{asctime} {levelname} {message}',
+            'style': '{',
+        },
     },
     'loggers': {
         'django': {
@@ -52,6 +66,13 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': True,
         },
+        # Slow and over-budget requests; set PERFORMANCE_LOG_LEVEL=INFO to
+        # log every request.
+        'apps.home.performance': {
+            'handlers': ['performance'],
+            'level': env('PERFORMANCE_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
     },
 }
 
@@ -13,8 +13,13 @@ from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 from django.urls import path, re_path, include
 
+from apps.home import views as home_views
+
 urlpatterns = [
     path('django-admin/', admin.site.urls),
+    path('monitoring/cache/', home_views.cache_stats, name='cache_stats'),
+    path('api/galleries/<int:page_id>/images/', home_views.gallery_images, name='gallery_images'),
+    path('api/autocomplete/', home_views.autocomplete_suggestions, name='autocomplete'),
     path('admin/', include(wagtailadmin_urls)),
     path('documents/', include(wagtaildocs_urls)),
 ]
@@ -59,3 +59,107 @@ function formatPersianDate(date) {
     const formatter = new Intl.DateTimeFormat('fa-IR', options);
     return formatter.format(new Date(date));
 }
+
+// Load further gallery images as the visitor scrolls towards the end
+document.addEventListener('DOMContentLoaded', function() {
+    const sentinel = document.querySelector('.gallery-sentinel');
+    const grid = document.querySelector('.gallery-grid');
+    if (!sentinel || !grid || !('IntersectionObserver' in window)) {
+        return;
+    }
+
+    let loading = false;
+    const observer = new IntersectionObserver(entries => {
+        const nextUrl = sentinel.dataset.nextUrl;
+        if (loading || !nextUrl || !entries.some(entry => entry.isIntersecting)) {
+            return;
+        }
+        loading = true;
+        fetch(nextUrl, { headers: { 'Accept': 'application/json' } })
+            .then(response => response.ok ? response.json() : Promise.reject(response.status))
+            .then(data => {
+                grid.insertAdjacentHTML('beforeend', data.html);
+                if (data.next) {
+                    sentinel.dataset.nextUrl = data.next;
+                } else {
+                    observer.disconnect();
+                    sentinel.remove();
+                }
+            })
+            .catch(error => console.warn('Could not load more gallery images:', error))
+            .finally(() => { loading = false; });
+    }, { rootMargin: '600px 0px' });
+
+    observer.observe(sentinel);
+});
+
+// Show the full-size image of a gallery link in a dialog, with the other
+// links of its data-lightbox group as previous and next images
+document.addEventListener('DOMContentLoaded', function() {
+    if (!('HTMLDialogElement' in window)) {
+        return;
+    }
+
+    let dialog = null;
+    let group = [];
+    let index = 0;
+
+    function createDialog() {
+        dialog = document.createElement('dialog');
+        dialog.className = 'lightbox';
+        dialog.innerHTML =
+            '<button type="button" class="lightbox-close" aria-label="بستن">&times;</button>' +
+            '<button type="button" class="lightbox-prev" aria-label="قبلی">&rsaquo;</button>' +
+            '<figure><img alt=""><figcaption><span class="lightbox-title"></span>' +
+            '<span class="lightbox-label"></span></figcaption></figure>' +
+            '<button type="button" class="lightbox-next" aria-label="بعدی">&lsaquo;</button>';
+        document.body.appendChild(dialog);
+
+        dialog.querySelector('.lightbox-close').addEventListener('click', () => dialog.close());
+        dialog.querySelector('.lightbox-prev').addEventListener('click', () => show(index - 1));
+        dialog.querySelector('.lightbox-next').addEventListener('click', () => show(index + 1));
+        // A click on the backdrop lands on the dialog itself
+        dialog.addEventListener('click', e => {
+            if (e.target === dialog) {
+                dialog.close();
+            }
+        });
+        dialog.addEventListener('keydown', e => {
+            if (e.key === 'ArrowLeft') {
+                show(index + 1);
+            } else if (e.key === 'ArrowRight') {
+                show(index - 1);
+            }
+        });
+    }
+
+    function show(i) {
+        index = (i + group.length) % group.length;
+        const link = group[index];
+        const image = dialog.querySelector('img');
+        image.src = link.href;
+        image.alt = link.dataset.title || '';
+        dialog.querySelector('.lightbox-title').textContent = link.dataset.title || '';
+        dialog.querySelector('.lightbox-label').textContent = group.length > 1
+            ? `تصویر ${(index + 1).toLocaleString('fa-IR')} از ${group.length.toLocaleString('fa-IR')}`
+            : '';
+        dialog.querySelectorAll('.lightbox-prev, .lightbox-next').forEach(button => {
+            button.hidden = group.length < 2;
+        });
+    }
+
+    // Delegated, so that gallery images loaded later open as well
+    document.addEventListener('click', e => {
+        const link = e.target.closest('a[data-lightbox]');
+        if (!link || e.button !== 0 || e.ctrlKey || e.metaKey || e.shiftKey) {
+            return;
+        }
+        e.preventDefault();
+        group = Array.from(document.querySelectorAll(`a[data-lightbox="${CSS.escape(link.dataset.lightbox)}"]`));
+        if (!dialog) {
+            createDialog();
+        }
+        show(group.indexOf(link));
+        dialog.showModal();
+    });
+});